@@ -0,0 +1,175 @@
+import threading
+from bisect import bisect_left, insort
+from datetime import datetime
+from typing import Dict, Iterable, List, Optional, Set
+
+from announcement_store import AnnouncementStore, get_announcement_store
+
+# Notification categories shown on the notifications page, most urgent first
+CATEGORY_PRIORITY = {'emergency': 1, 'health': 2, 'welfare': 3, 'general': 4}
+
+def announcement_categories(record: dict) -> Set[str]:
+    """Categories an announcement is filtered under (by substring of its type, 'general' only on an exact match)"""
+    announcement_type = str(record.get('announcement_type', 'general')).lower()
+    categories = {category for category in ('emergency', 'health', 'welfare') if category in announcement_type}
+    if announcement_type == 'general':
+        categories.add('general')
+    return categories
+
+def _parse_timestamp(timestamp) -> Optional[datetime]:
+    if isinstance(timestamp, datetime):
+        parsed = timestamp
+    else:
+        try:
+            parsed = datetime.fromisoformat(timestamp)
+        except (TypeError, ValueError):
+            return None
+    if parsed.tzinfo is not None:
+        # Compare everything as local wall-clock time, like datetime.now()
+        parsed = parsed.astimezone().replace(tzinfo=None)
+    return parsed
+
+# ======================
+# ANNOUNCEMENT INDEX
+# ======================
+class AnnouncementIndex:
+    """
+    In-memory index of the announcement store for read-heavy pages.
+
+    Records are kept with their timestamps parsed once, in chronological
+    order, and with inverted indexes by district, category and language,
+    so a filtered and sorted view costs set operations over ids rather than
+    a pass over every record. One index is meant to be shared by every
+    session of a process; refresh() brings it up to the store revision by
+    applying changes_since() and only rebuilds after a compaction.
+    """
+
+    def __init__(self, store: AnnouncementStore = None):
+        self.store = store or get_announcement_store()
+        self._lock = threading.Lock()
+        self._revision = None
+        self._rebuild([], None)
+
+    def _rebuild(self, records: Iterable[dict], revision: Optional[int]) -> None:
+        self._records: Dict[str, dict] = {}
+        self._times: Dict[str, datetime] = {}
+        # (parsed timestamp, id) pairs, oldest first
+        self._order: List[tuple] = []
+        self._by_district: Dict[str, Set[str]] = {}
+        self._by_category: Dict[str, Set[str]] = {}
+        self._by_language: Dict[str, Set[str]] = {}
+        for record in records:
+            self._add(record)
+        self._revision = revision
+
+    @staticmethod
+    def _keys(record: dict) -> tuple:
+        languages = set(record.get('target_langs') or [])
+        languages.add(record.get('source_lang'))
+        return set(record.get('districts') or []), announcement_categories(record), languages
+
+    def _add(self, record: dict) -> None:
+        announcement_id = record.get('id')
+        timestamp = _parse_timestamp(record.get('timestamp'))
+        if announcement_id is None or timestamp is None:
+            return
+        self._records[announcement_id] = record
+        self._times[announcement_id] = timestamp
+        insort(self._order, (timestamp, announcement_id))
+        for index, keys in zip((self._by_district, self._by_category, self._by_language), self._keys(record)):
+            for key in keys:
+                index.setdefault(key, set()).add(announcement_id)
+
+    def _remove(self, announcement_id: str) -> None:
+        record = self._records.pop(announcement_id, None)
+        if record is None:
+            return
+        timestamp = self._times.pop(announcement_id)
+        del self._order[bisect_left(self._order, (timestamp, announcement_id))]
+        for index, keys in zip((self._by_district, self._by_category, self._by_language), self._keys(record)):
+            for key in keys:
+                ids = index.get(key)
+                if ids is not None:
+                    ids.discard(announcement_id)
+                    if not ids:
+                        del index[key]
+
+    def refresh(self) -> int:
+        """
+        Catch up with the store.
+
+        Returns:
+            int: The store revision the index now reflects
+        """
+        with self._lock:
+            return self._refresh()
+
+    def _refresh(self) -> int:
+        revision = self.store.revision()
+        if revision == self._revision:
+            return revision
+        changes = self.store.changes_since(self._revision) if self._revision is not None else None
+        if changes is None:
+            # First load, or the store was compacted past our revision
+            self._rebuild(self.store.all(), revision)
+            return revision
+        for announcement_id in changes.deleted:
+            self._remove(announcement_id)
+        for record in changes.created + changes.updated:
+            self._remove(record['id'])
+            self._add(record)
+        self._revision = changes.revision
+        return self._revision
+
+    @property
+    def revision(self) -> Optional[int]:
+        return self._revision
+
+    def __len__(self) -> int:
+        return len(self._records)
+
+    def select(self, since: datetime = None, districts: Iterable[str] = None,
+               excluded_categories: Iterable[str] = None, languages: Iterable[str] = None,
+               sort_order: str = "Newest first") -> List[dict]:
+        """
+        Announcements matching the notifications page filters.
+
+        Args:
+            since: Only announcements at or after this time
+            districts: Only announcements for any of these districts (None or empty for all)
+            excluded_categories: Drop announcements in any of these categories
+            languages: Only announcements available in any of these languages (None for all)
+            sort_order: "Newest first", "Oldest first" or "Priority" (oldest first within a priority)
+
+        Returns:
+            list: The matching records; treat them as read-only, they are shared between sessions
+        """
+        with self._lock:
+            self._refresh()
+            candidates = None
+            if districts:
+                candidates = self._union(self._by_district, districts)
+            if languages is not None:
+                matching = self._union(self._by_language, languages)
+                candidates = matching if candidates is None else candidates & matching
+            excluded = self._union(self._by_category, excluded_categories or [])
+
+            start = bisect_left(self._order, (since,)) if since else 0
+            window = self._order[start:]
+            if sort_order == "Newest first":
+                window.reverse()
+            selected = [
+                self._records[announcement_id] for _, announcement_id in window
+                if (candidates is None or announcement_id in candidates) and announcement_id not in excluded
+            ]
+
+        if sort_order == "Priority":
+            selected.sort(key=lambda record: CATEGORY_PRIORITY.get(str(record.get('announcement_type', 'general')).lower(), 4))
+        return selected
+
+    @staticmethod
+    def _union(index: Dict[str, Set[str]], keys: Iterable[str]) -> Set[str]:
+        ids = set()
+        for key in keys:
+            ids |= index.get(key, set())
+        return ids
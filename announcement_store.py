@@ -0,0 +1,726 @@
+import os
+import json
+import uuid
+import sqlite3
+import logging
+import threading
+import time
+from bisect import bisect_left, insort
+from collections import namedtuple
+from datetime import datetime
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+
+from file_lock import FileLock
+
+logger = logging.getLogger(__name__)
+
+LEGACY_LOG_PATH = 'announcement_logs.json'
+
+DEFAULT_STORAGE_CONFIG = {
+    "backend": "log",
+    "path": "announcement_logs.jsonl",
+    "fsync": False,
+    "compact_min_garbage": 1000
+}
+
+class ChangeSet(namedtuple("ChangeSet", ["created", "updated", "deleted", "revision", "revisions"])):
+    """
+    Result of AnnouncementStore.changes_since(): new and modified records,
+    deleted ids, the revision the change set is complete up to, and the
+    revision of each change by announcement id.
+    """
+    __slots__ = ()
+
+    def events(self) -> List[Tuple[str, dict]]:
+        """("created" | "updated" | "deleted", record or {"id": ...}) pairs in the order they were written"""
+        events = ([(self.revisions[record['id']], 'created', record) for record in self.created] +
+                  [(self.revisions[record['id']], 'updated', record) for record in self.updated] +
+                  [(self.revisions[announcement_id], 'deleted', {'id': announcement_id})
+                   for announcement_id in self.deleted])
+        events.sort(key=lambda event: event[0])
+        return [(event, data) for _, event, data in events]
+
+# ======================
+# QUERY HELPERS
+# ======================
+def _lowered(values: Iterable) -> set:
+    return {str(value).lower() for value in values or []}
+
+def record_matches(record: dict, types: List[str] = None, districts: List[str] = None,
+                   languages: List[str] = None) -> bool:
+    """Whether a record passes the type, district and language filters of AnnouncementStore.query()"""
+    if types and not _lowered(types) & _lowered([record.get('type'), record.get('announcement_type')]):
+        return False
+    if districts and not _lowered(districts) & _lowered(record.get('districts')):
+        return False
+    if languages:
+        record_languages = _lowered(record.get('target_langs')) | _lowered(record.get('translations') or {})
+        if not _lowered(languages) & record_languages:
+            return False
+    return True
+
+def in_time_window(timestamp: str, start: str = None, end: str = None) -> bool:
+    """Whether a timestamp falls in the start/end window of AnnouncementStore.query()"""
+    return (not start or timestamp >= start) and not _after_window(timestamp, end, None)
+
+def _after_window(timestamp: str, end: Optional[str], before: Optional[Tuple[str, str]] = None,
+                  announcement_id: str = "") -> bool:
+    """Past the ``end`` of a time window (compared by prefix, so a bare date covers the whole day) or not before the cursor"""
+    if before is not None and (timestamp, announcement_id) >= before:
+        return True
+    return end is not None and timestamp[:len(end)] > end
+
+CURSOR_SEPARATOR = "|"
+
+def encode_cursor(record: dict) -> str:
+    """Pagination cursor pointing just past a record, for the ``before`` of AnnouncementStore.query()"""
+    return f"{record['timestamp']}{CURSOR_SEPARATOR}{record['id']}"
+
+def parse_cursor(cursor: str) -> Tuple[str, str]:
+    """
+    (timestamp, id) position of a cursor from encode_cursor().
+
+    A bare timestamp (the cursor format of earlier responses) maps to the
+    position before every record with that timestamp.
+    """
+    timestamp, _, announcement_id = cursor.partition(CURSOR_SEPARATOR)
+    return timestamp, announcement_id
+
+# ======================
+# STORE API
+# ======================
+class AnnouncementStore:
+    """
+    Common API for announcement persistence.
+
+    Every record carries an ``id`` and an ISO ``timestamp``. Both are assigned
+    on insert when missing and are indexed, so point lookups and deletes do
+    not depend on the size of the history.
+    """
+
+    def __init__(self):
+        self._changed = threading.Condition()
+        self._generation = 0
+
+    def _notify_change(self) -> None:
+        """Wake wait_for_change() callers after a write from this process"""
+        with self._changed:
+            self._generation += 1
+            self._changed.notify_all()
+
+    def wait_for_change(self, revision: int, timeout: float, poll_interval: float = 1.0) -> int:
+        """
+        Block until the store moves past a revision or the timeout expires.
+
+        Writes made through this store object wake waiters at once; writes
+        from other processes are noticed within ``poll_interval``.
+
+        Returns:
+            int: The current revision
+        """
+        deadline = time.monotonic() + timeout
+        while True:
+            with self._changed:
+                generation = self._generation
+            current = self.revision()
+            remaining = deadline - time.monotonic()
+            if current != revision or remaining <= 0:
+                return current
+            with self._changed:
+                if self._generation == generation:
+                    self._changed.wait(min(poll_interval, remaining))
+
+    def insert(self, record: dict) -> dict:
+        """
+        Persist a new announcement record.
+
+        Args:
+            record: Announcement fields (id/timestamp are filled in if missing)
+
+        Returns:
+            dict: The stored record including its id and timestamp
+        """
+        raise NotImplementedError
+
+    def update(self, announcement_id: str, changes: dict) -> Optional[dict]:
+        """Merge top-level fields into a record. Returns the updated record or None."""
+        raise NotImplementedError
+
+    def get(self, announcement_id: str) -> Optional[dict]:
+        """Look up a record by id"""
+        raise NotImplementedError
+
+    def get_by_timestamp(self, timestamp: str) -> Optional[dict]:
+        """Look up a record by its timestamp (the one with the lowest id if several share it)"""
+        raise NotImplementedError
+
+    def ids_by_timestamp(self, timestamp: str) -> List[str]:
+        """Ids of every record with a timestamp; the legacy log has several per timestamp"""
+        raise NotImplementedError
+
+    def delete(self, announcement_id: str) -> bool:
+        """Delete a record by id. Returns False if it did not exist."""
+        raise NotImplementedError
+
+    def delete_by_timestamp(self, timestamp: str) -> bool:
+        """Delete every record with a timestamp. Returns False if none existed."""
+        deleted = [self.delete(announcement_id) for announcement_id in self.ids_by_timestamp(timestamp)]
+        return any(deleted)
+
+    def all(self) -> List[dict]:
+        """Return all records ordered by timestamp (oldest first)"""
+        raise NotImplementedError
+
+    def revision(self) -> int:
+        """Counter that increases with every write, usable as an ETag or ``since`` token"""
+        raise NotImplementedError
+
+    def changes_since(self, revision: int) -> Optional[ChangeSet]:
+        """
+        Records written and ids deleted after a revision.
+
+        Returns:
+            ChangeSet: Records created and updated since (oldest first), deleted ids,
+            the current revision and each change's revision, or None if the revision is too old to tell (e.g. the log was
+            compacted since) and the caller must reload
+        """
+        raise NotImplementedError
+
+    def query(self, types: List[str] = None, districts: List[str] = None, languages: List[str] = None,
+              start: str = None, end: str = None, before: Tuple[str, str] = None, limit: int = None) -> List[dict]:
+        """
+        Newest-first records matching every given filter.
+
+        Args:
+            types: Announcement types (matches ``type`` or ``announcement_type``, case-insensitive)
+            districts: Records targeting any of these districts
+            languages: Records targeting or translated into any of these languages
+            start: Earliest timestamp (inclusive)
+            end: Latest timestamp (inclusive)
+            before: Pagination cursor (see parse_cursor); only records ordered before this
+                (timestamp, id), so records sharing the boundary timestamp are not skipped
+            limit: Maximum number of records to return
+
+        Returns:
+            list: Matching records, newest first
+        """
+        records = []
+        for record in reversed(self.all()):
+            timestamp = record['timestamp']
+            if start and timestamp < start:
+                break
+            if (not _after_window(timestamp, end, before, record['id'])
+                    and record_matches(record, types, districts, languages)):
+                records.append(record)
+                if len(records) == limit:
+                    break
+        return records
+
+    def close(self) -> None:
+        pass
+
+    @staticmethod
+    def _prepare(record: dict) -> dict:
+        record = dict(record)
+        if not record.get('id'):
+            record['id'] = uuid.uuid4().hex
+        if not record.get('timestamp'):
+            record['timestamp'] = datetime.now().isoformat()
+        return record
+
+    def _import_legacy(self, legacy_path: str) -> None:
+        """Import records from the old whole-file JSON log"""
+        try:
+            with open(legacy_path, 'r', encoding='utf-8') as f:
+                legacy = json.load(f)
+        except (FileNotFoundError, json.JSONDecodeError):
+            return
+        for record in legacy:
+            self.insert(record)
+        logger.info(f"Imported {len(legacy)} announcements from {legacy_path}")
+
+# ======================
+# APPEND-ONLY LOG BACKEND
+# ======================
+class AppendOnlyLogStore(AnnouncementStore):
+    """
+    Announcement store backed by an append-only JSON-lines log.
+
+    Each write appends a single ``put``/``patch``/``del`` entry; the full
+    state lives in memory with id and timestamp indexes. Other processes
+    appending to the same log are picked up incrementally from the last
+    read offset. The log is compacted once garbage entries outweigh live ones.
+
+    Every entry bumps the store revision (its position in the log, carried
+    across compactions by a leading ``base`` entry), which lets readers ask
+    for just the changes since a revision they have already seen.
+    """
+
+    def __init__(self, path: str, fsync: bool = False, compact_min_garbage: int = 1000,
+                 legacy_path: Optional[str] = LEGACY_LOG_PATH):
+        super().__init__()
+        self.path = path
+        self.fsync = fsync
+        self.compact_min_garbage = compact_min_garbage
+        self._lock = threading.RLock()
+        self._file_lock = FileLock(path + '.lock')
+        self._reset()
+
+        with self._file_lock:
+            if not os.path.exists(path) and legacy_path and os.path.exists(legacy_path):
+                self._import_legacy(legacy_path)
+            self._sync()
+
+    def _reset(self) -> None:
+        self._records: Dict[str, dict] = {}
+        self._by_timestamp: Dict[str, Set[str]] = {}
+        # (timestamp, id) pairs; entries for deleted ids are skipped lazily
+        self._order: List[tuple] = []
+        self._offset = 0
+        self._inode = None
+        self._garbage = 0
+        self._revision = 0
+        # Oldest revision changes_since() can answer for; raised by compaction
+        self._floor = 0
+        self._revs: Dict[str, int] = {}
+        self._created: Dict[str, int] = {}
+        self._deleted: Dict[str, int] = {}
+
+    # ---- log replay ----
+    def _sync(self) -> None:
+        """Apply entries appended to the log since the last read"""
+        try:
+            stat = os.stat(self.path)
+        except FileNotFoundError:
+            if self._inode is not None:
+                self._reset()
+            return
+
+        inode = (stat.st_dev, stat.st_ino)
+        if inode != self._inode or stat.st_size < self._offset:
+            # Log was compacted or replaced by another process
+            self._reset()
+            self._inode = inode
+        if stat.st_size == self._offset:
+            return
+
+        with open(self.path, 'rb') as f:
+            f.seek(self._offset)
+            data = f.read()
+        end = data.rfind(b'\n') + 1  # ignore a partially written trailing line
+        for line in data[:end].splitlines():
+            if not line.strip():
+                continue
+            try:
+                self._apply(json.loads(line))
+            except (json.JSONDecodeError, KeyError) as e:
+                logger.error(f"Skipping corrupt announcement log entry: {str(e)}")
+        self._offset += end
+
+    def _apply(self, entry: dict) -> None:
+        op = entry['op']
+        if op == 'base':
+            # First entry of a compacted log; the history before it is gone
+            self._revision = self._floor = entry['rev']
+            return
+        revision = entry.get('rev', self._revision + 1)
+        self._revision = max(self._revision, revision)
+        announcement_id = entry['id']
+        if op == 'put':
+            self._put(announcement_id, entry['record'], revision)
+        elif op == 'patch':
+            record = self._records.get(announcement_id)
+            if record is not None:
+                self._put(announcement_id, {**record, **entry['changes']}, revision)
+        elif op == 'del':
+            if announcement_id in self._records:
+                self._unindex(announcement_id)
+                del self._records[announcement_id]
+                del self._revs[announcement_id]
+                del self._created[announcement_id]
+                self._deleted[announcement_id] = revision
+                self._garbage += 2
+
+    def _put(self, announcement_id: str, record: dict, revision: int) -> None:
+        if announcement_id in self._records:
+            self._garbage += 1
+            self._unindex(announcement_id)
+        else:
+            self._created[announcement_id] = revision
+        self._records[announcement_id] = record
+        self._revs[announcement_id] = revision
+        self._deleted.pop(announcement_id, None)
+        self._by_timestamp.setdefault(record['timestamp'], set()).add(announcement_id)
+        key = (record['timestamp'], announcement_id)
+        if not self._order or self._order[-1] <= key:
+            self._order.append(key)
+        else:
+            insort(self._order, key)
+
+    def _unindex(self, announcement_id: str) -> None:
+        timestamp = self._records[announcement_id]['timestamp']
+        ids = self._by_timestamp.get(timestamp)
+        if ids is not None:
+            ids.discard(announcement_id)
+            if not ids:
+                del self._by_timestamp[timestamp]
+
+    def _append(self, entry: dict) -> None:
+        line = (json.dumps(entry, ensure_ascii=False) + '\n').encode('utf-8')
+        with open(self.path, 'ab') as f:
+            f.write(line)
+            f.flush()
+            if self.fsync:
+                os.fsync(f.fileno())
+        # Callers hold the file lock and synced first, so the line landed at our offset
+        if self._inode is None:
+            stat = os.stat(self.path)
+            self._inode = (stat.st_dev, stat.st_ino)
+        self._offset += len(line)
+        self._apply(entry)
+
+    def _write(self, entry: dict) -> None:
+        with self._lock, self._file_lock:
+            self._sync()
+            self._append(entry)
+            self._maybe_compact()
+        self._notify_change()
+
+    def _maybe_compact(self) -> None:
+        """Compact once superseded entries outnumber live records; caller holds both locks"""
+        if self._garbage > max(self.compact_min_garbage, len(self._records)):
+            self._compact()
+
+    def _compact(self) -> None:
+        """Rewrite the log with one put entry per live record"""
+        tmp_path = self.path + '.tmp'
+        with open(tmp_path, 'wb') as f:
+            base = {'op': 'base', 'rev': self._revision}
+            f.write((json.dumps(base) + '\n').encode('utf-8'))
+            for record in self.all():
+                entry = {'op': 'put', 'id': record['id'], 'rev': self._revs[record['id']], 'record': record}
+                f.write((json.dumps(entry, ensure_ascii=False) + '\n').encode('utf-8'))
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, self.path)
+        self._reset()
+        self._sync()
+        logger.info(f"Compacted announcement log to {len(self._records)} records")
+
+    # ---- public API ----
+    def insert(self, record: dict) -> dict:
+        record = self._prepare(record)
+        self._write({'op': 'put', 'id': record['id'], 'record': record})
+        return dict(record)
+
+    def update(self, announcement_id: str, changes: dict) -> Optional[dict]:
+        with self._lock, self._file_lock:
+            self._sync()
+            if announcement_id not in self._records:
+                return None
+            self._append({'op': 'patch', 'id': announcement_id, 'changes': changes})
+            record = dict(self._records[announcement_id])
+            self._maybe_compact()
+        self._notify_change()
+        return record
+
+    def get(self, announcement_id: str) -> Optional[dict]:
+        with self._lock:
+            self._sync()
+            record = self._records.get(announcement_id)
+            return dict(record) if record is not None else None
+
+    def get_by_timestamp(self, timestamp: str) -> Optional[dict]:
+        with self._lock:
+            self._sync()
+            ids = self._by_timestamp.get(timestamp)
+            return dict(self._records[min(ids)]) if ids else None
+
+    def ids_by_timestamp(self, timestamp: str) -> List[str]:
+        with self._lock:
+            self._sync()
+            return sorted(self._by_timestamp.get(timestamp, ()))
+
+    def delete(self, announcement_id: str) -> bool:
+        with self._lock, self._file_lock:
+            self._sync()
+            if announcement_id not in self._records:
+                return False
+            self._append({'op': 'del', 'id': announcement_id})
+            self._maybe_compact()
+        self._notify_change()
+        return True
+
+    def delete_by_timestamp(self, timestamp: str) -> bool:
+        with self._lock, self._file_lock:
+            self._sync()
+            ids = sorted(self._by_timestamp.get(timestamp, ()))
+            for announcement_id in ids:
+                self._append({'op': 'del', 'id': announcement_id})
+            self._maybe_compact()
+        if ids:
+            self._notify_change()
+        return bool(ids)
+
+    def all(self) -> List[dict]:
+        with self._lock:
+            self._sync()
+            records = []
+            seen = set()
+            for timestamp, announcement_id in self._order:
+                record = self._records.get(announcement_id)
+                if record is not None and record['timestamp'] == timestamp and announcement_id not in seen:
+                    seen.add(announcement_id)
+                    records.append(dict(record))
+            if len(self._order) > 2 * len(records) + 64:
+                self._order = [(r['timestamp'], r['id']) for r in records]
+            return records
+
+    def revision(self) -> int:
+        with self._lock:
+            self._sync()
+            return self._revision
+
+    def changes_since(self, revision: int) -> Optional[ChangeSet]:
+        with self._lock:
+            self._sync()
+            if revision < self._floor or revision > self._revision:
+                return None
+            created, updated, revisions = [], [], {}
+            for announcement_id, rev in sorted(self._revs.items(), key=lambda item: item[1]):
+                if rev > revision:
+                    changes = created if self._created[announcement_id] > revision else updated
+                    changes.append(dict(self._records[announcement_id]))
+                    revisions[announcement_id] = rev
+            deleted = []
+            for announcement_id, rev in self._deleted.items():
+                if rev > revision:
+                    deleted.append(announcement_id)
+                    revisions[announcement_id] = rev
+            return ChangeSet(created, updated, deleted, self._revision, revisions)
+
+    def query(self, types: List[str] = None, districts: List[str] = None, languages: List[str] = None,
+              start: str = None, end: str = None, before: Tuple[str, str] = None, limit: int = None) -> List[dict]:
+        with self._lock:
+            self._sync()
+            # Walk the timestamp index backwards from the cursor, copying only what is returned
+            index = bisect_left(self._order, tuple(before)) if before else len(self._order)
+            records = []
+            seen = set()
+            while index > 0 and len(records) != limit:
+                index -= 1
+                timestamp, announcement_id = self._order[index]
+                if start and timestamp < start:
+                    break
+                record = self._records.get(announcement_id)
+                if record is None or record['timestamp'] != timestamp or announcement_id in seen:
+                    continue
+                seen.add(announcement_id)
+                if (not _after_window(timestamp, end, before, announcement_id)
+                        and record_matches(record, types, districts, languages)):
+                    records.append(dict(record))
+            return records
+
+# ======================
+# SQLITE BACKEND
+# ======================
+class SQLiteAnnouncementStore(AnnouncementStore):
+    """
+    Announcement store backed by SQLite with id and timestamp indexes.
+
+    Each write bumps a revision counter kept in the database; rows remember
+    the revision that last wrote them and deletes leave a tombstone, so
+    changes_since() can always answer.
+    """
+
+    def __init__(self, path: str, legacy_path: Optional[str] = LEGACY_LOG_PATH, **_):
+        super().__init__()
+        self.path = path
+        self._lock = threading.RLock()
+        is_new = not os.path.exists(path)
+        self._conn = sqlite3.connect(path, check_same_thread=False, timeout=30)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("""
+            CREATE TABLE IF NOT EXISTS announcements (
+                id TEXT PRIMARY KEY,
+                timestamp TEXT NOT NULL,
+                body TEXT NOT NULL
+            )
+        """)
+        self._conn.execute("CREATE INDEX IF NOT EXISTS idx_announcements_timestamp ON announcements(timestamp)")
+        columns = [row[1] for row in self._conn.execute("PRAGMA table_info(announcements)")]
+        if 'rev' not in columns:
+            self._conn.execute("ALTER TABLE announcements ADD COLUMN rev INTEGER NOT NULL DEFAULT 0")
+        if 'created_rev' not in columns:
+            self._conn.execute("ALTER TABLE announcements ADD COLUMN created_rev INTEGER NOT NULL DEFAULT 0")
+        self._conn.execute("CREATE TABLE IF NOT EXISTS deleted_announcements (id TEXT PRIMARY KEY, rev INTEGER NOT NULL)")
+        self._conn.execute("CREATE TABLE IF NOT EXISTS store_meta (name TEXT PRIMARY KEY, value INTEGER NOT NULL)")
+        self._conn.execute("INSERT OR IGNORE INTO store_meta (name, value) VALUES ('revision', 0)")
+        self._conn.commit()
+        if is_new and legacy_path and os.path.exists(legacy_path):
+            self._import_legacy(legacy_path)
+
+    def _next_revision(self) -> int:
+        """Bump the revision counter; call inside the write transaction"""
+        self._conn.execute("UPDATE store_meta SET value = value + 1 WHERE name = 'revision'")
+        return self._conn.execute("SELECT value FROM store_meta WHERE name = 'revision'").fetchone()[0]
+
+    def _fetch_one(self, query: str, params: tuple) -> Optional[dict]:
+        with self._lock:
+            row = self._conn.execute(query, params).fetchone()
+        return json.loads(row[0]) if row else None
+
+    def insert(self, record: dict) -> dict:
+        record = self._prepare(record)
+        with self._lock, self._conn:
+            revision = self._next_revision()
+            # Upsert keeps created_rev of an existing row
+            self._conn.execute(
+                """INSERT INTO announcements (id, timestamp, body, rev, created_rev) VALUES (?, ?, ?, ?, ?)
+                   ON CONFLICT(id) DO UPDATE SET timestamp = excluded.timestamp, body = excluded.body, rev = excluded.rev""",
+                (record['id'], record['timestamp'], json.dumps(record, ensure_ascii=False), revision, revision)
+            )
+            self._conn.execute("DELETE FROM deleted_announcements WHERE id = ?", (record['id'],))
+        self._notify_change()
+        return dict(record)
+
+    def update(self, announcement_id: str, changes: dict) -> Optional[dict]:
+        with self._lock, self._conn:
+            record = self.get(announcement_id)
+            if record is None:
+                return None
+            record.update(changes)
+            self._conn.execute(
+                "UPDATE announcements SET timestamp = ?, body = ?, rev = ? WHERE id = ?",
+                (record['timestamp'], json.dumps(record, ensure_ascii=False), self._next_revision(), announcement_id)
+            )
+        self._notify_change()
+        return record
+
+    def get(self, announcement_id: str) -> Optional[dict]:
+        return self._fetch_one("SELECT body FROM announcements WHERE id = ?", (announcement_id,))
+
+    def get_by_timestamp(self, timestamp: str) -> Optional[dict]:
+        return self._fetch_one("SELECT body FROM announcements WHERE timestamp = ? ORDER BY id LIMIT 1", (timestamp,))
+
+    def ids_by_timestamp(self, timestamp: str) -> List[str]:
+        with self._lock:
+            rows = self._conn.execute("SELECT id FROM announcements WHERE timestamp = ? ORDER BY id", (timestamp,)).fetchall()
+        return [row[0] for row in rows]
+
+    def _delete_rows(self, ids: List[str]) -> int:
+        """Delete rows and leave their tombstones; call inside the write transaction"""
+        deleted = 0
+        for announcement_id in ids:
+            cursor = self._conn.execute("DELETE FROM announcements WHERE id = ?", (announcement_id,))
+            if cursor.rowcount > 0:
+                self._conn.execute(
+                    "INSERT OR REPLACE INTO deleted_announcements (id, rev) VALUES (?, ?)",
+                    (announcement_id, self._next_revision())
+                )
+                deleted += 1
+        return deleted
+
+    def delete(self, announcement_id: str) -> bool:
+        with self._lock, self._conn:
+            deleted = self._delete_rows([announcement_id])
+        if deleted:
+            self._notify_change()
+        return deleted > 0
+
+    def delete_by_timestamp(self, timestamp: str) -> bool:
+        with self._lock, self._conn:
+            deleted = self._delete_rows(self.ids_by_timestamp(timestamp))
+        if deleted:
+            self._notify_change()
+        return deleted > 0
+
+    def all(self) -> List[dict]:
+        with self._lock:
+            rows = self._conn.execute("SELECT body FROM announcements ORDER BY timestamp, id").fetchall()
+        return [json.loads(row[0]) for row in rows]
+
+    def revision(self) -> int:
+        with self._lock:
+            return self._conn.execute("SELECT value FROM store_meta WHERE name = 'revision'").fetchone()[0]
+
+    def changes_since(self, revision: int) -> Optional[ChangeSet]:
+        with self._lock:
+            current = self.revision()
+            if revision > current:
+                return None
+            rows = self._conn.execute(
+                "SELECT id, body, created_rev, rev FROM announcements WHERE rev > ? ORDER BY rev", (revision,)
+            ).fetchall()
+            deleted = self._conn.execute(
+                "SELECT id, rev FROM deleted_announcements WHERE rev > ?", (revision,)
+            ).fetchall()
+        created = [json.loads(body) for _, body, created_rev, _ in rows if created_rev > revision]
+        updated = [json.loads(body) for _, body, created_rev, _ in rows if created_rev <= revision]
+        revisions = {row[0]: row[3] for row in rows}
+        revisions.update(deleted)
+        return ChangeSet(created, updated, [row[0] for row in deleted], current, revisions)
+
+    def query(self, types: List[str] = None, districts: List[str] = None, languages: List[str] = None,
+              start: str = None, end: str = None, before: Tuple[str, str] = None, limit: int = None) -> List[dict]:
+        # Time bounds are pushed into SQL; the remaining filters run on the decoded rows
+        sql = "SELECT body FROM announcements WHERE 1 = 1"
+        params = []
+        if start:
+            sql += " AND timestamp >= ?"
+            params.append(start)
+        if before:
+            sql += " AND (timestamp < ? OR (timestamp = ? AND id < ?))"
+            params.extend([before[0], before[0], before[1]])
+        sql += " ORDER BY timestamp DESC, id DESC"
+        records = []
+        with self._lock:
+            for (body,) in self._conn.execute(sql, params):
+                record = json.loads(body)
+                if not _after_window(record['timestamp'], end) and record_matches(record, types, districts, languages):
+                    records.append(record)
+                    if len(records) == limit:
+                        break
+        return records
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
+
+# ======================
+# FACTORY
+# ======================
+STORE_BACKENDS = {
+    "log": AppendOnlyLogStore,
+    "sqlite": SQLiteAnnouncementStore
+}
+
+_store = None
+_store_lock = threading.Lock()
+
+def load_storage_config(config_path: str = 'config/system_config.json') -> dict:
+    """Read the ``storage`` section of the system config, falling back to defaults"""
+    storage_config = dict(DEFAULT_STORAGE_CONFIG)
+    try:
+        with open(config_path) as f:
+            storage_config.update(json.load(f).get("storage", {}))
+    except (FileNotFoundError, json.JSONDecodeError):
+        pass
+    return storage_config
+
+def create_announcement_store(storage_config: dict = None) -> AnnouncementStore:
+    """Build a store for the configured backend"""
+    storage_config = dict(storage_config or load_storage_config())
+    backend = storage_config.pop("backend")
+    if backend not in STORE_BACKENDS:
+        raise ValueError(f"Unknown announcement store backend: {backend}")
+    path = storage_config.pop("path")
+    return STORE_BACKENDS[backend](path, **storage_config)
+
+def get_announcement_store() -> AnnouncementStore:
+    """Process-wide announcement store shared by Flask, Streamlit and the CLI"""
+    global _store
+    with _store_lock:
+        if _store is None:
+            _store = create_announcement_store()
+        return _store
@@ -0,0 +1,88 @@
+"""
+Standalone announcement workers consuming the durable job journal.
+
+Run alongside app.py with ``workers.processes`` set in the system config,
+so the Flask API only journals announcements. Workers may also run on other
+machines that share the journal, store and audio directories.
+
+Usage:
+    python announcement_worker.py [--processes N]
+"""
+import os
+import json
+import socket
+import signal
+import argparse
+import multiprocessing
+
+DEFAULT_WORKER_CONFIG = {
+    "processes": 0,
+    "lease_seconds": 60,
+    "max_in_flight": 4,
+    "poll_interval": 0.5,
+    "drain_timeout": 30
+}
+
+def load_worker_config(config_path: str = 'config/system_config.json') -> dict:
+    values = dict(DEFAULT_WORKER_CONFIG)
+    try:
+        with open(config_path) as f:
+            values.update(json.load(f).get("workers", {}))
+    except (FileNotFoundError, json.JSONDecodeError):
+        pass
+    return values
+
+def run_worker_process(index: int, stop, config: dict) -> None:
+    """Entry point of one worker process"""
+    # Imported here so each spawned process builds its own store, journal and Dwani client
+    import dwani
+    from dotenv import load_dotenv
+    from bhashaseva_enhanced import AnnouncementSystem
+
+    # The parent handles Ctrl+C and sets ``stop``
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+    load_dotenv()
+    dwani.api_key = os.getenv("DWANI_API_KEY")
+    dwani.api_base = os.getenv("DWANI_API_BASE_URL")
+
+    system = AnnouncementSystem()
+    owner = f"{socket.gethostname()}:{os.getpid()}:{index}"
+    try:
+        system.run_worker(
+            owner, stop,
+            lease_seconds=config["lease_seconds"],
+            max_in_flight=config["max_in_flight"],
+            poll_interval=config["poll_interval"],
+            drain_timeout=config["drain_timeout"]
+        )
+    finally:
+        system.shutdown(wait=False)
+
+def main() -> None:
+    config = load_worker_config()
+    parser = argparse.ArgumentParser(description="Run BhashaSeva announcement worker processes")
+    parser.add_argument("--processes", type=int, default=config["processes"] or os.cpu_count() or 1,
+                        help="Number of worker processes (default: workers.processes or the CPU count)")
+    args = parser.parse_args()
+
+    context = multiprocessing.get_context("spawn")
+    stop = context.Event()
+    workers = [
+        context.Process(target=run_worker_process, args=(i, stop, config), name=f"announcement-worker-{i + 1}")
+        for i in range(args.processes)
+    ]
+    for worker in workers:
+        worker.start()
+    print(f"Started {len(workers)} announcement worker process(es)")
+
+    def request_stop(signum, frame):
+        print("Stopping workers after their in-flight announcements...")
+        stop.set()
+
+    signal.signal(signal.SIGINT, request_stop)
+    signal.signal(signal.SIGTERM, request_stop)
+    for worker in workers:
+        worker.join()
+
+if __name__ == "__main__":
+    main()
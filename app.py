@@ -3,15 +3,20 @@ import os
 import sys
 import hashlib
 from dotenv import load_dotenv
-from flask import Flask, request, jsonify, send_from_directory, render_template
+from flask import Flask, Response, request, jsonify, send_from_directory, render_template, stream_with_context
 from flask_cors import CORS  # Add CORS support for local development
 from bhashaseva_enhanced import AnnouncementSystem, Announcement, PriorityLevel, DeliveryChannel, AnnouncementType, LANGUAGE_CODE_MAP
 from shared_state import translate_and_speak
+from announcement_store import encode_cursor, get_announcement_store, in_time_window, parse_cursor, record_matches
+from dwani_client import translate, speech_file, tts_cache
+from audio_streaming import start_speech_stream, get_stream
+from audio_gc import get_audio_gc, start_audio_gc
+from cache_warmup import get_cache_warmer, start_cache_warmup
+from voice_jobs import voice_jobs
+import atexit
 import threading
 from datetime import datetime
 import json
-import time
-import uuid
 
 # Load environment variables from .env file
 load_dotenv()
@@ -23,18 +28,49 @@ app = Flask(__name__, static_folder='.', template_folder='pages')
 dwani.api_key = os.getenv("DWANI_API_KEY")
 dwani.api_base = os.getenv("DWANI_API_BASE_URL")
 
-# Initialize the announcement system
-announcement_system = AnnouncementSystem()
+# Initialize the announcement store and system
+announcement_store = get_announcement_store()
+announcement_system = AnnouncementSystem(store=announcement_store)
 
-# Background thread for processing announcements
-def process_announcements():
-    while True:
-        announcement_system.process_queue()
-        time.sleep(1)  # Prevent excessive CPU usage
+# announcement_worker.py processes run the announcements; this server only journals them
+announcement_system.enqueue_only = bool(announcement_system.config.get("workers", {}).get("processes", 0))
 
-# Start the background thread
-announcement_thread = threading.Thread(target=process_announcements, daemon=True)
-announcement_thread.start()
+_services_started = False
+_services_lock = threading.Lock()
+
+def start_background_services():
+    """
+    Start journal replay, queue consumers, audio GC and cache warm-up (once per process).
+
+    Runs in the process that serves requests, never on a bare import: the
+    Werkzeug reloader parent and the CLI import this module too. Every
+    serving process (the reloader child, each gunicorn worker) replays
+    under journal leases, so an unfinished job is picked up by one of them only.
+    """
+    global _services_started
+    with _services_lock:
+        if _services_started:
+            return
+        _services_started = True
+    if not announcement_system.enqueue_only:
+        # Re-queue announcements that were queued or half-processed when the server last stopped
+        announcement_system.replay_journal()
+
+        # Start background consumers; they wake as soon as an announcement is queued
+        announcement_system.start_consumers(announcement_system.config.get("queue_consumers", 2))
+        atexit.register(announcement_system.shutdown, wait=False)
+
+    # Reclaim unreferenced and expired audio in the background
+    start_audio_gc()
+
+    # Load the hottest recent translations and audio into memory without holding up startup
+    start_cache_warmup()
+
+@app.before_request
+def ensure_background_services():
+    """Start the background services in WSGI servers that import the app without running __main__"""
+    if not _services_started:
+        start_background_services()
 
 @app.route('/')
 def serve_admin():
@@ -56,37 +92,158 @@ def serve_announcement_submission():
     """Serve the announcement submission page"""
     return send_from_directory('pages', 'announcement_submission.html')
 
+DEFAULT_PAGE_SIZE = 50
+MAX_PAGE_SIZE = 500
+
+def list_param(name):
+    """Comma-separated query parameter as a list, or None if absent"""
+    value = request.args.get(name)
+    return [item.strip() for item in value.split(',') if item.strip()] if value else None
+
+def project(record, fields):
+    """Keep only the requested fields (id and timestamp are always included)"""
+    if not fields:
+        return record
+    return {key: record[key] for key in ['id', 'timestamp', *fields] if key in record}
+
 @app.route('/api/announcements', methods=['GET'])
 def get_announcements():
+    """
+    List announcements.
+
+    Without query parameters the whole history is returned as an array, oldest
+    first. Any of these parameters switches to a newest-first page with
+    ``next_cursor`` and ``revision``:
+        limit, cursor: page size and the next_cursor of the previous page
+        type, district, language: comma-separated filters
+        start, end: ISO timestamp window (end may be a bare date)
+        fields: comma-separated projection
+        since: a revision from an earlier response; only records changed since
+            then are returned, plus the ids deleted since then
+    Responses carry an ETag derived from the store revision, so polls with
+    If-None-Match cost a 304 until something changes.
+    """
+    revision = announcement_store.revision()
+    etag = f"{revision}-{hashlib.md5(request.query_string).hexdigest()[:12]}"
+    if request.if_none_match.contains(etag):
+        response = Response(status=304)
+    elif not request.args:
+        response = jsonify(announcement_store.all())
+    else:
+        try:
+            response = jsonify(query_announcements(revision))
+        except ValueError as e:
+            return jsonify({'status': 'error', 'message': str(e)}), 400
+    response.set_etag(etag)
+    # Browsers revalidate on every poll instead of reusing a possibly stale copy
+    response.headers['Cache-Control'] = 'no-cache'
+    return response
+
+def query_announcements(revision):
+    """Build the paged or delta response for GET /api/announcements"""
+    filters = {
+        'types': list_param('type'),
+        'districts': list_param('district'),
+        'languages': list_param('language')
+    }
+    start = request.args.get('start')
+    end = request.args.get('end')
+    fields = list_param('fields')
+    limit = min(int(request.args.get('limit', DEFAULT_PAGE_SIZE)), MAX_PAGE_SIZE)
+    if limit < 1:
+        raise ValueError("limit must be positive")
+
+    since = request.args.get('since')
+    if since is not None:
+        changes = announcement_store.changes_since(int(since))
+        if changes is not None:
+            return {
+                'revision': revision,
+                'announcements': [project(r, fields) for r in changes.created + changes.updated
+                                  if in_time_window(r['timestamp'], start, end) and record_matches(r, **filters)],
+                'deleted': changes.deleted
+            }
+        # Too old to diff (e.g. the log was compacted); fall through to a fresh first page
+
+    cursor = request.args.get('cursor')
+    records = announcement_store.query(
+        **filters,
+        start=start,
+        end=end,
+        before=parse_cursor(cursor) if cursor else None,
+        limit=limit + 1
+    )
+    page = {
+        'revision': revision,
+        'announcements': [project(r, fields) for r in records[:limit]],
+        'next_cursor': encode_cursor(records[limit - 1]) if len(records) > limit else None
+    }
+    if since is not None:
+        page['reset'] = True
+    return page
+
+SSE_KEEPALIVE_SECONDS = 15
+
+def sse_message(event, data, event_id=None):
+    """Format one Server-Sent Events message"""
+    lines = [f"id: {event_id}"] if event_id is not None else []
+    lines.append(f"event: {event}")
+    lines.append(f"data: {json.dumps(data, ensure_ascii=False)}")
+    return "\n".join(lines) + "\n\n"
+
+@app.route('/api/announcements/stream')
+def stream_announcements():
+    """
+    Server-Sent Events feed of announcement changes.
+
+    Emits ``created``, ``updated`` (including each language as it completes)
+    and ``deleted`` events with store revisions as event ids. Reconnecting
+    clients send Last-Event-ID and only receive what changed since; new
+    clients pass ``since``, the revision of the page they loaded. When the
+    gap can no longer be replayed a ``reset`` event tells them to reload.
+    """
+    last_event_id = request.headers.get('Last-Event-ID') or request.args.get('since')
     try:
-        with open('announcement_logs.json', 'r') as f:
-            announcements = json.load(f)
-        return jsonify(announcements)
-    except FileNotFoundError:
-        return jsonify([])
+        revision = int(last_event_id) if last_event_id else announcement_store.revision()
+    except ValueError:
+        return jsonify({'status': 'error', 'message': 'Invalid Last-Event-ID'}), 400
+
+    def generate(revision):
+        yield "retry: 3000\n\n"
+        while True:
+            current = announcement_store.wait_for_change(revision, SSE_KEEPALIVE_SECONDS)
+            if current == revision:
+                yield ": keep-alive\n\n"
+                continue
+            changes = announcement_store.changes_since(revision)
+            if changes is None:
+                yield sse_message('reset', {'revision': current}, current)
+                revision = current
+                continue
+            # In revision order, so a client replaying them ends up with the store's state
+            events = changes.events()
+            for i, (event, data) in enumerate(events):
+                # Only the last event carries the id, so a client cut off mid-batch replays the batch
+                yield sse_message(event, data, changes.revision if i == len(events) - 1 else None)
+            revision = changes.revision
+
+    return Response(
+        stream_with_context(generate(revision)),
+        mimetype='text/event-stream',
+        headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'}
+    )
 
 @app.route('/api/announcements/<timestamp>', methods=['DELETE'])
 def delete_announcement(timestamp):
     """Delete an announcement by its timestamp"""
     try:
-        # Read current announcements
-        with open('announcement_logs.json', 'r') as f:
-            announcements = json.load(f)
-        
-        # Filter out the announcement with matching timestamp
-        filtered_announcements = [a for a in announcements if a['timestamp'] != timestamp]
-        
-        # If no announcements were filtered out, return 404
-        if len(filtered_announcements) == len(announcements):
+        # If no announcement has this timestamp, return 404
+        if not announcement_store.delete_by_timestamp(timestamp):
             return jsonify({
                 'status': 'error',
                 'message': 'Announcement not found'
             }), 404
         
-        # Write back the filtered announcements
-        with open('announcement_logs.json', 'w') as f:
-            json.dump(filtered_announcements, f, indent=2)
-        
         return jsonify({
             'status': 'success',
             'message': 'Announcement deleted successfully'
@@ -141,62 +298,53 @@ def create_announcement():
     except Exception as e:
         return jsonify({'status': 'error', 'message': str(e)}), 500
 
+@app.route('/api/metrics', methods=['GET'])
+def get_metrics():
+    """Expose announcement system metrics"""
+    return jsonify({
+        **announcement_system.get_system_metrics(),
+        "audio_gc": get_audio_gc().get_stats(),
+        "cache_warmup": get_cache_warmer().get_stats()
+    })
+
 @app.route('/audio/<path:filename>')
 def serve_audio(filename):
     """Serve audio files"""
     # Remove 'announcements/' from the start of the filename if it exists
     if filename.startswith('announcements/'):
         filename = filename.replace('announcements/', '', 1)
+    if filename.startswith('stream/'):
+        key = filename[len('stream/'):].rsplit('.', 1)[0]
+        stream = get_stream(key)
+        if stream is None:
+            # Synthesis already finished; serve the blob it was teed into
+            return send_from_directory('announcements', audio_file_name(tts_cache.path(key)), max_age=31536000)
+        return Response(stream_with_context(stream.iter_chunks()), mimetype='audio/mpeg')
+    if filename.startswith('blobs/'):
+        # Content-addressed blobs never change, so clients may cache them indefinitely
+        return send_from_directory('announcements', filename, max_age=31536000)
     return send_from_directory('announcements', filename)
 
+def audio_file_name(filepath):
+    """Audio path relative to the announcements directory, as served by /audio/"""
+    return os.path.relpath(filepath, 'announcements').replace(os.sep, '/')
+
 def translate_and_speak(text, src_lang="english", tgt_lang="kannada"):
     try:
         # Convert language names to codes
         src_code = LANGUAGE_CODE_MAP[src_lang.lower()]
         tgt_code = LANGUAGE_CODE_MAP[tgt_lang.lower()]
         
-        # Step 1: Translate the text
-        translation = dwani.Translate.run_translate(
-            sentences=[text],
-            src_lang=src_code,
-            tgt_lang=tgt_code
-        )
-        print(f"Raw translation response: {translation}")
-        
-        # Extract translated text
-        if isinstance(translation, dict) and "translations" in translation and translation["translations"]:
-            translated_text = translation["translations"][0]
-        elif isinstance(translation, str):
-            translated_text = translation
-        else:
-            raise ValueError("Invalid translation response format")
-
-        if not translated_text:
-            raise ValueError("Empty translation result")
+        # Step 1: Translate the text (batched with concurrent requests)
+        translated_text = translate(text, src_code, tgt_code)
 
         print(f"Translated Text: {translated_text}")
 
-        # Step 2: Convert translated text to speech
-        response = dwani.Audio.speech(input=translated_text, response_format="mp3")
+        # Step 2: Resolve the canonical audio blob, synthesizing only if it is new
+        filepath = speech_file(translated_text, tgt_code)
+        print(f"Speech synthesis complete: {filepath}")
         
-        if response and isinstance(response, (bytes, bytearray)) and len(response) > 0:
-            # Generate unique filename
-            hash_value = hashlib.md5(translated_text.encode()).hexdigest()[:10]
-            timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-            filename = f"voice_{timestamp}_{hash_value}_{tgt_lang}.mp3"
-            filepath = os.path.join("announcements", filename)
-            
-            # Ensure announcements directory exists
-            os.makedirs("announcements", exist_ok=True)
-            
-            # Save audio file
-            with open(filepath, "wb") as f:
-                f.write(response)
-            print(f"Speech synthesis complete: saved to {filepath}")
-            
-            return translated_text, filename
-            
-        return translated_text, None
+        return translated_text, audio_file_name(filepath)
 
     except Exception as e:
         print(f"Error in Translate and Speech module: {e}")
@@ -257,8 +405,15 @@ def translate_announcement():
         if tgt_lang not in LANGUAGE_CODE_MAP:
             raise ValueError(f"Invalid target language: {tgt_lang}")
 
-        # Use the translate_and_speak function
-        translated_text, audio_file = translate_and_speak(text, src_lang, tgt_lang)
+        if data.get('stream'):
+            # Return the text right away; audio is piped to /audio/stream/<key>.mp3 as it is synthesized
+            tgt_code = LANGUAGE_CODE_MAP[tgt_lang]
+            translated_text = translate(text, LANGUAGE_CODE_MAP[src_lang], tgt_code)
+            source = start_speech_stream(translated_text, tgt_code)
+            audio_file = audio_file_name(source.value) if source.kind == "blob" else f"stream/{source.value}.mp3"
+        else:
+            # Use the translate_and_speak function
+            translated_text, audio_file = translate_and_speak(text, src_lang, tgt_lang)
         
         if translated_text and audio_file:
             return jsonify({
@@ -284,7 +439,7 @@ def translate_announcement():
 
 @app.route('/api/process-voice', methods=['POST'])
 def process_voice():
-    """Process recorded voice and generate audio response"""
+    """Queue recorded voice for speech recognition and an audio response; poll the returned status URL"""
     try:
         # Get audio file and language from request
         audio_file = request.files.get('audio')
@@ -295,53 +450,20 @@ def process_voice():
                 'status': 'error',
                 'message': 'Missing audio file or language'
             }), 400
-            
-        # Generate a unique filename
-        filename = f"voice_{int(time.time())}_{uuid.uuid4().hex[:8]}.mp3"
-        filepath = os.path.join('announcements', filename)
         
-        # Save the uploaded audio temporarily
-        temp_filepath = os.path.join('announcements', 'temp_' + filename)
-        audio_file.save(temp_filepath)
+        # Read the upload straight into memory; nothing is written to disk
+        job_id = voice_jobs.submit(
+            audio_file.read(),
+            language,
+            LANGUAGE_CODE_MAP.get(language.lower(), language),
+            filename=audio_file.filename or 'audio.wav'
+        )
         
-        # Process using dwani
-        try:
-            # Convert to text using speech recognition
-            with open(temp_filepath, 'rb') as f:
-                audio_bytes = f.read()
-            
-            text_response = dwani.Speech.recognize(
-                audio=audio_bytes,
-                language=language
-            )
-            
-            if not text_response or not text_response.get('text'):
-                raise Exception('Speech recognition failed')
-                
-            recognized_text = text_response['text']
-            
-            # Generate audio response
-            audio_response = dwani.Audio.speech(
-                input=recognized_text,
-                response_format="mp3"
-            )
-            
-            if audio_response and isinstance(audio_response, (bytes, bytearray)):
-                with open(filepath, "wb") as f:
-                    f.write(audio_response)
-            else:
-                raise Exception('Audio generation failed')
-            
-            return jsonify({
-                'status': 'success',
-                'audioFile': filename,
-                'text': recognized_text
-            })
-            
-        finally:
-            # Clean up temporary file
-            if os.path.exists(temp_filepath):
-                os.remove(temp_filepath)
+        return jsonify({
+            'status': 'accepted',
+            'jobId': job_id,
+            'statusUrl': f"/api/process-voice/{job_id}"
+        }), 202
                 
     except Exception as e:
         print(f"Error processing voice: {e}")
@@ -350,5 +472,24 @@ def process_voice():
             'message': str(e)
         }), 500
 
+@app.route('/api/process-voice/<job_id>', methods=['GET'])
+def get_voice_job(job_id):
+    """Status of a voice job, with the recognized text and audio file once it succeeded"""
+    job = voice_jobs.get(job_id)
+    if job is None:
+        return jsonify({'status': 'error', 'message': 'Unknown or expired voice job'}), 404
+    if job['status'] == 'completed':
+        return jsonify({
+            'status': 'success',
+            'audioFile': audio_file_name(job['audio_path']),
+            'text': job['text']
+        })
+    if job['status'] == 'failed':
+        return jsonify({'status': 'error', 'message': job['error']}), 500
+    return jsonify({'status': job['status'], 'jobId': job_id}), 202
+
 if __name__ == "__main__":
+    # With the reloader only the child process (WERKZEUG_RUN_MAIN set) serves requests
+    if os.environ.get("WERKZEUG_RUN_MAIN") == "true":
+        start_background_services()
     app.run(debug=True, port=5000)
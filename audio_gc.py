@@ -0,0 +1,352 @@
+"""
+Background garbage collector for announcement audio.
+
+Usage (one collection, printing what was reclaimed):
+    python audio_gc.py [--dry-run] [--legacy]
+"""
+import os
+import json
+import time
+import logging
+import argparse
+import threading
+from datetime import datetime
+from typing import Dict, List, Optional, Tuple
+
+from announcement_store import AnnouncementStore, get_announcement_store
+from dwani_client import tts_cache
+from file_lock import FileLock
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_AUDIO_GC_CONFIG = {
+    "directory": "announcements",
+    "interval_seconds": 300,
+    # Files touched this recently are never collected (syntheses not yet saved to a record)
+    "grace_seconds": 600,
+    "max_age_days": 30,
+    "max_total_mb": 500,
+    "keep_last_per_language": 20,
+    # Also collect audio outside the blob store (per-announcement files from before it, some in git)
+    "collect_legacy": False,
+    # Legacy files younger than this are left alone even when collect_legacy is set
+    "legacy_min_age_days": 90,
+    # Report what would be reclaimed without deleting anything
+    "dry_run": False
+}
+
+AUDIO_SUFFIXES = ('.mp3', '.wav')
+# Partial writes of the TTS cache and audio streams, left behind by a crashed process
+TEMP_SUFFIX = '.tmp'
+
+def _load_gc_config(config_path: str = 'config/system_config.json') -> dict:
+    values = dict(DEFAULT_AUDIO_GC_CONFIG)
+    try:
+        with open(config_path) as f:
+            values.update(json.load(f).get("audio_gc", {}))
+    except (FileNotFoundError, json.JSONDecodeError):
+        pass
+    return values
+
+def _epoch(timestamp: str) -> Optional[float]:
+    try:
+        return datetime.fromisoformat(timestamp).timestamp()
+    except (TypeError, ValueError):
+        return None
+
+# ======================
+# AUDIO GC
+# ======================
+class AudioGarbageCollector:
+    """
+    Reference-counted collector for announcement audio in the TTS blob store.
+
+    A reference is one (announcement, language) entry of a record's
+    ``audio_paths``; a file is kept while a live reference points at it.
+    References are tracked incrementally from the store's changes_since(),
+    so a collection does not reload the history. Retention:
+
+    - the newest ``keep_last_per_language`` references of each language are
+      always kept;
+    - other references expire after ``max_age_days``, as do unreferenced
+      blobs that have not been used for that long;
+    - temporary files left in the blob store by interrupted writes are removed;
+    - if the blob store exceeds ``max_total_mb``, the least recently
+      announced or used blobs that are not protected are removed first.
+
+    Only the blob store is collected by default. Other audio under
+    ``directory`` (legacy per-announcement files, including ones committed
+    to the repository, or files another process is about to record) is
+    left alone unless ``collect_legacy`` is set, and even then only once
+    older than ``legacy_min_age_days`` and unreferenced or expired. With
+    ``dry_run`` a collection reports what it would reclaim and deletes
+    nothing.
+
+    Nothing modified within ``grace_seconds`` is touched. Collections hold a
+    file lock, so several processes can run the collector safely.
+    """
+
+    def __init__(self, store: AnnouncementStore = None, directory: str = "announcements",
+                 interval_seconds: float = 300, grace_seconds: float = 600, max_age_days: float = 30,
+                 max_total_mb: float = 500, keep_last_per_language: int = 20, collect_legacy: bool = False,
+                 legacy_min_age_days: float = 90, dry_run: bool = False):
+        self.store = store or get_announcement_store()
+        self.directory = directory
+        self.interval = interval_seconds
+        self.grace = grace_seconds
+        self.max_age = max_age_days * 86400 if max_age_days else None
+        self.max_total_bytes = max_total_mb * 1024 * 1024 if max_total_mb else None
+        self.keep_last = keep_last_per_language
+        self.collect_legacy = collect_legacy
+        self.legacy_min_age = legacy_min_age_days * 86400
+        self.dry_run = dry_run
+        self._lock = FileLock(os.path.join("cache", "audio_gc.lock"))
+        # announcement id -> {language: (absolute audio path, announced at epoch)}
+        self._refs: Dict[str, Dict[str, Tuple[str, float]]] = {}
+        self._revision = None
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self.last_report: Optional[dict] = None
+        self.totals = {"runs": 0, "reclaimed_files": 0, "reclaimed_bytes": 0}
+
+    # ---- reference tracking ----
+    def _resolve(self, audio_path: str) -> str:
+        if not os.path.exists(audio_path) and not os.path.isabs(audio_path):
+            # Paths relative to the announcements directory, as served by /audio/
+            candidate = os.path.join(self.directory, audio_path)
+            if os.path.exists(candidate):
+                audio_path = candidate
+        return os.path.abspath(audio_path)
+
+    def _track(self, record: dict) -> None:
+        announced = _epoch(record.get('timestamp')) or time.time()
+        refs = {
+            lang: (self._resolve(audio_path), announced)
+            for lang, audio_path in (record.get('audio_paths') or {}).items() if audio_path
+        }
+        if refs:
+            self._refs[record['id']] = refs
+        else:
+            self._refs.pop(record['id'], None)
+
+    def _refresh_refs(self) -> None:
+        revision = self.store.revision()
+        if revision == self._revision:
+            return
+        changes = self.store.changes_since(self._revision) if self._revision is not None else None
+        if changes is None:
+            self._refs = {}
+            for record in self.store.all():
+                self._track(record)
+            self._revision = revision
+            return
+        for announcement_id in changes.deleted:
+            self._refs.pop(announcement_id, None)
+        for record in changes.created + changes.updated:
+            self._track(record)
+        self._revision = changes.revision
+
+    def _reference_counts(self, now: float) -> Tuple[Dict[str, int], set, Dict[str, float]]:
+        """
+        Returns:
+            tuple: live reference count per path, protected paths, and the
+            newest announcement time per path (used to rank budget evictions)
+        """
+        by_language: Dict[str, List[Tuple[float, str]]] = {}
+        for refs in self._refs.values():
+            for lang, (path, announced) in refs.items():
+                by_language.setdefault(lang, []).append((announced, path))
+
+        counts: Dict[str, int] = {}
+        protected = set()
+        last_announced: Dict[str, float] = {}
+        for refs in by_language.values():
+            refs.sort(reverse=True)
+            for rank, (announced, path) in enumerate(refs):
+                if rank < self.keep_last:
+                    protected.add(path)
+                elif self.max_age and now - announced > self.max_age:
+                    continue
+                counts[path] = counts.get(path, 0) + 1
+                last_announced[path] = max(last_announced.get(path, 0.0), announced)
+        return counts, protected, last_announced
+
+    # ---- collection ----
+    def _scan(self, cache_root: str) -> List[Tuple[str, int, float]]:
+        """Blobs and temporary files of the blob store, plus legacy audio when collect_legacy is set"""
+        files = []
+        for root, _, filenames in os.walk(self.directory if self.collect_legacy else cache_root):
+            in_blob_store = os.path.abspath(root) == cache_root or os.path.abspath(root).startswith(cache_root + os.sep)
+            for filename in filenames:
+                if in_blob_store:
+                    if not filename.endswith((tts_cache.suffix, TEMP_SUFFIX)):
+                        continue
+                elif not filename.endswith(AUDIO_SUFFIXES):
+                    continue
+                path = os.path.abspath(os.path.join(root, filename))
+                try:
+                    stat = os.stat(path)
+                except FileNotFoundError:
+                    continue
+                files.append((path, stat.st_size, stat.st_mtime))
+        return files
+
+    def run_once(self) -> dict:
+        """
+        Collect once.
+
+        Returns:
+            dict: What was scanned, kept and reclaimed (by reason)
+        """
+        started = time.monotonic()
+        with self._lock:
+            self._refresh_refs()
+            now = time.time()
+            counts, protected, last_announced = self._reference_counts(now)
+            cache_root = os.path.abspath(tts_cache.directory)
+
+            referenced = self._referenced_paths()
+            victims: Dict[str, str] = {}
+            # Bytes kept in the blob store, which max_total_mb bounds
+            kept_bytes = 0
+            evictable = []
+            files = self._scan(cache_root)
+            for path, size, mtime in files:
+                in_blob_store = path.startswith(cache_root + os.sep)
+                if not in_blob_store:
+                    # Legacy audio, only scanned with collect_legacy; never evicted for the budget
+                    if now - mtime < max(self.grace, self.legacy_min_age) or path in protected or path in counts:
+                        continue
+                    victims[path] = "expired" if path in referenced else "unreferenced"
+                elif now - mtime < self.grace or path in protected:
+                    kept_bytes += size
+                elif path.endswith(TEMP_SUFFIX):
+                    victims[path] = "abandoned_temp"
+                elif path in counts:
+                    kept_bytes += size
+                    evictable.append((max(last_announced[path], mtime), path, size))
+                elif self.max_age and now - mtime > self.max_age:
+                    victims[path] = "expired"
+                else:
+                    # Unreferenced blob: worth keeping for repeat announcements while recently used
+                    kept_bytes += size
+                    evictable.append((mtime, path, size))
+
+            if self.max_total_bytes is not None and kept_bytes > self.max_total_bytes:
+                for _, path, size in sorted(evictable):
+                    if kept_bytes <= self.max_total_bytes:
+                        break
+                    victims[path] = "over_budget"
+                    kept_bytes -= size
+
+            # A record saved while we were deciding may have picked up one of the victims
+            self._refresh_refs()
+            still_referenced = self._live_paths(now)
+            report = {
+                "files_scanned": len(files),
+                "referenced_files": len(counts),
+                "shared_files": sum(1 for count in counts.values() if count > 1),
+                "protected_files": len(protected),
+                "reclaimed_files": 0,
+                "reclaimed_bytes": 0,
+                "reclaimed_by_reason": {},
+                "kept_bytes": kept_bytes,
+                "dry_run": self.dry_run
+            }
+            sizes = {path: size for path, size, _ in files}
+            for path, reason in victims.items():
+                if reason != "over_budget" and path in still_referenced:
+                    continue
+                if not self.dry_run and not self._remove(path, cache_root):
+                    continue
+                report["reclaimed_files"] += 1
+                report["reclaimed_bytes"] += sizes[path]
+                report["reclaimed_by_reason"][reason] = report["reclaimed_by_reason"].get(reason, 0) + 1
+
+        report["duration_ms"] = round((time.monotonic() - started) * 1000, 1)
+        report["finished_at"] = datetime.now().isoformat()
+        self.last_report = report
+        self.totals["runs"] += 1
+        self.totals["reclaimed_files"] += report["reclaimed_files"]
+        self.totals["reclaimed_bytes"] += report["reclaimed_bytes"]
+        if report["reclaimed_files"]:
+            logger.info(f"Audio GC {'would reclaim' if self.dry_run else 'reclaimed'} {report['reclaimed_files']} files ({report['reclaimed_bytes']} bytes): "
+                        f"{report['reclaimed_by_reason']}")
+        return report
+
+    def _referenced_paths(self) -> set:
+        return {path for refs in self._refs.values() for path, _ in refs.values()}
+
+    def _live_paths(self, now: float) -> set:
+        counts, protected, _ = self._reference_counts(now)
+        return set(counts) | protected
+
+    @staticmethod
+    def _remove(path: str, cache_root: str) -> bool:
+        if path.startswith(cache_root + os.sep) and path.endswith(tts_cache.suffix):
+            # Keep the TTS cache's disk accounting in this process right
+            key = os.path.basename(path)[:-len(tts_cache.suffix)]
+            return tts_cache.remove_disk_entry(key)
+        try:
+            os.remove(path)
+            return True
+        except OSError:
+            return False
+
+    # ---- background thread ----
+    def start(self) -> None:
+        """Collect every ``interval_seconds`` on a daemon thread (first run right away)"""
+        if self._thread is not None and self._thread.is_alive():
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name="audio-gc", daemon=True)
+        self._thread.start()
+
+    def _run(self) -> None:
+        while not self._stop.is_set():
+            try:
+                self.run_once()
+            except Exception as e:
+                logger.error(f"Audio GC run failed: {str(e)}")
+            self._stop.wait(self.interval)
+
+    def stop(self) -> None:
+        self._stop.set()
+
+    def get_stats(self) -> dict:
+        return {**self.totals, "last_run": self.last_report}
+
+# ======================
+# MODULE-LEVEL COLLECTOR
+# ======================
+_collector: Optional[AudioGarbageCollector] = None
+_collector_lock = threading.Lock()
+
+def get_audio_gc() -> AudioGarbageCollector:
+    """Process-wide audio collector configured from the ``audio_gc`` config section"""
+    global _collector
+    with _collector_lock:
+        if _collector is None:
+            _collector = AudioGarbageCollector(**_load_gc_config())
+        return _collector
+
+def start_audio_gc() -> AudioGarbageCollector:
+    """Start the process-wide collector if it is not running yet"""
+    collector = get_audio_gc()
+    collector.start()
+    return collector
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Collect unreferenced and expired announcement audio once")
+    parser.add_argument("--dry-run", action="store_true", help="Report what would be reclaimed without deleting")
+    parser.add_argument("--legacy", action="store_true", help="Also collect audio outside the blob store")
+    args = parser.parse_args()
+
+    config = _load_gc_config()
+    config["dry_run"] = config["dry_run"] or args.dry_run
+    config["collect_legacy"] = config["collect_legacy"] or args.legacy
+    print(json.dumps(AudioGarbageCollector(**config).run_once(), indent=2))
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO)
+    main()
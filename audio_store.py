@@ -0,0 +1,62 @@
+"""
+One-off migration of legacy per-announcement audio files into the
+content-addressed audio store (see dwani_client.tts_cache).
+
+Usage:
+    python audio_store.py
+"""
+import os
+import shutil
+import logging
+
+from announcement_store import AnnouncementStore, get_announcement_store
+from bhashaseva_enhanced import LANGUAGE_CODE_MAP
+from dwani_client import tts_cache, speech_key
+
+logger = logging.getLogger(__name__)
+
+def migrate_legacy_audio(store: AnnouncementStore = None) -> dict:
+    """
+    Point stored announcements at canonical audio blobs.
+
+    For every (translation, language) with a legacy audio file, the first
+    file seen becomes the canonical blob and every announcement sharing
+    that text is re-pointed to it. Superseded files are left for the audio
+    garbage collector.
+
+    Returns:
+        dict: Counts of migrated records, new blobs and reused blobs
+    """
+    store = store or get_announcement_store()
+    stats = {"records": 0, "blobs_created": 0, "blobs_reused": 0}
+    for record in store.all():
+        translations = record.get('translations') or {}
+        audio_paths = dict(record.get('audio_paths') or {})
+        changed = False
+        for lang, audio_path in audio_paths.items():
+            translated_text = translations.get(lang)
+            if not translated_text or not audio_path:
+                continue
+            if not os.path.exists(audio_path):
+                audio_path = os.path.join('announcements', audio_path)
+            blob_path = tts_cache.path(speech_key(translated_text, LANGUAGE_CODE_MAP.get(lang, lang)))
+            if os.path.abspath(audio_path) == os.path.abspath(blob_path):
+                continue
+            if os.path.exists(blob_path):
+                stats["blobs_reused"] += 1
+            elif os.path.exists(audio_path):
+                os.makedirs(os.path.dirname(blob_path), exist_ok=True)
+                shutil.copyfile(audio_path, blob_path)
+                stats["blobs_created"] += 1
+            else:
+                continue
+            audio_paths[lang] = blob_path
+            changed = True
+        if changed:
+            store.update(record['id'], {'audio_paths': audio_paths})
+            stats["records"] += 1
+    logger.info(f"Legacy audio migration: {stats}")
+    return stats
+
+if __name__ == "__main__":
+    print(migrate_legacy_audio())
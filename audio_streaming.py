@@ -0,0 +1,113 @@
+import os
+import logging
+import threading
+from collections import namedtuple
+from typing import Dict, Iterator, Optional
+
+from dwani_client import speech_key, stream_speech, tts_cache
+
+logger = logging.getLogger(__name__)
+
+# Result of start_speech_stream(): kind is "blob" (value is the finished blob's path)
+# or "stream" (value is the key of an in-flight stream for get_stream())
+SpeechSource = namedtuple("SpeechSource", ["kind", "value"])
+
+# ======================
+# STREAMING SYNTHESIS
+# ======================
+class AudioStream:
+    """
+    One in-flight speech synthesis, fanned out to any number of readers.
+
+    A background thread pulls chunks from Dwani, keeps them in memory for
+    readers that attach late, and tees them to a temporary file that
+    becomes the canonical audio blob once the stream completes.
+    """
+
+    def __init__(self, key: str, text: str, response_format: str = "mp3"):
+        self.key = key
+        self.text = text
+        self.response_format = response_format
+        self.chunks = []
+        self.done = False
+        self.error = None
+        self._cond = threading.Condition()
+
+    def start(self, on_finish) -> None:
+        threading.Thread(target=self._run, args=(on_finish,), name=f"audio-stream-{self.key[:8]}", daemon=True).start()
+
+    def _run(self, on_finish) -> None:
+        blob_path = tts_cache.path(self.key)
+        tmp_path = f"{blob_path}.{os.getpid()}.stream.tmp"
+        try:
+            os.makedirs(os.path.dirname(blob_path), exist_ok=True)
+            with open(tmp_path, "wb") as f:
+                for chunk in stream_speech(self.text, self.response_format):
+                    f.write(chunk)
+                    with self._cond:
+                        self.chunks.append(chunk)
+                        self._cond.notify_all()
+            os.replace(tmp_path, blob_path)
+            tts_cache.set(self.key, b"".join(self.chunks))
+        except Exception as e:
+            logger.error(f"Streaming synthesis failed: {str(e)}")
+            self.error = e
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+        finally:
+            with self._cond:
+                self.done = True
+                self._cond.notify_all()
+            on_finish(self)
+
+    def iter_chunks(self) -> Iterator[bytes]:
+        """Yield every chunk from the beginning, blocking until more arrive or the stream ends"""
+        index = 0
+        while True:
+            with self._cond:
+                while index >= len(self.chunks) and not self.done:
+                    self._cond.wait()
+                pending = self.chunks[index:]
+                finished = self.done
+            for chunk in pending:
+                yield chunk
+            index += len(pending)
+            if finished and index >= len(self.chunks):
+                if self.error and index == 0:
+                    raise self.error
+                return
+
+# ======================
+# REGISTRY
+# ======================
+_streams: Dict[str, AudioStream] = {}
+_streams_lock = threading.Lock()
+
+def start_speech_stream(text: str, lang_code: str, response_format: str = "mp3") -> SpeechSource:
+    """
+    Make audio for a text available as soon as possible.
+
+    Returns:
+        SpeechSource: ("blob", path) if the cached blob already exists, otherwise
+        ("stream", key) of a (possibly shared) in-flight stream to pass to get_stream()
+    """
+    key = speech_key(text, lang_code, response_format)
+    blob_path = tts_cache.path(key)
+    if os.path.exists(blob_path):
+        return SpeechSource("blob", blob_path)
+    with _streams_lock:
+        if key not in _streams:
+            stream = AudioStream(key, text, response_format)
+            _streams[key] = stream
+            stream.start(_forget_stream)
+    return SpeechSource("stream", key)
+
+def _forget_stream(stream: AudioStream) -> None:
+    with _streams_lock:
+        if _streams.get(stream.key) is stream:
+            del _streams[stream.key]
+
+def get_stream(key: str) -> Optional[AudioStream]:
+    """The in-flight stream for a key, or None once it has finished"""
+    with _streams_lock:
+        return _streams.get(key)
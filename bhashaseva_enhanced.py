@@ -1,16 +1,26 @@
 import os
 import time
 import logging
+import socket
 import hashlib
+import itertools
+import threading
 from geopy.geocoders import Nominatim
 import pandas as pd
-from queue import PriorityQueue
+from queue import PriorityQueue, Empty
+from collections import deque
 from typing import Dict, List, Optional, Tuple
 from dataclasses import dataclass
 from enum import Enum
 import json
-from concurrent.futures import ThreadPoolExecutor, as_completed
-import cachetools
+from datetime import datetime
+import dwani_client
+from announcement_store import AnnouncementStore, get_announcement_store
+from job_journal import JobJournal, get_job_journal
+from phrase_library import PhraseLibrary, get_phrase_library
+from circuit_breaker import CircuitOpenError
+from rate_limiter import RateLimitError, request_priority
+from task_scheduler import URGENT_PRIORITY, AnnouncementJob, TaskScheduler
 
 # ======================
 # CONSTANTS & ENUMS
@@ -45,6 +55,39 @@ class Announcement:
     announcement_type: AnnouncementType = AnnouncementType.GENERAL
     districts: List[str] = None
     metadata: dict = None
+    queued_at: Optional[float] = None
+    record_id: Optional[str] = None
+    job_id: Optional[str] = None
+    # Journal lease holder processing the job; finishing it checks the lease is still ours
+    lease_owner: Optional[str] = None
+
+def announcement_to_payload(announcement: Announcement) -> dict:
+    """JSON-serializable form of an announcement, as kept in the job journal"""
+    return {
+        'text': announcement.text,
+        'src_lang': announcement.src_lang,
+        'target_langs': announcement.target_langs,
+        'channels': [channel.value for channel in announcement.channels or []],
+        'priority': announcement.priority.name,
+        'announcement_type': announcement.announcement_type.name,
+        'districts': announcement.districts,
+        'metadata': announcement.metadata,
+        'queued_at': announcement.queued_at
+    }
+
+def announcement_from_payload(payload: dict) -> Announcement:
+    """Rebuild an announcement from announcement_to_payload() output"""
+    return Announcement(
+        text=payload['text'],
+        src_lang=payload.get('src_lang', "english"),
+        target_langs=payload.get('target_langs'),
+        channels=[DeliveryChannel(channel) for channel in payload.get('channels') or []],
+        priority=PriorityLevel[payload.get('priority', PriorityLevel.GENERAL.name)],
+        announcement_type=AnnouncementType[payload.get('announcement_type', AnnouncementType.GENERAL.name)],
+        districts=payload.get('districts'),
+        metadata=payload.get('metadata'),
+        queued_at=payload.get('queued_at')
+    )
 
 @dataclass
 class EmergencyAlert:
@@ -54,6 +97,10 @@ class EmergencyAlert:
     severity: str
     coordinates: Optional[Tuple[float, float]] = None
     valid_until: Optional[float] = None
+    # Registered template (see config/emergency_protocols.json) composed from the phrase library
+    template: Optional[str] = None
+    # Template slot values other than the district, e.g. {"time": "tonight"}
+    slots: Optional[dict] = None
 
 # ======================
 # LOGGING CONFIGURATION
@@ -101,28 +148,50 @@ DISTRICT_LANGUAGE_MAPPING = {
 # ======================
 # CACHE CONFIGURATION
 # ======================
-translation_cache = cachetools.LRUCache(maxsize=1000)
-tts_cache = cachetools.LRUCache(maxsize=500)
+# Persistent two-tier caches shared with the Streamlit pages (see cache_store.py)
+translation_cache = dwani_client.translation_cache
+tts_cache = dwani_client.tts_cache
 
 # ======================
 # CORE SYSTEM
 # ======================
 class AnnouncementSystem:
-    def __init__(self, api_config: dict = None):
+    def __init__(self, api_config: dict = None, store: AnnouncementStore = None, journal: JobJournal = None,
+                 enqueue_only: bool = False):
         """
         Initialize the announcement system with optional API configuration.
         
         Args:
             api_config: Dictionary containing API configuration (base_url, api_key, etc.)
+            store: Announcement store to persist to (defaults to the shared store)
+            journal: Durable journal of queued jobs (defaults to the shared journal)
+            enqueue_only: Only journal announcements; worker processes (announcement_worker.py) run them
         """
         self.geolocator = Nominatim(user_agent="bhasha_seva")
         self.announcement_queue = PriorityQueue()
-        self.counter = 0
+        self.counter = itertools.count(1)
+        self.consumers = []
         self.recent_alerts = []
-        self.executor = ThreadPoolExecutor(max_workers=4)
         self.setup_api_config(api_config)
         self._load_configurations()
         self._init_metrics()
+        self.scheduler = TaskScheduler(
+            self._process_language_announcement,
+            max_workers=self.config.get("max_workers", 4),
+            reserved_workers=self.config.get("reserved_urgent_workers", 2)
+        )
+        self.store = store or get_announcement_store()
+        self.journal = journal or get_job_journal()
+        self.enqueue_only = enqueue_only
+        # This process holds journal leases on the jobs its consumers run, so no other process runs them too
+        self.lease_owner = f"{socket.gethostname()}:{os.getpid()}:{id(self):x}"
+        self.lease_seconds = self.config.get("workers", {}).get("lease_seconds", 60)
+        self._leased_jobs = set()
+        self._leases_lock = threading.Lock()
+        self._lease_renewer: Optional[threading.Thread] = None
+        self._stop_renewing = threading.Event()
+        # Serializes per-language progress writes so a slower writer never rolls back a newer snapshot
+        self._progress_lock = threading.Lock()
         
     def _init_metrics(self):
         """Initialize system metrics tracking"""
@@ -130,9 +199,19 @@ class AnnouncementSystem:
             "announcements_processed": 0,
             "languages_served": {},
             "emergency_alerts": 0,
+            "phrase_library_languages": 0,
             "failures": 0,
             "last_processed": None
         }
+        # Queue-to-first-audio latency samples (seconds) for urgent announcements
+        self.urgent_latencies = deque(maxlen=1000)
+        # Consumer threads, language workers and callbacks all update the metrics
+        self._metrics_lock = threading.Lock()
+    
+    def _count(self, name: str, amount: int = 1) -> None:
+        """Add to a metrics counter"""
+        with self._metrics_lock:
+            self.metrics[name] += amount
         
     def _load_configurations(self):
         """Load system configurations from file or environment"""
@@ -166,6 +245,30 @@ class AnnouncementSystem:
             logger.error("API key not configured!")
             raise ValueError("API key must be provided either through config or environment variables")
             
+    def get_system_metrics(self) -> dict:
+        """Snapshot of system metrics including urgent queue-to-first-audio latency"""
+        with self._metrics_lock:
+            metrics = {**self.metrics, "languages_served": dict(self.metrics["languages_served"])}
+            last_latency = self.urgent_latencies[-1] if self.urgent_latencies else None
+            latencies = sorted(self.urgent_latencies)
+        latency_summary = {"count": len(latencies)}
+        if latencies:
+            latency_summary.update({
+                "last": last_latency,
+                "avg": sum(latencies) / len(latencies),
+                "p95": latencies[min(len(latencies) - 1, int(len(latencies) * 0.95))],
+                "max": latencies[-1]
+            })
+        return {
+            **metrics,
+            "queued_announcements": self.announcement_queue.qsize(),
+            "pending_language_tasks": self.scheduler.pending_tasks(),
+            "caches": dwani_client.get_cache_stats(),
+            "dwani_io": dwani_client.get_io_stats(),
+            "journal": self.journal.get_stats(),
+            "urgent_first_audio_latency": latency_summary
+        }
+    
     def get_languages_for_region(self, district: str) -> List[str]:
         """Get target languages for a district with fallback to defaults"""
         return DISTRICT_LANGUAGE_MAPPING.get(district, self.config["default_languages"])
@@ -193,50 +296,320 @@ class AnnouncementSystem:
         if channels:
             announcement.channels = channels
             
-        self.counter += 1
+        announcement.queued_at = time.time()
+        payload = announcement_to_payload(announcement)
+        if self.enqueue_only:
+            announcement.job_id = self.journal.enqueue(announcement.priority.value, payload)
+            logger.info(f"Journaled announcement with priority {announcement.priority.name} for the workers")
+            return
+        # Durable before it is acknowledged, so a crash or restart replays it (see replay_journal),
+        # and leased to this process so no other process's replay picks it up meanwhile
+        announcement.job_id = self.journal.enqueue(
+            announcement.priority.value, payload, owner=self.lease_owner, lease_seconds=self.lease_seconds
+        )
+        self._hold_lease(announcement)
         self.announcement_queue.put((
             announcement.priority.value,
-            self.counter,
+            next(self.counter),
             announcement
         ))
         logger.info(f"Queued announcement with priority {announcement.priority.name}")
     
+    def replay_journal(self) -> int:
+        """
+        Re-queue the journaled jobs that did not finish before the last shutdown or crash.
+        
+        Jobs are leased to this process first, so when several processes
+        start at once (reloader, gunicorn workers) each job is replayed by
+        exactly one of them; jobs another live process holds are left alone.
+        Languages a job already completed are not processed again, and its
+        stored record is updated rather than duplicated.
+        
+        Returns:
+            int: Number of jobs re-queued
+        """
+        jobs = self.journal.lease(self.lease_owner, self.lease_seconds, limit=None)
+        replayed = 0
+        for job in jobs:
+            try:
+                announcement = announcement_from_payload(job["payload"])
+            except (KeyError, ValueError) as e:
+                logger.error(f"Dropping unreadable journaled job {job['id']}: {str(e)}")
+                self.journal.finish(job["id"], status="failed", owner=self.lease_owner)
+                continue
+            announcement.job_id = job["id"]
+            announcement.record_id = job["record_id"]
+            self._hold_lease(announcement)
+            self.announcement_queue.put((announcement.priority.value, next(self.counter), announcement))
+            replayed += 1
+        if replayed:
+            logger.info(f"Replayed {replayed} unfinished announcement job(s) from the journal")
+        return replayed
+    
+    def _hold_lease(self, announcement: Announcement) -> None:
+        """Keep renewing this process's lease on a job until it is finished"""
+        announcement.lease_owner = self.lease_owner
+        with self._leases_lock:
+            self._leased_jobs.add(announcement.job_id)
+            if self._lease_renewer is None:
+                self._lease_renewer = threading.Thread(target=self._renew_leases, name="journal-lease-renewer", daemon=True)
+                self._lease_renewer.start()
+    
+    def _renew_leases(self) -> None:
+        while not self._stop_renewing.wait(self.lease_seconds / 3):
+            with self._leases_lock:
+                job_ids = list(self._leased_jobs)
+            for job_id in job_ids:
+                self.journal.renew(job_id, self.lease_owner, self.lease_seconds)
+    
+    def run_worker(self, owner: str, stop, lease_seconds: float = 60, max_in_flight: int = 4,
+                   poll_interval: float = 0.5, drain_timeout: float = 30) -> None:
+        """
+        Process journaled announcements under leases until ``stop`` is set.
+        
+        Any number of workers, in any number of processes, may run against
+        the same journal. Each leases the most urgent free jobs, renews the
+        leases while their languages run and acknowledges a job by
+        finishing it. A job whose worker dies is leased again by another
+        once its lease expires, and resumes from the languages already
+        completed. At capacity a worker still takes emergency and health
+        jobs, so they never wait for general work to drain.
+        
+        Args:
+            owner: Unique worker id (e.g. host:pid)
+            stop: threading.Event or multiprocessing.Event that ends the loop
+            lease_seconds: Lease length; renewed every third of it
+            max_in_flight: Announcements processed at once by this worker
+            poll_interval: Seconds between journal polls when there is nothing to lease
+            drain_timeout: On stop, how long to wait for in-flight jobs before releasing them
+        """
+        in_flight: Dict[str, AnnouncementJob] = {}
+        last_renewal = time.time()
+        logger.info(f"Worker {owner} consuming the job journal")
+        
+        def renew_leases():
+            for job_id in in_flight:
+                self.journal.renew(job_id, owner, lease_seconds)
+        
+        while not stop.is_set():
+            for job_id in [job_id for job_id, job in in_flight.items() if job.done.is_set()]:
+                del in_flight[job_id]
+            if time.time() - last_renewal > lease_seconds / 3:
+                renew_leases()
+                last_renewal = time.time()
+            
+            free = max_in_flight - len(in_flight)
+            leased = self.journal.lease(
+                owner, lease_seconds,
+                limit=max(free, 1),
+                max_priority=None if free > 0 else URGENT_PRIORITY
+            )
+            for entry in leased:
+                try:
+                    announcement = announcement_from_payload(entry["payload"])
+                except (KeyError, ValueError) as e:
+                    logger.error(f"Dropping unreadable journaled job {entry['id']}: {str(e)}")
+                    self.journal.finish(entry["id"], status="failed", owner=owner)
+                    continue
+                announcement.job_id = entry["id"]
+                announcement.record_id = entry["record_id"]
+                announcement.lease_owner = owner
+                try:
+                    in_flight[entry["id"]] = self._execute_announcement(announcement)
+                except Exception as e:
+                    logger.error(f"Error executing announcement: {str(e)}")
+                    self._count("failures")
+                    self.journal.release(entry["id"], owner)
+            if not leased:
+                stop.wait(poll_interval)
+        
+        # Let in-flight jobs finish, then hand back whatever is left
+        deadline = time.time() + drain_timeout
+        for job in list(in_flight.values()):
+            renew_leases()
+            job.wait(max(0, deadline - time.time()))
+        for job_id, job in in_flight.items():
+            if not job.done.is_set():
+                self.journal.release(job_id, owner)
+        logger.info(f"Worker {owner} stopped")
+    
     def process_queue(self, max_items: int = None) -> None:
         """
-        Process announcements in priority order.
+        Process announcements in priority order without blocking on an empty queue.
         
         Args:
             max_items: Maximum number of items to process (None for all)
         """
-        processed = 0
-        while not self.announcement_queue.empty() and (max_items is None or processed < max_items):
-            _, _, announcement = self.announcement_queue.get()
-            self._execute_announcement(announcement)
-            processed += 1
-            self.metrics["announcements_processed"] += 1
-            self.metrics["last_processed"] = time.time()
+        jobs = []
+        while max_items is None or len(jobs) < max_items:
+            try:
+                item = self.announcement_queue.get_nowait()
+            except Empty:
+                break
+            job = self._handle_queue_item(item)
+            if job:
+                jobs.append(job)
+        
+        # Announcements run concurrently; return once all of them are done
+        for job in jobs:
+            job.wait()
+    
+    def run_consumer(self) -> None:
+        """
+        Block on the queue and process announcements as soon as they are enqueued.
+        
+        Several consumers may run concurrently; each returns once it receives
+        a shutdown sentinel from shutdown().
+        """
+        while True:
+            item = self.announcement_queue.get()
+            if item[2] is None:
+                break
+            self._handle_queue_item(item)
+    
+    def start_consumers(self, num_consumers: int = 1) -> List[threading.Thread]:
+        """
+        Start background consumer threads draining the announcement queue.
+        
+        Args:
+            num_consumers: Number of concurrent consumer threads
             
-    def _execute_announcement(self, announcement: Announcement) -> None:
-        """Internal method to handle actual announcement processing"""
-        futures = []
-        for lang in announcement.target_langs:
-            future = self.executor.submit(
-                self._process_language_announcement,
-                announcement,
-                lang
+        Returns:
+            list: The started consumer threads
+        """
+        for _ in range(num_consumers):
+            consumer = threading.Thread(
+                target=self.run_consumer,
+                name=f"announcement-consumer-{len(self.consumers) + 1}",
+                daemon=True
             )
-            futures.append(future)
+            consumer.start()
+            self.consumers.append(consumer)
+        logger.info(f"Started {num_consumers} announcement consumer(s)")
+        return self.consumers
+    
+    def shutdown(self, wait: bool = True) -> None:
+        """
+        Stop consumers and language workers after their current task.
+        
+        Args:
+            wait: Block until consumers and in-flight language tasks finish
+        """
+        for _ in self.consumers:
+            # Priority 0 sorts ahead of any queued announcement
+            self.announcement_queue.put((0, next(self.counter), None))
+        if wait:
+            for consumer in self.consumers:
+                consumer.join()
+        self.consumers = []
+        self.scheduler.shutdown(wait=wait)
+        self._stop_renewing.set()
+        with self._leases_lock:
+            unfinished, self._leased_jobs = list(self._leased_jobs), set()
+        for job_id in unfinished:
+            # Next start (here or in another process) replays them without waiting for the lease to expire
+            self.journal.release(job_id, self.lease_owner)
+        try:
+            # Language results recorded by the last tasks
+            self.journal.flush(timeout=5)
+        except Exception as e:
+            logger.error(f"Error flushing job journal: {str(e)}")
+        logger.info("Announcement system shut down")
+    
+    def cleanup(self) -> None:
+        """Release background resources"""
+        self.shutdown()
+    
+    def _handle_queue_item(self, item: tuple) -> Optional[AnnouncementJob]:
+        _, _, announcement = item
+        try:
+            return self._execute_announcement(announcement)
+        except Exception as e:
+            logger.error(f"Error executing announcement: {str(e)}")
+            self._count("failures")
+        finally:
+            self.announcement_queue.task_done()
+        return None
             
-        # Wait for all language versions to complete
-        for future in as_completed(futures):
-            try:
-                result = future.result()
-                if not result:
-                    logger.error(f"Failed to process one of the language announcements")
-            except Exception as e:
-                logger.error(f"Error in announcement processing: {str(e)}")
+    def _execute_announcement(self, announcement: Announcement) -> AnnouncementJob:
+        """
+        Fan an announcement out into per-language tasks without waiting for them.
+        
+        Language tasks of many announcements are in flight at once. The record
+        is stored up front and updated as each language completes, so change
+        feeds see progress; _finish_announcement marks it done.
+        """
+        completed = self.journal.completed_languages(announcement.job_id) if announcement.job_id else {}
+        if completed:
+            # Resumed after a restart; keep what the record already had
+            announcement.translations = {lang: r["translated_text"] for lang, r in completed.items()}
+            announcement.audio_paths = {lang: r["audio_path"] for lang, r in completed.items() if r["audio_path"]}
+        self._save_announcement_to_json(announcement, status="processing")
+        job = AnnouncementJob(
+            announcement,
+            on_complete=self._finish_announcement,
+            on_first_result=self._record_first_audio,
+            on_result=self._record_language_result,
+            completed=completed
+        )
+        return self.scheduler.submit(job)
+    
+    def _record_first_audio(self, job: AnnouncementJob) -> None:
+        """Track queue-to-first-audio latency for emergency and health alerts"""
+        announcement = job.announcement
+        if announcement.priority.value > URGENT_PRIORITY:
+            return
+        latency = job.first_result_at - (announcement.queued_at or job.enqueued_at)
+        with self._metrics_lock:
+            self.urgent_latencies.append(latency)
+        logger.info(f"{announcement.priority.name} first audio after {latency:.2f}s")
+    
+    def _record_language_result(self, job: AnnouncementJob, lang: str, result: dict) -> None:
+        """Persist a completed language without waiting for the rest of the fan-out"""
+        announcement = job.announcement
+        if announcement.job_id:
+            self.journal.complete_language(announcement.job_id, lang, result)
+        if not announcement.record_id:
+            return
+        with self._progress_lock:
+            results = job.completed_results()
+            self.store.update(announcement.record_id, {
+                'translations': {language: r["translated_text"] for language, r in results.items()},
+                'audio_paths': {language: r["audio_path"] for language, r in results.items() if r["audio_path"]}
+            })
+    
+    def _finish_announcement(self, job: AnnouncementJob) -> None:
+        """Commit the merged record once the fan-out has finished"""
+        announcement = job.announcement
+        for lang in job.languages:
+            if lang not in job.results:
+                logger.error(f"Failed to process {lang} announcement")
+        
+        announcement.translations = {lang: r["translated_text"] for lang, r in job.results.items()}
+        announcement.audio_paths = {lang: r["audio_path"] for lang, r in job.results.items() if r["audio_path"]}
+        status = "completed" if job.results else "failed"
+        with self._progress_lock:
+            self._save_announcement_to_json(announcement, status=status)
+        if announcement.job_id:
+            self._finish_job(announcement, status)
+        
+        with self._metrics_lock:
+            self.metrics["announcements_processed"] += 1
+            self.metrics["last_processed"] = time.time()
                 
-    def _process_language_announcement(self, announcement: Announcement, lang: str) -> bool:
+    def _finish_job(self, announcement: Announcement, status: str) -> None:
+        """Acknowledge a journaled job, provided its lease was not lost to another process"""
+        with self._leases_lock:
+            self._leased_jobs.discard(announcement.job_id)
+        finished = self.journal.finish(announcement.job_id, status, owner=announcement.lease_owner)
+        try:
+            if announcement.lease_owner and not finished.result(timeout=5):
+                logger.warning(f"Lease on job {announcement.job_id} was lost before it finished; "
+                               f"its current holder acknowledges it")
+        except Exception as e:
+            logger.error(f"Error finishing journaled job {announcement.job_id}: {str(e)}")
+                
+    def _process_language_announcement(self, announcement: Announcement, lang: str) -> Optional[dict]:
         """
         Process announcement for a specific language with retry logic.
         
@@ -245,11 +618,11 @@ class AnnouncementSystem:
             lang: Target language
             
         Returns:
-            bool: True if successful, False otherwise
+            dict: translated_text and audio_path for the language, or None on failure
         """
         retry_count = 0
         max_retries = self.config["retry_policy"]["max_retries"]
-        backoff_factor = self.config["retry_policy"]["backoff_factor"]
+        channels = announcement.channels or []
         
         logger.info(f"Processing {lang} announcement (Priority: {announcement.priority.name})")
         
@@ -257,19 +630,9 @@ class AnnouncementSystem:
         
         while retry_count < max_retries:
             try:
-                # Generate cache key
-                cache_key = self._generate_cache_key(
-                    announcement.text,
-                    announcement.src_lang,
-                    tgt_lang_code
-                )
-                
-                # Check cache first
-                audio_response = tts_cache.get(cache_key)
-                translated_text = None
-                
-                if not audio_response:
-                    # First translate the text
+                # Dwani calls wait for rate limit tokens at this announcement's priority
+                with request_priority(announcement.priority.value):
+                    # Translation and speech are served from the shared two-tier caches when possible
                     translated_text = self._translate_text(
                         announcement.text,
                         announcement.src_lang,
@@ -277,94 +640,113 @@ class AnnouncementSystem:
                     )
                     
                     # Then convert to speech if voice channel is enabled
-                    if DeliveryChannel.VOICE in announcement.channels:
-                        audio_response = self._text_to_speech(translated_text, tgt_lang_code)
-                        tts_cache[cache_key] = audio_response
-                        
-                        # Save audio file
-                        audio_filename = f"voice_{hash(translated_text)}_{lang}.mp3"
-                        audio_path = os.path.join("announcements", audio_filename)
-                        with open(audio_path, "wb") as f:
-                            f.write(audio_response)
-                
-                # Save translations and audio paths
-                if not hasattr(announcement, 'translations'):
-                    announcement.translations = {}
-                if not hasattr(announcement, 'audio_paths'):
-                    announcement.audio_paths = {}
-                    
-                announcement.translations[lang] = translated_text
-                if audio_response:
-                    announcement.audio_paths[lang] = audio_path
+                    audio_path = None
+                    if DeliveryChannel.VOICE in channels:
+                        audio_path = self._text_to_speech(translated_text, tgt_lang_code)
                 
-                # Deliver through all specified channels
-                for channel in announcement.channels:
+                # Deliver through all specified channels; the voice channel gets the audio file
+                for channel in channels:
                     self._deliver(
                         channel,
-                        audio_response if channel == DeliveryChannel.VOICE else translated_text,
+                        audio_path if channel == DeliveryChannel.VOICE else translated_text,
                         lang_code=tgt_lang_code
                     )
                 
                 # Update metrics
-                self.metrics["languages_served"][lang] = self.metrics["languages_served"].get(lang, 0) + 1
-                
-                # Save to JSON file
-                self._save_announcement_to_json(announcement)
+                with self._metrics_lock:
+                    self.metrics["languages_served"][lang] = self.metrics["languages_served"].get(lang, 0) + 1
                 
                 logger.info(f"Successfully processed {lang} announcement")
-                return True
+                return {"translated_text": translated_text, "audio_path": audio_path}
                 
+            except CircuitOpenError as e:
+                # Dwani is down; fail this language now instead of spending the retries on it
+                logger.warning(f"Not processing {lang} announcement: {str(e)}")
+                break
+            except RateLimitError as e:
+                # The limiter knows when the next token is due, so wait exactly that long
+                logger.warning(f"Rate limited. Retrying in {e.retry_after:.1f} seconds... ({retry_count + 1}/{max_retries})")
+                # Yields the worker (TaskDeferred) if urgent work arrives meanwhile
+                self.scheduler.backoff(e.retry_after)
+                retry_count += 1
+                continue
             except Exception as e:
-                error_msg = str(e)
-                if "Rate limit" in error_msg:
-                    wait_time = (backoff_factor ** retry_count) * 5  # Exponential backoff
-                    logger.warning(f"Rate limited. Retrying in {wait_time} seconds... ({retry_count + 1}/{max_retries})")
-                    time.sleep(wait_time)
+                logger.warning(f"Error processing {lang} announcement: {str(e)}")
                 retry_count += 1
                 continue
                 
-        self.metrics["failures"] += 1
-        return False
+        self._count("failures")
+        return None
 
-    def _save_announcement_to_json(self, announcement: Announcement) -> None:
-        """Save the announcement to the JSON file"""
+    def _translate_text(self, text: str, src_lang: str, tgt_lang_code: str) -> str:
+        """Translate text into the target language code, batched with concurrent requests"""
+        return dwani_client.translate(
+            text,
+            LANGUAGE_CODE_MAP.get(src_lang, src_lang),
+            tgt_lang_code
+        )
+
+    def _text_to_speech(self, text: str, lang_code: str) -> str:
+        """
+        Synthesize speech for already translated text.
+        
+        Returns:
+            str: Path of the canonical content-addressed blob, written once per (text, language, format)
+        """
+        return dwani_client.speech_file(text, lang_code)
+
+    def _deliver(self, channel: DeliveryChannel, payload, lang_code: str) -> None:
+        """Hand a translated announcement to a delivery channel"""
+        # Integration with IVR/SMS gateways would go here
+        logger.info(f"Delivered {lang_code} announcement via {channel.value}")
+
+    def _save_announcement_to_json(self, announcement: Announcement, status: str = "completed") -> None:
+        """
+        Save the announcement to the announcement store.
+        
+        The first save inserts the record and remembers its id on the
+        announcement; later saves update that record in place.
+        """
         try:
-            # Load existing announcements
-            try:
-                with open('announcement_logs.json', 'r') as f:
-                    announcements = json.load(f)
-            except (FileNotFoundError, json.JSONDecodeError):
-                announcements = []
+            metadata = announcement.metadata or {}
             
             # Convert announcement to dict
             announcement_dict = {
+                'timestamp': metadata.get('timestamp') or datetime.now().isoformat(),
+                'type': metadata.get('type', announcement.announcement_type.value),
                 'text': announcement.text,
                 'src_lang': announcement.src_lang,
                 'target_langs': announcement.target_langs,
-                'channels': [ch.value for ch in announcement.channels],
+                'channels': [ch.value for ch in announcement.channels or []],
                 'priority': announcement.priority.name,
                 'announcement_type': announcement.announcement_type.name,
                 'districts': announcement.districts,
                 'metadata': announcement.metadata,
                 'translations': getattr(announcement, 'translations', {}),
-                'audio_paths': getattr(announcement, 'audio_paths', {})
+                'audio_paths': getattr(announcement, 'audio_paths', {}),
+                'status': status
             }
             
-            # Add to list and save
-            announcements.append(announcement_dict)
-            with open('announcement_logs.json', 'w', encoding='utf-8') as f:
-                json.dump(announcements, f, ensure_ascii=False, indent=2)
+            if announcement.record_id:
+                del announcement_dict['timestamp']
+                self.store.update(announcement.record_id, announcement_dict)
+            else:
+                announcement.record_id = self.store.insert(announcement_dict)['id']
+                if announcement.job_id:
+                    self.journal.attach_record(announcement.job_id, announcement.record_id)
                 
         except Exception as e:
-            logger.error(f"Error saving announcement to JSON: {str(e)}")
+            logger.error(f"Error saving announcement to store: {str(e)}")
 
 # ======================
 # EMERGENCY BROADCAST SYSTEM
 # ======================
 class EmergencyBroadcastSystem(AnnouncementSystem):
-    def __init__(self, api_config: dict = None):
-        super().__init__(api_config)
+    def __init__(self, api_config: dict = None, store: AnnouncementStore = None, journal: JobJournal = None,
+                 phrase_library: PhraseLibrary = None):
+        super().__init__(api_config, store, journal)
         self.emergency_protocols = self._load_emergency_protocols()
+        self.phrase_library = phrase_library or get_phrase_library()
         
     def _load_emergency_protocols(self) -> dict:
         """Load emergency response protocols"""
@@ -390,6 +772,21 @@ class EmergencyBroadcastSystem(AnnouncementSystem):
         """Special handling for emergency alerts"""
         protocol = self.emergency_protocols.get(alert_data.alert_type, {})
         
+        # Get languages for all affected districts (unique union)
+        languages = set()
+        for district in alert_data.affected_districts:
+            languages.update(self.get_languages_for_region(district))
+        
+        if alert_data.template:
+            # Languages the library can compose are served from cache, without any API call
+            slots = {"district": alert_data.affected_districts, **(alert_data.slots or {})}
+            try:
+                alert_data.message, served = self.phrase_library.prime(alert_data.template, slots, sorted(languages))
+                self._count("phrase_library_languages", len(served))
+                logger.info(f"Template {alert_data.template}: {len(served)}/{len(languages)} languages from the phrase library")
+            except (KeyError, ValueError) as e:
+                logger.warning(f"Template {alert_data.template} not used: {str(e)}")
+        
         logger.info(f"\n🚨 EMERGENCY ALERT: {alert_data.alert_type.upper()}")
         logger.info(f"Affected Districts: {', '.join(alert_data.affected_districts)}")
         logger.info(f"Message: ⚠️ {alert_data.message}")
@@ -416,13 +813,13 @@ class EmergencyBroadcastSystem(AnnouncementSystem):
             }
         )
         
-        # Get languages for all affected districts (unique union)
-        languages = set()
-        for district in alert_data.affected_districts:
-            languages.update(self.get_languages_for_region(district))
-        
         announcement.target_langs = list(languages)
-        announcement.channels = [DeliveryChannel(ch) for ch in protocol.get("channels", ["voice", "sms", "ivr"])]
+        # Channels without a DeliveryChannel integration (ivr, mobile_app) are skipped
+        supported_channels = {ch.value for ch in DeliveryChannel}
+        announcement.channels = [
+            DeliveryChannel(ch) for ch in protocol.get("channels", ["voice", "sms", "ivr"])
+            if ch in supported_channels
+        ]
         
         self.translate_and_deliver(announcement)
         
@@ -438,7 +835,10 @@ class EmergencyBroadcastSystem(AnnouncementSystem):
             except Exception as e:
                 logger.error(f"Failed to execute emergency action {action}: {str(e)}")
         
-        self.metrics["emergency_alerts"] += 1
+        self._count("emergency_alerts")
+    
+    def get_system_metrics(self) -> dict:
+        return {**super().get_system_metrics(), "phrase_library": self.phrase_library.get_stats()}
     
     def activate_sirens(self, districts: List[str]) -> None:
         """Simulate IoT siren activation"""
@@ -0,0 +1,289 @@
+import os
+import hashlib
+import logging
+import threading
+import time
+import unicodedata
+from concurrent.futures import Future
+from typing import Callable, Dict, Optional, Tuple
+
+import cachetools
+
+logger = logging.getLogger(__name__)
+
+def normalize_text(text: str) -> str:
+    """Canonical form of a text for cache keys (NFC, collapsed whitespace)"""
+    return " ".join(unicodedata.normalize("NFC", text).split())
+
+def cache_key(text: str, src_code: str, tgt_code: str, variant: str) -> str:
+    """
+    Content-addressed key for a cached translation or synthesis.
+
+    Args:
+        text: Input text (normalized before hashing)
+        src_code: Source language code
+        tgt_code: Target language code
+        variant: What is cached, e.g. "text" or "speech:mp3"
+    """
+    payload = "\x1f".join([normalize_text(text), src_code, tgt_code, variant])
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+# ======================
+# TWO-TIER CACHE
+# ======================
+class TwoTierCache:
+    """
+    In-memory LRU in front of an on-disk content-addressed store.
+
+    Values are bytes or str and live on disk as ``<directory>/<key[:2]>/<key><suffix>``,
+    so the disk tier is shared by every process (Flask, Streamlit, CLI) and
+    survives restarts. The disk tier is trimmed to ``max_disk_bytes`` by
+    evicting the least recently used entries; with ``max_disk_bytes=None``
+    files are never evicted here and retention is left to the owner.
+
+    The memory tier holds ``max_memory_items`` entries, or with
+    ``max_memory_bytes`` as many as fit in that many bytes (for large values
+    such as audio); a value larger than the whole budget is kept on disk only.
+    """
+
+    def __init__(self, name: str, directory: str, max_memory_items: int = 1000,
+                 max_disk_bytes: Optional[int] = 100 * 1024 * 1024, suffix: str = ".bin", binary: bool = True,
+                 max_memory_bytes: Optional[int] = None):
+        self.name = name
+        self.directory = directory
+        self.max_disk_bytes = max_disk_bytes
+        self.suffix = suffix
+        self.binary = binary
+        self.max_memory_bytes = max_memory_bytes
+        if max_memory_bytes is not None:
+            self._memory = cachetools.LRUCache(maxsize=max_memory_bytes, getsizeof=len)
+        else:
+            self._memory = cachetools.LRUCache(maxsize=max_memory_items)
+        self._lock = threading.Lock()
+        # key -> (size, last_used) for entries known to be on disk
+        self._disk_index: Dict[str, Tuple[int, float]] = {}
+        self._disk_bytes = 0
+        # key -> result of a get_or_compute() computing it right now
+        self._inflight: Dict[str, Future] = {}
+        self.stats = {"memory_hits": 0, "disk_hits": 0, "misses": 0, "writes": 0, "evictions": 0}
+        os.makedirs(directory, exist_ok=True)
+        self._scan_disk()
+
+    def path(self, key: str) -> str:
+        """Location of the on-disk entry for a key (which may not exist yet)"""
+        return os.path.join(self.directory, key[:2], key + self.suffix)
+
+    def _scan_disk(self) -> None:
+        for root, _, files in os.walk(self.directory):
+            for filename in files:
+                if not filename.endswith(self.suffix):
+                    continue
+                try:
+                    stat = os.stat(os.path.join(root, filename))
+                except FileNotFoundError:
+                    # Removed by the audio GC or another process while scanning
+                    continue
+                self._disk_index[filename[:-len(self.suffix)]] = (stat.st_size, stat.st_mtime)
+                self._disk_bytes += stat.st_size
+
+    def _decode(self, data: bytes):
+        return data if self.binary else data.decode("utf-8")
+
+    def _encode(self, value) -> bytes:
+        return bytes(value) if self.binary else value.encode("utf-8")
+
+    def _remember(self, key: str, value) -> None:
+        """Put a value in the memory tier; caller holds the lock"""
+        try:
+            self._memory[key] = value
+        except ValueError:
+            # Larger than the whole memory budget
+            self._memory.pop(key, None)
+
+    def get(self, key: str, default=None):
+        with self._lock:
+            value = self._memory.get(key)
+            if value is not None:
+                self.stats["memory_hits"] += 1
+                return value
+
+        value = self._read_disk(key)
+        with self._lock:
+            if value is None:
+                self.stats["misses"] += 1
+                return default
+            self.stats["disk_hits"] += 1
+            self._remember(key, value)
+        return value
+
+    def preload(self, key: str):
+        """
+        Load an entry into the memory tier without counting a hit or miss.
+
+        For warm-up, so that preloading does not skew the hit rate.
+
+        Returns:
+            The value, or None if neither tier holds it
+        """
+        with self._lock:
+            value = self._memory.get(key)
+        if value is None:
+            value = self._read_disk(key)
+            if value is not None:
+                with self._lock:
+                    self._remember(key, value)
+        return value
+
+    def __contains__(self, key: str) -> bool:
+        with self._lock:
+            if key in self._memory:
+                return True
+        return os.path.exists(self.path(key))
+
+    def _read_disk(self, key: str):
+        path = self.path(key)
+        try:
+            with open(path, "rb") as f:
+                data = f.read()
+        except FileNotFoundError:
+            return None
+        with self._lock:
+            if key not in self._disk_index:
+                self._disk_bytes += len(data)
+            self._disk_index[key] = (len(data), time.time())
+        try:
+            os.utime(path)
+        except OSError:
+            pass
+        return self._decode(data)
+
+    def set(self, key: str, value) -> None:
+        data = self._encode(value)
+        path = self.path(key)
+        with self._lock:
+            self._remember(key, value)
+        if not os.path.exists(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+            with open(tmp_path, "wb") as f:
+                f.write(data)
+            os.replace(tmp_path, path)
+            with self._lock:
+                self.stats["writes"] += 1
+        with self._lock:
+            if key not in self._disk_index:
+                self._disk_bytes += len(data)
+            self._disk_index[key] = (len(data), time.time())
+            over_budget = self.max_disk_bytes is not None and self._disk_bytes > self.max_disk_bytes
+        if over_budget:
+            self._evict()
+
+    def __getitem__(self, key: str):
+        value = self.get(key)
+        if value is None:
+            raise KeyError(key)
+        return value
+
+    def __setitem__(self, key: str, value) -> None:
+        self.set(key, value)
+
+    def get_or_compute(self, key: str, compute: Callable[[], object]):
+        """
+        Return the cached value or compute, store and return it.
+
+        Concurrent misses on one key compute once; the other callers wait
+        for that result (or its exception).
+        """
+        value = self.get(key)
+        if value is not None:
+            return value
+        with self._lock:
+            pending = self._inflight.get(key)
+            leader = pending is None
+            if leader:
+                pending = self._inflight[key] = Future()
+        if not leader:
+            return pending.result()
+        try:
+            # A computation that finished between the miss and taking the lead has stored its value
+            value = self._read_disk(key)
+            if value is None:
+                value = compute()
+                self.set(key, value)
+            else:
+                with self._lock:
+                    self._remember(key, value)
+        except BaseException as e:
+            pending.set_exception(e)
+            raise
+        else:
+            pending.set_result(value)
+        finally:
+            with self._lock:
+                self._inflight.pop(key, None)
+        return value
+
+    def ensure_file(self, key: str, compute: Callable[[], object]) -> str:
+        """
+        Make sure the entry exists on disk and return its path.
+
+        An existing file is returned as-is without reading it; compute() only
+        runs when neither tier holds the value.
+        """
+        path = self.path(key)
+        if not os.path.exists(path):
+            self.set(key, self.get_or_compute(key, compute))
+            return path
+        try:
+            # Mark the file as used so retention (see audio_gc) sees the reuse
+            os.utime(path)
+        except OSError:
+            pass
+        return path
+
+    def remove_disk_entry(self, key: str) -> bool:
+        """Delete the on-disk entry for a key; the memory tier keeps any copy it holds"""
+        try:
+            os.remove(self.path(key))
+        except OSError:
+            return False
+        with self._lock:
+            size, _ = self._disk_index.pop(key, (0, None))
+            self._disk_bytes -= size
+        return True
+
+    def _evict(self) -> None:
+        """Drop least recently used disk entries until back under 90% of the budget"""
+        with self._lock:
+            target = self.max_disk_bytes * 0.9
+            victims = []
+            for key, (size, _) in sorted(self._disk_index.items(), key=lambda item: item[1][1]):
+                if self._disk_bytes <= target:
+                    break
+                victims.append(key)
+                self._disk_bytes -= size
+                del self._disk_index[key]
+                self._memory.pop(key, None)
+                self.stats["evictions"] += 1
+        for key in victims:
+            try:
+                os.remove(self.path(key))
+            except OSError:
+                pass
+        if victims:
+            logger.info(f"Evicted {len(victims)} entries from {self.name} cache")
+
+    def get_stats(self) -> dict:
+        with self._lock:
+            lookups = self.stats["memory_hits"] + self.stats["disk_hits"] + self.stats["misses"]
+            hits = lookups - self.stats["misses"]
+            stats = {
+                **self.stats,
+                "hit_rate": hits / lookups if lookups else 0.0,
+                "memory_items": len(self._memory),
+                "disk_items": len(self._disk_index),
+                "disk_bytes": self._disk_bytes
+            }
+            if self.max_memory_bytes is not None:
+                stats["memory_bytes"] = self._memory.currsize
+            return stats
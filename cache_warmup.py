@@ -0,0 +1,177 @@
+"""
+Background warm-up of the in-memory translation and TTS caches after a restart.
+
+Usage (one warm-up of this process's caches, printing the result):
+    python cache_warmup.py
+"""
+import json
+import time
+import logging
+import threading
+from datetime import datetime
+from typing import Dict, List, Optional, Tuple
+
+from announcement_store import AnnouncementStore, get_announcement_store
+from bhashaseva_enhanced import LANGUAGE_CODE_MAP
+from dwani_client import speech_key, translation_key, translation_cache, tts_cache
+from phrase_library import get_phrase_library
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_WARMUP_CONFIG = {
+    "enabled": True,
+    # Only announcements from this many days back count towards hotness
+    "history_days": 14,
+    # Most (text, language) pairs to load; the TTS memory tier holds tts_memory_mb of audio
+    "max_pairs": 300,
+    "include_templates": True
+}
+
+def _load_warmup_config(config_path: str = 'config/system_config.json') -> dict:
+    values = dict(DEFAULT_WARMUP_CONFIG)
+    try:
+        with open(config_path) as f:
+            values.update(json.load(f).get("cache_warmup", {}))
+    except (FileNotFoundError, json.JSONDecodeError):
+        pass
+    return values
+
+def _epoch(timestamp: str) -> Optional[float]:
+    try:
+        return datetime.fromisoformat(timestamp).timestamp()
+    except (TypeError, ValueError):
+        return None
+
+# ======================
+# CACHE WARM-UP
+# ======================
+class CacheWarmer:
+    """
+    Preloads the hottest (text, language) pairs of recent history into the memory caches.
+
+    A pair is hot when the same text was announced in that language often
+    (ties go to the most recent). For each, the translation and its audio
+    are read from the caches' disk tiers into memory, without counting as
+    cache hits or misses; a translation the record holds but the disk tier
+    has lost is written back. The phrase library's template audio is
+    loaded as well. Nothing calls Dwani, and the work runs on a daemon
+    thread, so startup does not wait for it.
+    """
+
+    def __init__(self, store: AnnouncementStore = None, history_days: float = 14, max_pairs: int = 300,
+                 include_templates: bool = True, enabled: bool = True):
+        self.store = store or get_announcement_store()
+        self.history_days = history_days
+        self.max_pairs = max_pairs
+        self.include_templates = include_templates
+        self.enabled = enabled
+        self._thread: Optional[threading.Thread] = None
+        self.progress = {
+            "state": "idle",
+            "pairs_total": 0,
+            "pairs_done": 0,
+            "translations_loaded": 0,
+            "translations_restored": 0,
+            "audio_loaded": 0,
+            "template_phrases_loaded": 0,
+            "started_at": None,
+            "duration_ms": None,
+            "error": None
+        }
+
+    def hot_pairs(self) -> List[Tuple[str, str, str, Optional[str]]]:
+        """
+        Returns:
+            list: (text, source code, target code, recorded translation) tuples, hottest first
+        """
+        cutoff = time.time() - self.history_days * 86400 if self.history_days else None
+        # (text, src code, tgt code) -> [count, last announced, recorded translation]
+        pairs: Dict[Tuple[str, str, str], list] = {}
+        for record in self.store.all():
+            announced = _epoch(record.get('timestamp')) or 0.0
+            if cutoff is not None and announced < cutoff:
+                continue
+            text = record.get('text')
+            if not text:
+                continue
+            # Streamlit and CLI records call it source_lang
+            src_lang = record.get('src_lang') or record.get('source_lang') or 'english'
+            src_code = LANGUAGE_CODE_MAP.get(src_lang, src_lang)
+            for lang, translated in (record.get('translations') or {}).items():
+                key = (text, src_code, LANGUAGE_CODE_MAP.get(lang, lang))
+                entry = pairs.setdefault(key, [0, 0.0, None])
+                entry[0] += 1
+                if announced >= entry[1]:
+                    entry[1] = announced
+                    entry[2] = translated
+        ranked = sorted(pairs.items(), key=lambda item: (item[1][0], item[1][1]), reverse=True)
+        return [(text, src, tgt, entry[2]) for (text, src, tgt), entry in ranked[:self.max_pairs]]
+
+    def run_once(self) -> dict:
+        """Warm the caches now; returns the progress counters"""
+        progress = self.progress
+        progress.update(state="running", started_at=datetime.now().isoformat(), error=None)
+        started = time.monotonic()
+        try:
+            pairs = self.hot_pairs()
+            progress["pairs_total"] = len(pairs)
+            for text, src_code, tgt_code, recorded in pairs:
+                key = translation_key(text, src_code, tgt_code)
+                translated = translation_cache.preload(key)
+                if translated is not None:
+                    progress["translations_loaded"] += 1
+                elif recorded:
+                    translation_cache.set(key, recorded)
+                    translated = recorded
+                    progress["translations_restored"] += 1
+                if translated is not None and tts_cache.preload(speech_key(translated, tgt_code)) is not None:
+                    progress["audio_loaded"] += 1
+                progress["pairs_done"] += 1
+            if self.include_templates:
+                progress["template_phrases_loaded"] = get_phrase_library().preload()
+            progress["state"] = "done"
+        except Exception as e:
+            logger.error(f"Cache warm-up failed: {str(e)}")
+            progress.update(state="failed", error=str(e))
+        progress["duration_ms"] = round((time.monotonic() - started) * 1000, 1)
+        logger.info(f"Cache warm-up {progress['state']}: {progress['pairs_done']}/{progress['pairs_total']} pairs, "
+                    f"{progress['audio_loaded']} audio clips, {progress['template_phrases_loaded']} template phrases")
+        return dict(progress)
+
+    def start(self) -> None:
+        """Warm up once on a daemon thread"""
+        if not self.enabled:
+            self.progress["state"] = "disabled"
+            return
+        if self._thread is not None:
+            return
+        self.progress["state"] = "pending"
+        self._thread = threading.Thread(target=self.run_once, name="cache-warmup", daemon=True)
+        self._thread.start()
+
+    def get_stats(self) -> dict:
+        return dict(self.progress)
+
+# ======================
+# MODULE-LEVEL WARMER
+# ======================
+_warmer: Optional[CacheWarmer] = None
+_warmer_lock = threading.Lock()
+
+def get_cache_warmer() -> CacheWarmer:
+    """Process-wide cache warmer configured from the ``cache_warmup`` config section"""
+    global _warmer
+    with _warmer_lock:
+        if _warmer is None:
+            _warmer = CacheWarmer(**_load_warmup_config())
+        return _warmer
+
+def start_cache_warmup() -> CacheWarmer:
+    """Start warming this process's caches in the background (once)"""
+    warmer = get_cache_warmer()
+    warmer.start()
+    return warmer
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO)
+    print(json.dumps(get_cache_warmer().run_once(), indent=2))
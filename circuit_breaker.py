@@ -0,0 +1,183 @@
+import json
+import time
+import threading
+from typing import Dict, Optional
+
+DEFAULT_BREAKER_CONFIG = {
+    "failure_threshold": 5,
+    "reset_seconds": 30,
+    "half_open_max_calls": 1
+}
+
+def _load_breaker_config(config_path: str = 'config/system_config.json') -> dict:
+    values = dict(DEFAULT_BREAKER_CONFIG)
+    try:
+        with open(config_path) as f:
+            values.update(json.load(f).get("circuit_breaker", {}))
+    except (FileNotFoundError, json.JSONDecodeError):
+        pass
+    return values
+
+class CircuitOpenError(Exception):
+    """A call was refused without being sent because its endpoint's circuit is open"""
+
+    def __init__(self, endpoint: str, retry_after: float):
+        super().__init__(f"Circuit open for {endpoint}; Dwani is failing, next probe in {retry_after:.1f}s")
+        self.endpoint = endpoint
+        self.retry_after = retry_after
+
+# ======================
+# CIRCUIT BREAKER
+# ======================
+class CircuitBreaker:
+    """
+    Closed / open / half-open circuit breaker for one endpoint.
+
+    Closed, calls go through and consecutive failures are counted. After
+    ``failure_threshold`` of them the circuit opens and every call fails
+    fast with CircuitOpenError for ``reset_seconds``. It then turns
+    half-open: up to ``half_open_max_calls`` probes are let through, and
+    the first result decides whether it closes again or re-opens.
+
+    Every probe slot taken by before_call() must be handed back with
+    release(), whatever the outcome (including cancellation). Should a
+    probe never report back, the slots are freed again after another
+    ``reset_seconds``, so the circuit cannot stay shut for good.
+    """
+
+    CLOSED = "closed"
+    OPEN = "open"
+    HALF_OPEN = "half_open"
+
+    def __init__(self, name: str, failure_threshold: int = 5, reset_seconds: float = 30,
+                 half_open_max_calls: int = 1):
+        """
+        Args:
+            name: Endpoint name, reported in CircuitOpenError
+            failure_threshold: Consecutive failures that open the circuit
+            reset_seconds: How long the circuit stays open before probing
+            half_open_max_calls: Probes allowed at once while half-open
+        """
+        self.name = name
+        self.failure_threshold = failure_threshold
+        self.reset_seconds = reset_seconds
+        self.half_open_max_calls = half_open_max_calls
+        self._lock = threading.Lock()
+        self._state = self.CLOSED
+        self._failures = 0
+        self._opened_at = 0.0
+        self._probing_since = 0.0
+        self._probes = 0
+        # Bumped on every half-open round, so a late release() cannot free a slot of the next round
+        self._round = 0
+        self.stats = {"opened": 0, "rejected": 0}
+
+    @property
+    def state(self) -> str:
+        with self._lock:
+            return self._current_state()
+
+    def _start_probing(self, now: float) -> None:
+        self._state = self.HALF_OPEN
+        self._probing_since = now
+        self._probes = 0
+        self._round += 1
+
+    def _current_state(self) -> str:
+        now = time.monotonic()
+        if self._state == self.OPEN and now - self._opened_at >= self.reset_seconds:
+            self._start_probing(now)
+        elif (self._state == self.HALF_OPEN and self._probes >= self.half_open_max_calls
+              and now - self._probing_since >= self.reset_seconds):
+            # The probes in flight never reported back; let new ones through
+            self._start_probing(now)
+        return self._state
+
+    def _reject(self) -> CircuitOpenError:
+        self.stats["rejected"] += 1
+        since = self._opened_at if self._state == self.OPEN else self._probing_since
+        return CircuitOpenError(self.name, max(0.0, since + self.reset_seconds - time.monotonic()))
+
+    def check(self) -> None:
+        """
+        Fail fast while the circuit is open, without taking a probe slot.
+
+        Lets a caller skip waiting for a rate-limit token that a call
+        refused by before_call() would have wasted.
+
+        Raises:
+            CircuitOpenError: While open
+        """
+        with self._lock:
+            if self._current_state() != self.OPEN:
+                return
+            error = self._reject()
+        raise error
+
+    def before_call(self) -> Optional[int]:
+        """
+        Admit a call or fail fast.
+
+        Returns:
+            int: The probe round when the call took a half-open probe slot, else None;
+                pass it to release() once the call is over
+
+        Raises:
+            CircuitOpenError: While open, or half-open with every probe slot taken
+        """
+        with self._lock:
+            state = self._current_state()
+            if state == self.CLOSED:
+                return None
+            if state == self.HALF_OPEN and self._probes < self.half_open_max_calls:
+                self._probes += 1
+                return self._round
+            error = self._reject()
+        raise error
+
+    def release(self, probe: Optional[int]) -> None:
+        """Hand back the probe slot taken by before_call(), if any"""
+        if probe is None:
+            return
+        with self._lock:
+            if self._state == self.HALF_OPEN and probe == self._round and self._probes > 0:
+                self._probes -= 1
+
+    def record_success(self) -> None:
+        with self._lock:
+            self._failures = 0
+            self._state = self.CLOSED
+            self._probes = 0
+
+    def record_failure(self) -> None:
+        with self._lock:
+            self._failures += 1
+            if self._state == self.HALF_OPEN or self._failures >= self.failure_threshold:
+                if self._state != self.OPEN:
+                    self.stats["opened"] += 1
+                self._state = self.OPEN
+                self._opened_at = time.monotonic()
+                self._probes = 0
+
+    def get_stats(self) -> dict:
+        with self._lock:
+            return {**self.stats, "state": self._current_state(), "consecutive_failures": self._failures}
+
+# ======================
+# MODULE-LEVEL BREAKERS
+# ======================
+_breakers: Dict[str, CircuitBreaker] = {}
+_breakers_lock = threading.Lock()
+
+def get_circuit_breaker(endpoint: str) -> CircuitBreaker:
+    """
+    Process-wide breaker of a Dwani endpoint, configured from the
+    ``circuit_breaker`` config section.
+
+    The async client and any direct SDK call for the same endpoint share it,
+    so an outage seen by one path fails the other fast too.
+    """
+    with _breakers_lock:
+        if endpoint not in _breakers:
+            _breakers[endpoint] = CircuitBreaker(endpoint, **_load_breaker_config())
+        return _breakers[endpoint]
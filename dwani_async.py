@@ -0,0 +1,451 @@
+import os
+import json
+import time
+import asyncio
+import atexit
+import logging
+import threading
+from collections import deque
+from concurrent.futures import Future
+from typing import AsyncIterator, Coroutine, Dict, Optional
+
+import aiohttp
+import dwani
+import requests
+
+from circuit_breaker import CircuitBreaker, get_circuit_breaker
+from rate_limiter import PriorityRateLimiter, RateLimitError, TokenBucket, current_priority
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_ASYNC_CONFIG = {
+    "max_connections": 100,
+    "rate_limit_state": None,
+    "endpoints": {
+        "translate": {"concurrency": 16, "timeout": 30},
+        "speech": {"concurrency": 8, "timeout": 60},
+        "transcribe": {"concurrency": 4, "timeout": 120}
+    },
+    "hedging": {
+        # Calls at this PriorityLevel value or more urgent may be hedged (1 = emergencies only)
+        "max_priority": 1,
+        "endpoints": ["translate", "speech"],
+        # A duplicate goes out once the call is slower than this percentile of recent calls
+        "percentile": 95,
+        "min_samples": 20,
+        "window": 200
+    }
+}
+
+ENDPOINT_PATHS = {
+    "translate": "/v1/translate",
+    "speech": "/v1/audio/speech",
+    "transcribe": "/v1/transcribe/"
+}
+
+class AsyncDwaniAPIError(dwani.DhwaniAPIError):
+    """Non-200 response from Dwani, raised with the same message format as the SDK"""
+
+    def __init__(self, status_code: int, text: str):
+        Exception.__init__(self, f"API Error {status_code}: {text}")
+        self.status_code = status_code
+        self.response = None
+
+def is_outage(error: Exception) -> bool:
+    """Whether an error means Dwani is unavailable (as opposed to rejecting this particular call)"""
+    if isinstance(error, dwani.DhwaniAPIError):
+        return error.status_code >= 500
+    return isinstance(error, (asyncio.TimeoutError, aiohttp.ClientError, ConnectionError,
+                              requests.exceptions.ConnectionError, requests.exceptions.Timeout))
+
+# ======================
+# ASYNC CLIENT
+# ======================
+class AsyncDwaniClient:
+    """
+    asyncio client for the Dwani translate, speech and ASR endpoints.
+
+    All calls share one aiohttp session whose connector caps the number of
+    open connections. Each endpoint additionally has its own concurrency
+    limit and timeout, so a burst of speech synthesis cannot starve
+    translation of connections. Calls to an endpoint with a rate limiter
+    first wait for a token, most urgent first, and fail fast with
+    RateLimitError when none can be had within the endpoint timeout.
+
+    Endpoints with a circuit breaker stop calling Dwani after repeated
+    timeouts, connection errors or 5xx answers and fail fast with
+    CircuitOpenError until a probe succeeds. Urgent calls to hedged
+    endpoints send a duplicate request once they run slower than the
+    configured latency percentile and take whichever answer arrives first.
+    Must be used from a single event loop.
+    """
+
+    def __init__(self, api_key: str = None, api_base: str = None, max_connections: int = 100,
+                 endpoints: Dict[str, dict] = None, limiters: Dict[str, PriorityRateLimiter] = None,
+                 breakers: Dict[str, CircuitBreaker] = None, hedging: dict = None):
+        """
+        Args:
+            api_key: Dwani API key (defaults to dwani.api_key / DWANI_API_KEY)
+            api_base: Base URL, e.g. a local stub server (defaults to dwani.api_base)
+            max_connections: Size of the shared connection pool
+            endpoints: Per-endpoint {"concurrency", "timeout"} overrides
+            limiters: Per-endpoint rate limiters; endpoints without one are not rate limited
+            breakers: Per-endpoint circuit breakers; endpoints without one never fail fast
+            hedging: {"max_priority", "endpoints", "percentile", "min_samples", "window"}; None disables hedging
+        """
+        self.api_key = api_key or dwani.api_key or os.getenv("DWANI_API_KEY")
+        self.api_base = (api_base or dwani.api_base or os.getenv("DWANI_API_BASE_URL", "")).rstrip("/")
+        self.max_connections = max_connections
+        self.endpoints = {name: dict(limits) for name, limits in DEFAULT_ASYNC_CONFIG["endpoints"].items()}
+        for name, limits in (endpoints or {}).items():
+            self.endpoints.setdefault(name, {}).update(limits)
+        self._session: Optional[aiohttp.ClientSession] = None
+        self._limits = {name: asyncio.Semaphore(limits["concurrency"]) for name, limits in self.endpoints.items()}
+        self.limiters = limiters or {}
+        self.breakers = breakers or {}
+        self.hedging = hedging
+        window = hedging["window"] if hedging else 0
+        # Latencies of recent successful calls, for the hedging threshold
+        self._latencies = {name: deque(maxlen=window) for name in self.endpoints}
+        self.stats = {
+            name: {"requests": 0, "errors": 0, "in_flight": 0, "rate_limited": 0, "hedged": 0, "hedge_wins": 0}
+            for name in self.endpoints
+        }
+
+    def _get_session(self) -> aiohttp.ClientSession:
+        if self._session is None or self._session.closed:
+            self._session = aiohttp.ClientSession(
+                connector=aiohttp.TCPConnector(limit=self.max_connections),
+                headers={"X-API-Key": self.api_key or ""}
+            )
+        return self._session
+
+    def _timeout(self, endpoint: str) -> aiohttp.ClientTimeout:
+        return aiohttp.ClientTimeout(total=self.endpoints[endpoint]["timeout"])
+
+    async def acquire_token(self, endpoint: str) -> None:
+        """
+        Wait for a rate-limit token of an endpoint at the calling context's priority.
+
+        Raises:
+            RateLimitError: If no token can be granted within the endpoint's timeout
+        """
+        limiter = self.limiters.get(endpoint)
+        if limiter is None:
+            return
+        try:
+            await limiter.acquire(max_wait=self.endpoints[endpoint]["timeout"])
+        except RateLimitError:
+            self.stats[endpoint]["rate_limited"] += 1
+            raise
+
+    def _raise_for_status(self, endpoint: str, resp: aiohttp.ClientResponse, body: bytes) -> None:
+        if resp.status == 429:
+            limiter = self.limiters.get(endpoint)
+            try:
+                retry_after = float(resp.headers.get("Retry-After", ""))
+            except ValueError:
+                retry_after = 1 / limiter.bucket.rate if limiter else 60.0
+            if limiter:
+                # Nobody in this process (or, with shared state, on this host) tries again before then
+                limiter.bucket.pause(retry_after)
+            self.stats[endpoint]["rate_limited"] += 1
+            raise RateLimitError(endpoint, retry_after)
+        if resp.status != 200:
+            raise AsyncDwaniAPIError(resp.status, body.decode("utf-8", errors="replace"))
+
+    def _check_circuit(self, endpoint: str) -> Optional[CircuitBreaker]:
+        breaker = self.breakers.get(endpoint)
+        if breaker is not None:
+            # Raises CircuitOpenError before waiting for a token while Dwani is down
+            breaker.check()
+        return breaker
+
+    @staticmethod
+    def _record_outcome(breaker: Optional[CircuitBreaker], error: Exception = None) -> None:
+        if breaker is None:
+            return
+        if error is None or not is_outage(error):
+            # Rate limits and 4xx answers still show the service is up
+            breaker.record_success()
+        else:
+            breaker.record_failure()
+
+    def _hedge_delay(self, endpoint: str) -> Optional[float]:
+        """Seconds after which an urgent call to the endpoint gets a duplicate, or None if it is not hedged"""
+        hedging = self.hedging
+        if not hedging or endpoint not in hedging["endpoints"] or current_priority() > hedging["max_priority"]:
+            return None
+        samples = sorted(self._latencies[endpoint])
+        if len(samples) < max(hedging["min_samples"], 1):
+            return None
+        return samples[min(len(samples) - 1, int(len(samples) * hedging["percentile"] / 100))]
+
+    async def _post(self, endpoint: str, path_suffix: str = "", **kwargs):
+        """POST to an endpoint within its circuit, rate and concurrency limits; returns the response body"""
+        breaker = self._check_circuit(endpoint)
+        delay = self._hedge_delay(endpoint)
+        if delay is None:
+            return await self._send(endpoint, breaker, path_suffix, **kwargs)
+        return await self._hedged_send(endpoint, breaker, delay, path_suffix, **kwargs)
+
+    async def _send(self, endpoint: str, breaker: Optional[CircuitBreaker], path_suffix: str = "",
+                    take_token: bool = True, **kwargs):
+        stats = self.stats[endpoint]
+        if take_token:
+            await self.acquire_token(endpoint)
+        async with self._limits[endpoint]:
+            probe = None
+            try:
+                if breaker is not None:
+                    probe = breaker.before_call()
+                stats["requests"] += 1
+                stats["in_flight"] += 1
+                started = time.monotonic()
+                try:
+                    url = f"{self.api_base}{ENDPOINT_PATHS[endpoint]}{path_suffix}"
+                    async with self._get_session().post(url, timeout=self._timeout(endpoint), **kwargs) as resp:
+                        body = await resp.read()
+                        self._raise_for_status(endpoint, resp, body)
+                except Exception as e:
+                    stats["errors"] += 1
+                    self._record_outcome(breaker, e)
+                    raise
+                finally:
+                    stats["in_flight"] -= 1
+                self._latencies[endpoint].append(time.monotonic() - started)
+                self._record_outcome(breaker)
+                return body
+            finally:
+                # Also on cancellation (the losing side of a hedge), which is no Exception
+                if breaker is not None:
+                    breaker.release(probe)
+
+    async def _hedged_send(self, endpoint: str, breaker: Optional[CircuitBreaker], delay: float,
+                           path_suffix: str = "", **kwargs):
+        """
+        Send a call and, if it has not answered within ``delay`` seconds, a
+        duplicate; the first successful answer wins and the other is cancelled.
+        """
+        primary = asyncio.ensure_future(self._send(endpoint, breaker, path_suffix, **kwargs))
+        try:
+            done, _ = await asyncio.wait({primary}, timeout=delay)
+        except asyncio.CancelledError:
+            primary.cancel()
+            raise
+        limiter = self.limiters.get(endpoint)
+        # The duplicate only goes out if a token is free right now; it never queues behind other work
+        if done or (limiter is not None and limiter.bucket.try_take() > 0):
+            return await primary
+
+        self.stats[endpoint]["hedged"] += 1
+        hedge = asyncio.ensure_future(self._send(endpoint, breaker, path_suffix, take_token=False, **kwargs))
+        pending = {primary, hedge}
+        error = None
+        try:
+            while pending:
+                done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    if task.exception() is None:
+                        if task is hedge:
+                            self.stats[endpoint]["hedge_wins"] += 1
+                        return task.result()
+                    error = task.exception()
+            raise error
+        finally:
+            for task in pending:
+                task.cancel()
+
+    async def translate(self, sentences, src_lang: str, tgt_lang: str) -> dict:
+        """Translate a list of sentences; returns the raw JSON response"""
+        body = await self._post(
+            "translate",
+            json={"sentences": list(sentences), "src_lang": src_lang, "tgt_lang": tgt_lang},
+            headers={"accept": "application/json"}
+        )
+        return json.loads(body)
+
+    async def speech(self, text: str, response_format: str = "mp3") -> bytes:
+        """Synthesize speech; returns the encoded audio"""
+        body = await self._post(
+            "speech",
+            params={"input": text, "response_format": response_format},
+            data=b"",
+            headers={"accept": "application/json"}
+        )
+        return body
+
+    async def stream_speech(self, text: str, response_format: str = "mp3", chunk_size: int = 8192) -> AsyncIterator[bytes]:
+        """Yield encoded audio chunks as Dwani produces them"""
+        stats = self.stats["speech"]
+        breaker = self._check_circuit("speech")
+        await self.acquire_token("speech")
+        async with self._limits["speech"]:
+            probe = None
+            try:
+                if breaker is not None:
+                    probe = breaker.before_call()
+                stats["requests"] += 1
+                stats["in_flight"] += 1
+                try:
+                    async with self._get_session().post(
+                        f"{self.api_base}{ENDPOINT_PATHS['speech']}",
+                        params={"input": text, "response_format": response_format},
+                        data=b"",
+                        headers={"accept": "application/json"},
+                        timeout=self._timeout("speech")
+                    ) as resp:
+                        if resp.status != 200:
+                            self._raise_for_status("speech", resp, await resp.read())
+                        async for chunk in resp.content.iter_chunked(chunk_size):
+                            yield chunk
+                except Exception as e:
+                    stats["errors"] += 1
+                    self._record_outcome(breaker, e)
+                    raise
+                finally:
+                    stats["in_flight"] -= 1
+                self._record_outcome(breaker)
+            finally:
+                if breaker is not None:
+                    breaker.release(probe)
+
+    async def transcribe(self, audio: bytes, language: str, filename: str = "audio.wav") -> dict:
+        """
+        Transcribe recorded audio held in memory.
+
+        Args:
+            audio: Encoded audio bytes
+            language: Language name as accepted by Dwani ASR (e.g. "kannada")
+            filename: Name reported for the multipart upload
+        """
+        form = aiohttp.FormData()
+        form.add_field("file", audio, filename=filename)
+        body = await self._post("transcribe", path_suffix=f"?language={language.lower()}", data=form)
+        return json.loads(body)
+
+    async def close(self) -> None:
+        if self._session is not None and not self._session.closed:
+            await self._session.close()
+
+    def get_stats(self) -> dict:
+        stats = {name: dict(stats) for name, stats in self.stats.items()}
+        for name, limiter in self.limiters.items():
+            stats[name]["waiting_for_token"] = limiter.pending()
+        for name, breaker in self.breakers.items():
+            stats[name]["circuit"] = breaker.get_stats()
+        return stats
+
+# ======================
+# BACKGROUND EVENT LOOP
+# ======================
+class EventLoopThread:
+    """
+    An asyncio event loop running on a daemon thread.
+
+    Lets synchronous code (Flask request threads, Streamlit scripts, the
+    announcement workers) hand coroutines to one shared loop and wait on,
+    or attach callbacks to, the returned concurrent Future.
+    """
+
+    def __init__(self, name: str = "dwani-io"):
+        self.loop = asyncio.new_event_loop()
+        self._thread = threading.Thread(target=self._run, name=name, daemon=True)
+        self._thread.start()
+
+    def _run(self) -> None:
+        asyncio.set_event_loop(self.loop)
+        self.loop.run_forever()
+
+    def submit(self, coro: Coroutine) -> Future:
+        """Schedule a coroutine on the loop without waiting for it"""
+        return asyncio.run_coroutine_threadsafe(coro, self.loop)
+
+    def run(self, coro: Coroutine, timeout: float = None):
+        """Run a coroutine on the loop and block until it finishes"""
+        if threading.current_thread() is self._thread:
+            raise RuntimeError("EventLoopThread.run() called from its own loop; await the coroutine instead")
+        return self.submit(coro).result(timeout)
+
+    def stop(self) -> None:
+        self.loop.call_soon_threadsafe(self.loop.stop)
+        self._thread.join(timeout=5)
+
+# ======================
+# MODULE-LEVEL ENGINE
+# ======================
+_loop_thread: Optional[EventLoopThread] = None
+_client: Optional[AsyncDwaniClient] = None
+_engine_lock = threading.Lock()
+
+def _load_async_config(config_path: str = 'config/system_config.json') -> dict:
+    try:
+        with open(config_path) as f:
+            config = json.load(f)
+    except (FileNotFoundError, json.JSONDecodeError):
+        config = {}
+    # The top-level rate_limit (calls per minute) applies to every endpoint unless overridden
+    values = {**DEFAULT_ASYNC_CONFIG, "rate_limit": config.get("rate_limit"), **config.get("async_io", {})}
+    if values["hedging"]:
+        values["hedging"] = {**DEFAULT_ASYNC_CONFIG["hedging"], **values["hedging"]}
+    return values
+
+def _build_limiters(config: dict) -> Dict[str, PriorityRateLimiter]:
+    limiters = {}
+    for name in ENDPOINT_PATHS:
+        endpoint = config["endpoints"].get(name, {})
+        rate = endpoint.get("rate_limit", config.get("rate_limit"))
+        if rate:
+            bucket = TokenBucket(name, rate, endpoint.get("burst"), config.get("rate_limit_state"))
+            limiters[name] = PriorityRateLimiter(bucket)
+    return limiters
+
+def get_event_loop_thread() -> EventLoopThread:
+    """Process-wide event loop that runs every Dwani call"""
+    global _loop_thread
+    with _engine_lock:
+        if _loop_thread is None:
+            _loop_thread = EventLoopThread()
+            atexit.register(shutdown_async_engine)
+        return _loop_thread
+
+def get_async_client() -> AsyncDwaniClient:
+    """
+    Process-wide async client, created on first use so that it picks up
+    dwani.api_key / dwani.api_base set by the entry point.
+    """
+    global _client
+    with _engine_lock:
+        if _client is None:
+            config = _load_async_config()
+            _client = AsyncDwaniClient(
+                max_connections=config["max_connections"],
+                endpoints=config["endpoints"],
+                limiters=_build_limiters(config),
+                breakers={name: get_circuit_breaker(name) for name in ENDPOINT_PATHS},
+                hedging=config["hedging"]
+            )
+        return _client
+
+def submit_async(coro: Coroutine) -> Future:
+    """Schedule a coroutine on the shared loop and return a concurrent Future"""
+    return get_event_loop_thread().submit(coro)
+
+def run_async(coro: Coroutine, timeout: float = None):
+    """Run a coroutine on the shared loop from synchronous code and return its result"""
+    return get_event_loop_thread().run(coro, timeout)
+
+def shutdown_async_engine() -> None:
+    """Close the shared session and stop the loop"""
+    global _loop_thread, _client
+    with _engine_lock:
+        loop_thread, client = _loop_thread, _client
+        _loop_thread = _client = None
+    if loop_thread is None:
+        return
+    if client is not None:
+        try:
+            loop_thread.submit(client.close()).result(5)
+        except Exception as e:
+            logger.warning(f"Error closing Dwani session: {str(e)}")
+    loop_thread.stop()
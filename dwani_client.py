@@ -0,0 +1,491 @@
+import os
+import json
+import queue
+import asyncio
+import inspect
+import logging
+import threading
+import time
+from concurrent.futures import Future
+from typing import Dict, Iterator, List, Optional, Tuple
+
+import dwani
+
+from cache_store import TwoTierCache, cache_key
+from circuit_breaker import get_circuit_breaker
+from dwani_async import get_async_client, is_outage, run_async, submit_async
+from rate_limiter import current_priority, request_priority
+from speech_chunking import chunk_text, join_mp3
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_BATCH_CONFIG = {
+    "window_ms": 50,
+    "max_batch": 32
+}
+
+DEFAULT_CACHE_CONFIG = {
+    "directory": "cache",
+    "translation_memory_items": 1000,
+    "translation_disk_mb": 50,
+    "tts_memory_mb": 64,
+    "audio_directory": "announcements/blobs"
+}
+
+DEFAULT_CHUNKING_CONFIG = {
+    "enabled": True,
+    # Shorter texts are synthesized in one call
+    "min_text_chars": 200,
+    "min_chunk_chars": 40,
+    "max_chunk_chars": 300,
+    # Sentences of one announcement synthesized at once
+    "max_parallel": 8
+}
+
+def _load_config_section(section: str, defaults: dict, config_path: str = 'config/system_config.json') -> dict:
+    values = dict(defaults)
+    try:
+        with open(config_path) as f:
+            values.update(json.load(f).get(section, {}))
+    except (FileNotFoundError, json.JSONDecodeError):
+        pass
+    return values
+
+# ======================
+# CACHES
+# ======================
+_cache_config = _load_config_section("cache", DEFAULT_CACHE_CONFIG)
+
+translation_cache = TwoTierCache(
+    "translation",
+    os.path.join(_cache_config["directory"], "translations"),
+    max_memory_items=_cache_config["translation_memory_items"],
+    max_disk_bytes=_cache_config["translation_disk_mb"] * 1024 * 1024,
+    suffix=".txt",
+    binary=False
+)
+# The TTS disk tier doubles as the content-addressed audio store served by /audio/:
+# one canonical blob per (text, language, format). Retention is handled by the audio GC.
+tts_cache = TwoTierCache(
+    "tts",
+    _cache_config["audio_directory"],
+    max_memory_bytes=_cache_config["tts_memory_mb"] * 1024 * 1024,
+    max_disk_bytes=None,
+    suffix=".mp3"
+)
+
+def translation_key(text: str, src_code: str, tgt_code: str) -> str:
+    return cache_key(text, src_code, tgt_code, "text")
+
+def speech_key(text: str, lang_code: str, response_format: str = "mp3") -> str:
+    return cache_key(text, lang_code, lang_code, f"speech:{response_format}")
+
+# ======================
+# RESPONSE PARSING
+# ======================
+def extract_translations(response, expected: int) -> List[str]:
+    """
+    Pull the translated sentences out of a Dwani translate response.
+
+    Args:
+        response: Raw JSON returned by the translate endpoint
+        expected: Number of sentences that were sent
+
+    Returns:
+        list: One translated string per input sentence
+    """
+    translations = None
+    if isinstance(response, dict):
+        if isinstance(response.get("translations"), list):
+            translations = response["translations"]
+        elif "translation" in response:
+            translations = [response["translation"]]
+    elif isinstance(response, list):
+        translations = response
+    elif isinstance(response, str):
+        translations = [response]
+
+    if not translations or len(translations) != expected or not all(translations):
+        raise ValueError(f"Invalid translation response format: {response!r}")
+    return translations
+
+# ======================
+# MICRO-BATCHING
+# ======================
+class TranslationBatcher:
+    """
+    Coalesces concurrent translation requests into batched API calls.
+
+    Requests for the same (src, tgt) pair that arrive within ``window_ms``
+    of the first one are sent together as one ``sentences`` list, with
+    duplicate texts sent once. A batch is flushed early when it reaches
+    ``max_batch`` distinct sentences.
+
+    Batches are sent on the shared Dwani event loop, so any number can be in
+    flight without tying up threads; concurrency is bounded by the translate
+    endpoint limit of the async client.
+    """
+
+    def __init__(self, window_ms: int = 50, max_batch: int = 32):
+        self.window = window_ms / 1000.0
+        self.max_batch = max_batch
+        self._pending: Dict[Tuple[str, str], Dict[str, List[Future]]] = {}
+        self._deadlines: Dict[Tuple[str, str], float] = {}
+        # Most urgent caller in each pending batch; the batch waits for a rate limit token at that priority
+        self._priorities: Dict[Tuple[str, str], int] = {}
+        self._cond = threading.Condition()
+        self.stats = {"requests": 0, "api_calls": 0, "sentences_sent": 0}
+        threading.Thread(target=self._run_dispatcher, name="translate-dispatcher", daemon=True).start()
+
+    def submit(self, text: str, src_code: str, tgt_code: str) -> Future:
+        """Queue a translation and return a Future resolving to the translated text"""
+        future = Future()
+        key = (src_code, tgt_code)
+        with self._cond:
+            self.stats["requests"] += 1
+            batch = self._pending.setdefault(key, {})
+            if not batch:
+                self._deadlines[key] = time.monotonic() + self.window
+            priority = current_priority()
+            self._priorities[key] = min(self._priorities.get(key, priority), priority)
+            batch.setdefault(text, []).append(future)
+            if len(batch) >= self.max_batch:
+                self._deadlines[key] = 0
+            self._cond.notify()
+        return future
+
+    def translate(self, text: str, src_code: str, tgt_code: str, timeout: float = None) -> str:
+        """Translate a single text, sharing an API call with concurrent requests"""
+        return self.submit(text, src_code, tgt_code).result(timeout)
+
+    def _run_dispatcher(self) -> None:
+        while True:
+            with self._cond:
+                while not self._deadlines:
+                    self._cond.wait()
+                now = time.monotonic()
+                due = [key for key, deadline in self._deadlines.items() if deadline <= now]
+                if not due:
+                    self._cond.wait(min(self._deadlines.values()) - now)
+                    continue
+                batches = []
+                for key in due:
+                    del self._deadlines[key]
+                    batches.append((key, self._pending.pop(key), self._priorities.pop(key)))
+            for key, batch, priority in batches:
+                submit_async(self._send_batch(key, batch, priority))
+
+    async def _send_batch(self, key: Tuple[str, str], batch: Dict[str, List[Future]], priority: int) -> None:
+        src_code, tgt_code = key
+        texts = list(batch)
+        try:
+            with request_priority(priority):
+                response = await get_async_client().translate(texts, src_code, tgt_code)
+            translations = extract_translations(response, len(texts))
+        except Exception as e:
+            for futures in batch.values():
+                for future in futures:
+                    future.set_exception(e)
+            return
+        finally:
+            with self._cond:
+                self.stats["api_calls"] += 1
+                self.stats["sentences_sent"] += len(texts)
+
+        for text, translated in zip(texts, translations):
+            for future in batch[text]:
+                future.set_result(translated)
+
+# ======================
+# SDK SPEECH ADAPTER
+# ======================
+# Keyword forms of dwani.Audio.speech seen across SDK releases, as (text, format) argument names
+SPEECH_SIGNATURES = [
+    ("input", "response_format"),
+    ("text", "response_format"),
+    ("input", "format"),
+    ("text", "format")
+]
+
+class SpeechAdapter:
+    """
+    Calls dwani.Audio.speech with the keyword form the installed SDK accepts.
+
+    The module-level wrapper only takes ``*args, **kwargs``, so the form is
+    read from the signature of DhwaniClient.speech and tried first; only if
+    it is inconclusive or rejected with a TypeError does the first synthesis
+    try the other forms. The working form is remembered for the process,
+    so every later synthesis is exactly one call; a TypeError from the
+    remembered form (the SDK changed under us) negotiates again once.
+    """
+
+    def __init__(self):
+        self._signature: Optional[Tuple[str, str]] = None
+        self._lock = threading.Lock()
+
+    @property
+    def signature(self) -> Optional[Tuple[str, str]]:
+        """The negotiated (text, format) argument names, or None before negotiation"""
+        return self._signature
+
+    @staticmethod
+    def _inspect_signature() -> Optional[Tuple[str, str]]:
+        try:
+            params = inspect.signature(dwani.DhwaniClient.speech).parameters
+        except (AttributeError, TypeError, ValueError):
+            return None
+        for text_arg, format_arg in SPEECH_SIGNATURES:
+            if text_arg in params and format_arg in params:
+                return text_arg, format_arg
+        return None
+
+    def _negotiate(self, text: str, response_format: str) -> bytes:
+        with self._lock:
+            signature = self._signature
+            if signature is None:
+                return self._negotiate_locked(text, response_format)
+        # Another thread negotiated while this one waited
+        return self._call(signature, text, response_format)
+
+    def _negotiate_locked(self, text: str, response_format: str) -> bytes:
+        # The inspected form is tried first, so it normally settles the question in one call
+        inspected = self._inspect_signature()
+        candidates = [inspected] if inspected else []
+        candidates += [signature for signature in SPEECH_SIGNATURES if signature != inspected]
+        for signature in candidates:
+            try:
+                audio = self._call(signature, text, response_format)
+            except TypeError:
+                continue
+            self._signature = signature
+            logger.info(f"Dwani speech signature: {signature[0]}=, {signature[1]}=")
+            return audio
+        raise TypeError("dwani.Audio.speech accepts none of the known keyword forms")
+
+    @staticmethod
+    def _call(signature: Tuple[str, str], text: str, response_format: str) -> bytes:
+        text_arg, format_arg = signature
+        return dwani.Audio.speech(**{text_arg: text, format_arg: response_format})
+
+    def synthesize(self, text: str, response_format: str = "mp3") -> bytes:
+        signature = self._signature
+        if signature is None:
+            return self._negotiate(text, response_format)
+        try:
+            return self._call(signature, text, response_format)
+        except TypeError:
+            logger.warning("Dwani speech signature changed; negotiating again")
+            with self._lock:
+                if self._signature == signature:
+                    self._signature = None
+            return self._negotiate(text, response_format)
+
+_speech_adapter = SpeechAdapter()
+
+def synthesize(text: str, response_format: str = "mp3") -> bytes:
+    """
+    Synthesize speech through the synchronous Dwani SDK, bypassing the caches.
+
+    Shares the speech endpoint's circuit breaker and rate limiter with the
+    async client, so the call waits for a token at the current priority.
+
+    Args:
+        text: Text to speak
+        response_format: Audio format requested from Dwani
+
+    Returns:
+        bytes: Encoded audio
+
+    Raises:
+        CircuitOpenError: Dwani speech is failing and the call was not sent
+        RateLimitError: No speech token could be granted in time
+        ValueError: Dwani answered with no audio
+    """
+    breaker = get_circuit_breaker("speech")
+    # Fail fast while Dwani is down instead of queueing for a token first
+    breaker.check()
+    run_async(get_async_client().acquire_token("speech"))
+    probe = breaker.before_call()
+    try:
+        audio = _speech_adapter.synthesize(text, response_format)
+    except Exception as e:
+        if is_outage(e):
+            breaker.record_failure()
+        else:
+            breaker.record_success()
+        raise
+    finally:
+        breaker.release(probe)
+    breaker.record_success()
+    if not audio or not isinstance(audio, (bytes, bytearray)):
+        raise ValueError("Dwani returned no audio")
+    return bytes(audio)
+
+# ======================
+# MODULE-LEVEL CLIENT
+# ======================
+_batcher = None
+_batcher_lock = threading.Lock()
+
+def get_translation_batcher() -> TranslationBatcher:
+    """Process-wide translation batcher shared by every call site"""
+    global _batcher
+    with _batcher_lock:
+        if _batcher is None:
+            _batcher = TranslationBatcher(**_load_config_section("translation_batch", DEFAULT_BATCH_CONFIG))
+        return _batcher
+
+def translate(text: str, src_code: str, tgt_code: str, timeout: float = None) -> str:
+    """
+    Translate text, served from the translation cache when possible.
+
+    Cache misses go through the shared batcher.
+
+    Args:
+        text: Text to translate
+        src_code: Source language code (e.g. eng_Latn)
+        tgt_code: Target language code (e.g. kan_Knda)
+        timeout: Seconds to wait for the batched call
+
+    Returns:
+        str: The translated text
+    """
+    return translation_cache.get_or_compute(
+        translation_key(text, src_code, tgt_code),
+        lambda: get_translation_batcher().translate(text, src_code, tgt_code, timeout)
+    )
+
+async def translate_async(text: str, src_code: str, tgt_code: str) -> str:
+    """Coroutine version of translate() for code running on the Dwani event loop"""
+    key = translation_key(text, src_code, tgt_code)
+    translated = translation_cache.get(key)
+    if translated is None:
+        translated = await asyncio.wrap_future(get_translation_batcher().submit(text, src_code, tgt_code))
+        translation_cache.set(key, translated)
+    return translated
+
+# ======================
+# SENTENCE CHUNKING
+# ======================
+_chunking = _load_config_section("tts_chunking", DEFAULT_CHUNKING_CONFIG)
+
+def speech_chunks(text: str, lang_code: str, response_format: str = "mp3") -> List[str]:
+    """
+    Pieces a text is synthesized in: its sentence chunks for long MP3
+    announcements, otherwise the whole text.
+    """
+    if not _chunking["enabled"] or response_format != "mp3" or len(text) < _chunking["min_text_chars"]:
+        return [text]
+    return chunk_text(text, lang_code, _chunking["min_chunk_chars"], _chunking["max_chunk_chars"]) or [text]
+
+async def _synthesize_async(text: str, lang_code: str, response_format: str) -> bytes:
+    chunks = speech_chunks(text, lang_code, response_format)
+    if len(chunks) > 1:
+        # Sentences are cached on their own, so a failed one is all a retry re-synthesizes
+        # and sentences shared between announcements are synthesized once
+        limit = asyncio.Semaphore(_chunking["max_parallel"])
+
+        async def part(chunk: str) -> bytes:
+            async with limit:
+                return await speech_async(chunk, lang_code, response_format)
+
+        parts = await asyncio.gather(*(part(chunk) for chunk in chunks))
+        return join_mp3(parts)
+    response = await get_async_client().speech(text, response_format)
+    if not response:
+        raise ValueError(f"Audio generation failed for {lang_code}")
+    return response
+
+def _synthesizer(text: str, lang_code: str, response_format: str):
+    def synthesize() -> bytes:
+        return run_async(_synthesize_async(text, lang_code, response_format))
+    return synthesize
+
+def speech(text: str, lang_code: str, response_format: str = "mp3") -> bytes:
+    """
+    Synthesize speech for already translated text, served from the TTS cache when possible.
+
+    Args:
+        text: Text to speak
+        lang_code: Language code of the text (part of the cache key)
+        response_format: Audio format requested from Dwani
+
+    Returns:
+        bytes: Encoded audio
+    """
+    return tts_cache.get_or_compute(
+        speech_key(text, lang_code, response_format),
+        _synthesizer(text, lang_code, response_format)
+    )
+
+async def speech_async(text: str, lang_code: str, response_format: str = "mp3") -> bytes:
+    """Coroutine version of speech() for code running on the Dwani event loop"""
+    key = speech_key(text, lang_code, response_format)
+    audio = tts_cache.get(key)
+    if audio is None:
+        audio = await _synthesize_async(text, lang_code, response_format)
+        tts_cache.set(key, audio)
+    return audio
+
+def speech_file(text: str, lang_code: str, response_format: str = "mp3") -> str:
+    """
+    Path of the canonical audio blob for a text, synthesizing it only if missing.
+
+    Repeat announcements resolve to the same file with no TTS call and no write.
+    """
+    return tts_cache.ensure_file(
+        speech_key(text, lang_code, response_format),
+        _synthesizer(text, lang_code, response_format)
+    )
+
+def stream_speech(text: str, response_format: str = "mp3", chunk_size: int = 8192) -> Iterator[bytes]:
+    """
+    Yield encoded audio chunks as Dwani produces them.
+
+    The response is read on the Dwani event loop and handed over through a
+    queue, so the caller only blocks on chunks that have not arrived yet.
+    """
+    chunks = queue.Queue()
+
+    async def pump() -> None:
+        try:
+            async for chunk in get_async_client().stream_speech(text, response_format, chunk_size):
+                if chunk:
+                    chunks.put(chunk)
+        except Exception as e:
+            chunks.put(e)
+            return
+        chunks.put(None)
+
+    submit_async(pump())
+    while True:
+        item = chunks.get()
+        if item is None:
+            return
+        if isinstance(item, Exception):
+            raise item
+        yield item
+
+def transcribe(audio: bytes, language: str, timeout: float = None) -> dict:
+    """
+    Transcribe recorded audio held in memory.
+
+    Args:
+        audio: Encoded audio bytes
+        language: Language name (e.g. "kannada")
+        timeout: Seconds to wait for the ASR call
+
+    Returns:
+        dict: Raw ASR response
+    """
+    return run_async(get_async_client().transcribe(audio, language), timeout)
+
+def get_cache_stats() -> dict:
+    return {
+        "translation": translation_cache.get_stats(),
+        "tts": tts_cache.get_stats()
+    }
+
+def get_io_stats() -> dict:
+    """Per-endpoint request counters of the async Dwani client"""
+    return get_async_client().get_stats()
@@ -0,0 +1,343 @@
+import os
+import json
+import time
+import uuid
+import sqlite3
+import logging
+import threading
+from concurrent.futures import Future
+from typing import Dict, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_JOURNAL_CONFIG = {
+    "path": "cache/job_journal.db",
+    # Writes arriving within this window share one transaction (and one fsync)
+    "commit_interval_ms": 5,
+    "max_batch": 256,
+    "retain_finished_hours": 24
+}
+
+def _load_journal_config(config_path: str = 'config/system_config.json') -> dict:
+    values = dict(DEFAULT_JOURNAL_CONFIG)
+    try:
+        with open(config_path) as f:
+            values.update(json.load(f).get("job_journal", {}))
+    except (FileNotFoundError, json.JSONDecodeError):
+        pass
+    return values
+
+# ======================
+# JOB JOURNAL
+# ======================
+class JobJournal:
+    """
+    Durable, priority-aware journal of queued announcement jobs in SQLite.
+
+    A job is journaled before it is handed to the in-memory queue, and
+    each language result is recorded as it completes, so after a crash or
+    restart pending() returns every unfinished job in priority order along
+    with the languages it already finished.
+
+    Whoever processes a job holds a lease on it: the process that
+    enqueued it (``owner``), a process replaying it after a restart, or a
+    worker process (see announcement_worker.py), all through lease(). The
+    holder keeps it with renew() and acknowledges it with finish(). A job
+    whose holder died becomes available again once its lease expires, and
+    no two processes ever run it at the same time.
+
+    All writes go through one writer thread that groups whatever arrives
+    within ``commit_interval_ms`` (up to ``max_batch`` writes) into a
+    single transaction. The database runs in WAL mode with
+    ``synchronous=FULL``, so every commit is durable but its fsync is paid
+    once per batch rather than once per write.
+    """
+
+    def __init__(self, path: str, commit_interval_ms: float = 5, max_batch: int = 256,
+                 retain_finished_hours: float = 24):
+        """
+        Args:
+            path: SQLite database file
+            commit_interval_ms: How long the writer waits for more writes to join a commit
+            max_batch: Most writes per commit
+            retain_finished_hours: Finished jobs older than this are pruned on startup
+        """
+        self.path = path
+        self.commit_interval = commit_interval_ms / 1000.0
+        self.max_batch = max_batch
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self._read_lock = threading.Lock()
+        self._conn = self._connect()
+        self._conn.executescript("""
+            CREATE TABLE IF NOT EXISTS jobs (
+                id TEXT PRIMARY KEY,
+                priority INTEGER NOT NULL,
+                seq INTEGER NOT NULL,
+                payload TEXT NOT NULL,
+                status TEXT NOT NULL DEFAULT 'queued',
+                record_id TEXT,
+                enqueued_at REAL NOT NULL,
+                finished_at REAL
+            );
+            CREATE INDEX IF NOT EXISTS idx_jobs_pending ON jobs(status, priority, seq);
+            CREATE TABLE IF NOT EXISTS job_languages (
+                job_id TEXT NOT NULL,
+                lang TEXT NOT NULL,
+                result TEXT NOT NULL,
+                PRIMARY KEY (job_id, lang)
+            );
+        """)
+        columns = [row[1] for row in self._conn.execute("PRAGMA table_info(jobs)")]
+        if 'lease_owner' not in columns:
+            self._conn.execute("ALTER TABLE jobs ADD COLUMN lease_owner TEXT")
+        if 'lease_expires' not in columns:
+            self._conn.execute("ALTER TABLE jobs ADD COLUMN lease_expires REAL")
+        self._conn.commit()
+        self._pending_writes: List[Tuple[str, tuple, Future]] = []
+        self._cond = threading.Condition()
+        self._closed = False
+        self.stats = {"writes": 0, "commits": 0}
+        self.prune(retain_finished_hours * 3600)
+        self._writer = threading.Thread(target=self._run_writer, name="job-journal-writer", daemon=True)
+        self._writer.start()
+
+    def _connect(self) -> sqlite3.Connection:
+        conn = sqlite3.connect(self.path, check_same_thread=False, timeout=30)
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=FULL")
+        return conn
+
+    # ---- group commit ----
+    def _write(self, sql: str, params: tuple) -> Future:
+        """Queue a statement for the next commit; the future resolves to the number of rows it changed"""
+        future = Future()
+        with self._cond:
+            if self._closed:
+                raise RuntimeError("Job journal is closed")
+            self._pending_writes.append((sql, params, future))
+            self._cond.notify()
+        return future
+
+    def _run_writer(self) -> None:
+        conn = self._connect()
+        while True:
+            with self._cond:
+                while not self._pending_writes and not self._closed:
+                    self._cond.wait()
+                if not self._pending_writes and self._closed:
+                    break
+            # Let concurrent writers join this commit
+            time.sleep(self.commit_interval)
+            with self._cond:
+                batch = self._pending_writes[:self.max_batch]
+                del self._pending_writes[:self.max_batch]
+            try:
+                with conn:
+                    rowcounts = [conn.execute(sql, params).rowcount for sql, params, _ in batch]
+            except Exception as e:
+                logger.error(f"Job journal commit failed: {str(e)}")
+                for _, _, future in batch:
+                    future.set_exception(e)
+                continue
+            self.stats["writes"] += len(batch)
+            self.stats["commits"] += 1
+            for (_, _, future), rowcount in zip(batch, rowcounts):
+                future.set_result(rowcount)
+        conn.close()
+
+    # ---- writes ----
+    def enqueue(self, priority: int, payload: dict, durable: bool = True, owner: str = None,
+                lease_seconds: float = 60) -> str:
+        """
+        Journal a new job.
+
+        Args:
+            priority: PriorityLevel value (lower runs first on replay)
+            payload: JSON-serializable description of the announcement
+            durable: Wait until the job is committed to disk
+            owner: Lease the job to this owner right away, because it processes the job itself
+            lease_seconds: Length of that lease
+
+        Returns:
+            str: The job id
+        """
+        job_id = uuid.uuid4().hex
+        now = time.time()
+        # seq is assigned inside the commit, which SQLite serializes across processes
+        future = self._write(
+            """INSERT INTO jobs (id, priority, seq, payload, enqueued_at, lease_owner, lease_expires)
+               VALUES (?, ?, (SELECT COALESCE(MAX(seq), 0) + 1 FROM jobs), ?, ?, ?, ?)""",
+            (job_id, priority, json.dumps(payload, ensure_ascii=False), now,
+             owner, now + lease_seconds if owner else None)
+        )
+        if durable:
+            future.result()
+        return job_id
+
+    def attach_record(self, job_id: str, record_id: str) -> Future:
+        """Remember the store record of a job so a replay updates it instead of inserting another"""
+        return self._write("UPDATE jobs SET record_id = ? WHERE id = ?", (record_id, job_id))
+
+    def complete_language(self, job_id: str, lang: str, result: dict) -> Future:
+        """Record a finished language; a replay of the job skips it"""
+        return self._write(
+            "INSERT OR REPLACE INTO job_languages (job_id, lang, result) VALUES (?, ?, ?)",
+            (job_id, lang, json.dumps(result, ensure_ascii=False))
+        )
+
+    def finish(self, job_id: str, status: str = "completed", owner: str = None) -> Future:
+        """
+        Mark a job done (``completed`` or ``failed``); it is no longer replayed.
+
+        Args:
+            job_id: The job
+            status: Final status
+            owner: Only finish the job while this owner still holds its lease
+
+        Returns:
+            Future: Resolves to 1 once finished, or 0 if the job is not (or no longer) leased to ``owner``
+        """
+        sql = "UPDATE jobs SET status = ?, finished_at = ?, lease_owner = NULL, lease_expires = NULL WHERE id = ?"
+        params = (status, time.time(), job_id)
+        if owner is not None:
+            sql += " AND lease_owner = ? AND status = 'queued'"
+            params += (owner,)
+        return self._write(sql, params)
+
+    # ---- leases ----
+    def lease(self, owner: str, lease_seconds: float, limit: Optional[int] = 1, max_priority: int = None) -> List[dict]:
+        """
+        Take the most urgent unleased jobs for a worker.
+
+        Leasing is one immediate transaction, so concurrent workers in any
+        process never receive the same job while its lease is current.
+
+        Args:
+            owner: Unique worker id (e.g. host:pid)
+            lease_seconds: How long the jobs stay reserved without a renew()
+            limit: Most jobs to take (None for every free job)
+            max_priority: Only take jobs at or above this urgency (priority value at most this)
+
+        Returns:
+            list: Jobs as returned by pending()
+        """
+        now = time.time()
+        sql = """SELECT id, priority, payload, record_id, enqueued_at FROM jobs
+                 WHERE status = 'queued' AND (lease_expires IS NULL OR lease_expires < ?)"""
+        params = [now]
+        if max_priority is not None:
+            sql += " AND priority <= ?"
+            params.append(max_priority)
+        sql += " ORDER BY priority, seq"
+        if limit is not None:
+            sql += " LIMIT ?"
+            params.append(limit)
+        with self._read_lock:
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                rows = self._conn.execute(sql, params).fetchall()
+                self._conn.executemany(
+                    "UPDATE jobs SET lease_owner = ?, lease_expires = ? WHERE id = ?",
+                    [(owner, now + lease_seconds, row[0]) for row in rows]
+                )
+                self._conn.commit()
+            except Exception:
+                self._conn.rollback()
+                raise
+        return [self._job(row) for row in rows]
+
+    def renew(self, job_id: str, owner: str, lease_seconds: float) -> Future:
+        """Extend a lease held by ``owner``"""
+        return self._write(
+            "UPDATE jobs SET lease_expires = ? WHERE id = ? AND lease_owner = ? AND status = 'queued'",
+            (time.time() + lease_seconds, job_id, owner)
+        )
+
+    def release(self, job_id: str, owner: str) -> Future:
+        """Give a leased job back without finishing it, so another worker can take it right away"""
+        return self._write(
+            "UPDATE jobs SET lease_owner = NULL, lease_expires = NULL WHERE id = ? AND lease_owner = ?",
+            (job_id, owner)
+        )
+
+    def flush(self, timeout: float = None) -> None:
+        """Wait until every write submitted so far is committed"""
+        self._write("SELECT 1", ()).result(timeout)
+
+    # ---- reads ----
+    def completed_languages(self, job_id: str) -> Dict[str, dict]:
+        """Results of the languages a job has already finished"""
+        with self._read_lock:
+            rows = self._conn.execute("SELECT lang, result FROM job_languages WHERE job_id = ?", (job_id,)).fetchall()
+        return {lang: json.loads(result) for lang, result in rows}
+
+    @staticmethod
+    def _job(row: tuple) -> dict:
+        job_id, priority, payload, record_id, enqueued_at = row
+        return {"id": job_id, "priority": priority, "payload": json.loads(payload),
+                "record_id": record_id, "enqueued_at": enqueued_at}
+
+    def pending(self) -> List[dict]:
+        """
+        Unfinished jobs not currently leased by a worker, most urgent (then oldest) first.
+
+        Returns:
+            list: Dicts with id, priority, payload, record_id and enqueued_at
+        """
+        with self._read_lock:
+            rows = self._conn.execute(
+                """SELECT id, priority, payload, record_id, enqueued_at FROM jobs
+                   WHERE status = 'queued' AND (lease_expires IS NULL OR lease_expires < ?)
+                   ORDER BY priority, seq""",
+                (time.time(),)
+            ).fetchall()
+        return [self._job(row) for row in rows]
+
+    def prune(self, older_than_seconds: float) -> int:
+        """Delete finished jobs (and their language results) older than the given age"""
+        cutoff = time.time() - older_than_seconds
+        with self._read_lock, self._conn:
+            self._conn.execute(
+                "DELETE FROM job_languages WHERE job_id IN (SELECT id FROM jobs WHERE status != 'queued' AND finished_at < ?)",
+                (cutoff,)
+            )
+            cursor = self._conn.execute("DELETE FROM jobs WHERE status != 'queued' AND finished_at < ?", (cutoff,))
+        return cursor.rowcount
+
+    def get_stats(self) -> dict:
+        with self._read_lock:
+            queued, leased = self._conn.execute(
+                "SELECT COUNT(*), COUNT(lease_owner) FROM jobs WHERE status = 'queued'"
+            ).fetchone()
+        commits = self.stats["commits"]
+        return {
+            **self.stats,
+            "queued_jobs": queued,
+            "leased_jobs": leased,
+            "writes_per_commit": self.stats["writes"] / commits if commits else 0.0
+        }
+
+    def close(self) -> None:
+        """Commit outstanding writes and stop the writer"""
+        with self._cond:
+            self._closed = True
+            self._cond.notify()
+        self._writer.join(timeout=5)
+        with self._read_lock:
+            self._conn.close()
+
+# ======================
+# MODULE-LEVEL JOURNAL
+# ======================
+_journal: Optional[JobJournal] = None
+_journal_lock = threading.Lock()
+
+def get_job_journal() -> JobJournal:
+    """Process-wide job journal configured from the ``job_journal`` config section"""
+    global _journal
+    with _journal_lock:
+        if _journal is None:
+            _journal = JobJournal(**_load_journal_config())
+        return _journal
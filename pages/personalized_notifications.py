@@ -2,10 +2,9 @@ import streamlit as st
 import json
 import os
 from datetime import datetime, timedelta
-import time
 import base64
 from bhashaseva_enhanced import LANGUAGE_CODE_MAP
-from shared_state import initialize_session_state, get_announcements, cleanup_temp_files
+from shared_state import initialize_session_state, get_announcement_index, get_announcements_revision
 
 # Page configuration
 st.set_page_config(
@@ -144,8 +143,18 @@ with st.sidebar:
     auto_refresh = st.checkbox("Enable Auto-refresh", value=st.session_state.get("auto_refresh", False), key="auto_refresh")
     if auto_refresh:
         refresh_rate = st.slider("Refresh rate (seconds)", 5, 60, 15)
-        time.sleep(refresh_rate)
-        st.rerun()
+
+        # Only this fragment re-runs on the timer; the page re-renders only when the store changed
+        @st.fragment(run_every=refresh_rate)
+        def watch_announcements():
+            revision = get_announcements_revision()
+            if st.session_state.get("seen_revision") is None:
+                st.session_state.seen_revision = revision
+            elif revision != st.session_state.seen_revision:
+                st.session_state.seen_revision = revision
+                st.rerun()
+
+        watch_announcements()
 
 # Main content area
 st.title("🔔 Personalized Notifications")
@@ -246,8 +255,7 @@ def display_notification(notification):
 
 # Filter and sort announcements
 def filter_and_sort_announcements():
-    announcements = get_announcements()
-    filtered = []
+    index = get_announcement_index()
     
     # Time filter
     now = datetime.now()
@@ -258,57 +266,23 @@ def filter_and_sort_announcements():
     elif time_filter == "Last month":
         cutoff = now - timedelta(days=30)
     else:
-        cutoff = datetime.min
-    
-    # District filter
-    if "All" not in district_filter and district_filter:
-        district_filter_set = set(district_filter)
-    
-    for ann in announcements:
-        # Check timestamp
-        ann_time = ann.get('timestamp', '')
-        if isinstance(ann_time, str):
-            try:
-                ann_time = datetime.fromisoformat(ann_time)
-            except ValueError:
-                continue
-        
-        if ann_time < cutoff:
-            continue
-        
-        # Check district
-        if "All" not in district_filter and district_filter:
-            ann_districts = set(ann.get('districts', []))
-            if not ann_districts.intersection(district_filter_set):
-                continue
-        
-        # Check notification type preferences
-        ann_type = ann.get('announcement_type', 'general').lower()
-        if ('emergency' in ann_type and not st.session_state.enable_emergency):
-            continue
-        if ('health' in ann_type and not st.session_state.enable_health):
-            continue
-        if ('welfare' in ann_type and not st.session_state.enable_welfare):
-            continue
-        if (ann_type == 'general' and not st.session_state.enable_general):
-            continue
-        
-        # Check language preferences
-        if not any(lang in ann.get('target_langs', []) + [ann.get('source_lang')] 
-                  for lang in st.session_state.preferred_languages):
-            continue
-            
-        filtered.append(ann)
+        cutoff = None
     
-    # Sort announcements
-    if sort_order == "Newest first":
-        filtered.sort(key=lambda x: datetime.fromisoformat(x['timestamp']) if isinstance(x['timestamp'], str) else x['timestamp'], reverse=True)
-    elif sort_order == "Oldest first":
-        filtered.sort(key=lambda x: datetime.fromisoformat(x['timestamp']) if isinstance(x['timestamp'], str) else x['timestamp'])
-    elif sort_order == "Priority":
-        priority_order = {'emergency': 1, 'health': 2, 'welfare': 3, 'general': 4}
-        filtered.sort(key=lambda x: priority_order.get(x.get('announcement_type', 'general').lower(), 4))
+    # Notification type preferences
+    excluded_categories = [
+        category for category in ('emergency', 'health', 'welfare', 'general')
+        if not st.session_state[f"enable_{category}"]
+    ]
     
+    filtered = index.select(
+        since=cutoff,
+        districts=None if "All" in district_filter else district_filter,
+        excluded_categories=excluded_categories,
+        languages=st.session_state.preferred_languages,
+        sort_order=sort_order
+    )
+    # What this render shows; the auto-refresh fragment reruns the page once it moves on
+    st.session_state.seen_revision = index.revision
     return filtered
 
 # Display filtered notifications
@@ -333,9 +307,6 @@ else:
     </div>
     """, unsafe_allow_html=True)
 
-# Cleanup old files
-cleanup_temp_files()
-
 # Add a small footer
 st.markdown("---")
 st.markdown("""
@@ -0,0 +1,353 @@
+"""
+Pre-translated, pre-synthesized phrases for the emergency alert templates
+registered in config/emergency_protocols.json.
+
+Usage (translate and synthesize every missing phrase, offline):
+    python phrase_library.py [--languages kannada hindi ...]
+"""
+import os
+import re
+import json
+import logging
+import argparse
+import threading
+from typing import Dict, List, Optional, Tuple
+
+import dwani_client
+from dwani_client import speech_key, translation_key, translation_cache, tts_cache
+from speech_chunking import join_mp3, sentence_end
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_PHRASE_CONFIG = {
+    "directory": "cache/phrases",
+    "protocols_path": "config/emergency_protocols.json",
+    "src_lang": "english"
+}
+
+SLOT_PATTERN = re.compile(r"\{(\w+)\}")
+# Punctuation right after a slot ("{district}. Heavy rain...") is kept as written, not spoken
+JOINER_PATTERN = re.compile(r"^[.,;:!?]+")
+
+def _load_phrase_config(config_path: str = 'config/system_config.json') -> dict:
+    values = dict(DEFAULT_PHRASE_CONFIG)
+    try:
+        with open(config_path) as f:
+            values.update(json.load(f).get("phrase_library", {}))
+    except (FileNotFoundError, json.JSONDecodeError):
+        pass
+    return values
+
+def _static_parts(text: str) -> List[Tuple[str, str]]:
+    parts = []
+    text = text.strip()
+    joiner = JOINER_PATTERN.match(text)
+    if joiner:
+        parts.append(("joiner", joiner.group()))
+        text = text[joiner.end():].strip()
+    if text:
+        parts.append(("phrase", text))
+    return parts
+
+def parse_template(text: str) -> List[Tuple[str, str]]:
+    """
+    Split a template into the pieces it is composed from.
+
+    Returns:
+        list: ("phrase", text), ("slot", name) and ("joiner", punctuation) tuples in order
+    """
+    parts = []
+    position = 0
+    for match in SLOT_PATTERN.finditer(text):
+        parts.extend(_static_parts(text[position:match.start()]))
+        parts.append(("slot", match.group(1)))
+        position = match.end()
+    parts.extend(_static_parts(text[position:]))
+    return parts
+
+def _slot_values(value) -> List[str]:
+    return [value] if isinstance(value, str) else list(value)
+
+# ======================
+# PHRASE LIBRARY
+# ======================
+class PhraseLibrary:
+    """
+    Emergency templates composed from phrases translated and synthesized ahead of time.
+
+    A template such as "Emergency alert. District: {district}. ..." is
+    split into fixed phrases and slots. build() translates and synthesizes
+    every fixed phrase and every allowed slot value (the known districts,
+    plus the values a template lists for its other slots) once per
+    language, and keeps them under ``directory``, outside the audio GC.
+
+    At alert time render() composes the text and joins the MP3 phrases
+    without any API call. prime() seeds the translation and TTS caches
+    with the result, so the regular announcement pipeline serves the alert
+    from cache. Languages or slot values missing from the library fall
+    back to live translation.
+    """
+
+    def __init__(self, protocols: dict, languages: Dict[str, str], districts: List[str],
+                 directory: str = "cache/phrases", src_lang: str = "english"):
+        """
+        Args:
+            protocols: Emergency protocols by alert type, each with optional "templates"
+            languages: Language name -> Dwani language code
+            districts: Allowed values of the ``district`` slot
+            directory: Where phrase audio and the manifest are kept
+            src_lang: Language the templates are written in
+        """
+        self.languages = languages
+        self.directory = directory
+        self.src_lang = src_lang
+        self.templates: Dict[str, dict] = {}
+        for alert_type, protocol in protocols.items():
+            for template_id, template in (protocol.get("templates") or {}).items():
+                if isinstance(template, str):
+                    template = {"text": template}
+                slots = {name: _slot_values(values) for name, values in (template.get("slots") or {}).items()}
+                slots.setdefault("district", list(districts))
+                self.templates[template_id] = {
+                    "alert_type": alert_type,
+                    "text": template["text"],
+                    "parts": parse_template(template["text"]),
+                    "slots": slots
+                }
+        self.manifest_path = os.path.join(directory, "manifest.json")
+        # language -> {source phrase: {"text": translated phrase, "audio": path relative to directory}}
+        self._manifest: Dict[str, Dict[str, dict]] = self._load_manifest()
+        self._audio: Dict[str, bytes] = {}
+        self._lock = threading.Lock()
+        self.stats = {"rendered": 0, "missing": 0}
+
+    def _load_manifest(self) -> Dict[str, Dict[str, dict]]:
+        try:
+            with open(self.manifest_path, encoding="utf-8") as f:
+                return json.load(f)
+        except (FileNotFoundError, json.JSONDecodeError):
+            return {}
+
+    def _save_manifest(self) -> None:
+        os.makedirs(self.directory, exist_ok=True)
+        tmp_path = f"{self.manifest_path}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(self._manifest, f, ensure_ascii=False, indent=2)
+        os.replace(tmp_path, self.manifest_path)
+
+    def phrases(self) -> List[str]:
+        """Every source phrase the registered templates are composed from"""
+        phrases = []
+        for template in self.templates.values():
+            for kind, value in template["parts"]:
+                if kind == "phrase":
+                    phrases.append(value)
+                elif kind == "slot":
+                    phrases.extend(template["slots"].get(value, []))
+        return list(dict.fromkeys(phrases))
+
+    # ---- offline build ----
+    def build(self, languages: List[str] = None) -> dict:
+        """
+        Translate and synthesize every phrase not yet in the library.
+
+        The manifest is saved after each language, so an interrupted build
+        resumes where it stopped.
+
+        Args:
+            languages: Language names to build (default: every known language)
+
+        Returns:
+            dict: Counts of built, existing and failed phrases
+        """
+        src_code = self.languages[self.src_lang]
+        phrases = self.phrases()
+        report = {"built": 0, "existing": 0, "failed": 0}
+        for lang in languages or list(self.languages):
+            lang_code = self.languages[lang]
+            entries = self._manifest.setdefault(lang, {})
+            for phrase in phrases:
+                entry = entries.get(phrase)
+                if entry and os.path.exists(os.path.join(self.directory, entry["audio"])):
+                    report["existing"] += 1
+                    continue
+                try:
+                    translated = phrase if lang == self.src_lang else dwani_client.translate(phrase, src_code, lang_code)
+                    audio = dwani_client.speech(translated, lang_code)
+                except Exception as e:
+                    logger.error(f"Could not build {lang} phrase '{phrase}': {str(e)}")
+                    report["failed"] += 1
+                    continue
+                relative_path = os.path.join(lang_code, f"{speech_key(translated, lang_code)}.mp3")
+                path = os.path.join(self.directory, relative_path)
+                os.makedirs(os.path.dirname(path), exist_ok=True)
+                with open(f"{path}.tmp", "wb") as f:
+                    f.write(audio)
+                os.replace(f"{path}.tmp", path)
+                entries[phrase] = {"text": translated, "audio": relative_path}
+                report["built"] += 1
+            self._save_manifest()
+            logger.info(f"Phrase library ready for {lang}")
+        return report
+
+    # ---- alert time ----
+    def fill(self, template_id: str, slots: dict) -> str:
+        """
+        Source-language text of a template with its slots filled.
+
+        Raises:
+            KeyError: Unknown template
+            ValueError: A slot of the template has no value
+        """
+        template = self.templates[template_id]
+
+        def value(match) -> str:
+            name = match.group(1)
+            if not slots.get(name):
+                raise ValueError(f"Template {template_id} needs a value for {{{name}}}")
+            return ", ".join(_slot_values(slots[name]))
+
+        return SLOT_PATTERN.sub(value, template["text"])
+
+    def _count(self, name: str) -> None:
+        with self._lock:
+            self.stats[name] += 1
+
+    def _load_audio(self, relative_path: str) -> bytes:
+        with self._lock:
+            audio = self._audio.get(relative_path)
+        if audio is None:
+            with open(os.path.join(self.directory, relative_path), "rb") as f:
+                audio = f.read()
+            with self._lock:
+                self._audio[relative_path] = audio
+        return audio
+
+    def preload(self) -> int:
+        """Read every built phrase's audio into memory; returns how many are loaded"""
+        loaded = 0
+        for entries in list(self._manifest.values()):
+            for entry in list(entries.values()):
+                try:
+                    self._load_audio(entry["audio"])
+                except OSError:
+                    continue
+                loaded += 1
+        return loaded
+
+    def render(self, template_id: str, lang: str, slots: dict) -> Optional[Tuple[str, bytes]]:
+        """
+        Compose a filled template in one language from pre-built phrases.
+
+        Args:
+            template_id: Registered template
+            lang: Target language name
+            slots: Slot values; a list (e.g. several districts) is read out as an enumeration
+
+        Returns:
+            tuple: (translated text, MP3 audio), or None if a phrase is not in the library
+        """
+        template = self.templates[template_id]
+        entries = self._manifest.get(lang, {})
+        full_stop = sentence_end(self.languages.get(lang))
+        texts: List[str] = []
+        audio: List[bytes] = []
+        try:
+            for kind, value in template["parts"]:
+                if kind == "joiner":
+                    if texts:
+                        texts[-1] += value.replace(".", full_stop)
+                    continue
+                phrases = [value] if kind == "phrase" else _slot_values(slots.get(value) or [])
+                for i, phrase in enumerate(phrases):
+                    entry = entries.get(phrase)
+                    if entry is None:
+                        self._count("missing")
+                        return None
+                    texts.append(entry["text"] + ("," if i < len(phrases) - 1 else ""))
+                    audio.append(self._load_audio(entry["audio"]))
+        except OSError:
+            self._count("missing")
+            return None
+        self._count("rendered")
+        return " ".join(texts), join_mp3(audio)
+
+    def prime(self, template_id: str, slots: dict, languages: List[str]) -> Tuple[str, List[str]]:
+        """
+        Fill a template and seed the caches with its composed languages.
+
+        Afterwards translating the returned text into those languages, and
+        synthesizing the result, are cache hits.
+
+        Returns:
+            tuple: (source text to announce, languages served from the library)
+        """
+        message = self.fill(template_id, slots)
+        src_code = self.languages[self.src_lang]
+        served = []
+        for lang in languages:
+            rendered = self.render(template_id, lang, slots)
+            if rendered is None:
+                continue
+            text, audio = rendered
+            lang_code = self.languages[lang]
+            translation_cache.set(translation_key(message, src_code, lang_code), text)
+            tts_cache.set(speech_key(text, lang_code), audio)
+            served.append(lang)
+        return message, served
+
+    def get_stats(self) -> dict:
+        with self._lock:
+            stats = dict(self.stats)
+        return {
+            **stats,
+            "templates": len(self.templates),
+            "languages": {lang: len(entries) for lang, entries in self._manifest.items()},
+            "phrases": len(self.phrases())
+        }
+
+# ======================
+# MODULE-LEVEL LIBRARY
+# ======================
+_library: Optional[PhraseLibrary] = None
+_library_lock = threading.Lock()
+
+def get_phrase_library() -> PhraseLibrary:
+    """Process-wide phrase library configured from the ``phrase_library`` config section"""
+    global _library
+    # Imported here because bhashaseva_enhanced itself uses the library
+    from bhashaseva_enhanced import DISTRICT_LANGUAGE_MAPPING, LANGUAGE_CODE_MAP
+
+    with _library_lock:
+        if _library is None:
+            config = _load_phrase_config()
+            try:
+                with open(config["protocols_path"], encoding="utf-8") as f:
+                    protocols = json.load(f)
+            except (FileNotFoundError, json.JSONDecodeError):
+                logger.warning("Emergency protocols not found, phrase library is empty")
+                protocols = {}
+            _library = PhraseLibrary(
+                protocols, LANGUAGE_CODE_MAP, list(DISTRICT_LANGUAGE_MAPPING),
+                directory=config["directory"], src_lang=config["src_lang"]
+            )
+        return _library
+
+def main() -> None:
+    import dwani
+    from dotenv import load_dotenv
+
+    parser = argparse.ArgumentParser(description="Translate and synthesize the emergency template phrases")
+    parser.add_argument("--languages", nargs="*", help="Language names to build (default: all)")
+    args = parser.parse_args()
+
+    load_dotenv()
+    dwani.api_key = os.getenv("DWANI_API_KEY")
+    dwani.api_base = os.getenv("DWANI_API_BASE_URL")
+    library = get_phrase_library()
+    print(f"Building {len(library.phrases())} phrases for {len(args.languages or library.languages)} languages...")
+    print(json.dumps(library.build(args.languages), indent=2))
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO)
+    main()
@@ -1,9 +1,22 @@
-import app
 import time
 import json
 import os
+import dwani
+import aiohttp
+import requests
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from datetime import datetime
-from shared_state import save_announcement, add_audio_path
+from dotenv import load_dotenv
+from announcement_store import get_announcement_store
+from dwani_client import translate, speech_file
+from rate_limiter import RateLimitError, request_priority
+
+# Load environment variables from .env file
+load_dotenv()
+
+# Set API key and base URL
+dwani.api_key = os.getenv("DWANI_API_KEY")
+dwani.api_base = os.getenv("DWANI_API_BASE_URL")
 
 LANGUAGE_CODE_MAP = {
     "kannada": "kan_Knda",
@@ -21,17 +34,57 @@ ANNOUNCEMENT_TYPES = {
     "general": 3
 }
 
-def announce_in_languages(text, src_lang="english", target_langs=None, announcement_type="general", max_retries=3, retry_delay=5):
+# Upper bound on languages processed at once; the Dwani client limits actual API concurrency
+MAX_LANGUAGE_WORKERS = 5
+
+# Transient failures worth another attempt; aiohttp's connection errors are not ConnectionError subclasses
+RETRYABLE_ERRORS = (RateLimitError, ConnectionError, aiohttp.ClientConnectionError,
+                    requests.exceptions.ConnectionError)
+
+def process_language(text, src_lang, lang, priority, max_retries=3, retry_delay=5):
+    """
+    Translate and synthesize one language, retrying rate limit and connection errors.
+
+    Returns:
+        tuple: (translated text, audio path)
+    """
+    tgt_lang_code = LANGUAGE_CODE_MAP.get(lang, lang)
+    retries = 0
+    # Worker threads do not inherit the caller's context, so tag the Dwani calls here
+    with request_priority(priority):
+        while True:
+            try:
+                translated_text = translate(text, LANGUAGE_CODE_MAP[src_lang], tgt_lang_code)
+                # Reuses the canonical blob for repeated text
+                return translated_text, speech_file(translated_text, tgt_lang_code)
+            except Exception as e:
+                error_msg = str(e)
+                retryable = isinstance(e, RETRYABLE_ERRORS)
+                retries += 1
+                if not retryable or retries > max_retries:
+                    raise
+                # The rate limiter reports exactly when the next call can go out
+                delay = e.retry_after if isinstance(e, RateLimitError) else retry_delay * 2 ** (retries - 1)
+                print(f"[{lang}] {error_msg}. Retrying in {delay:.1f} seconds... (Attempt {retries}/{max_retries})")
+                time.sleep(delay)
+
+def announce_in_languages(text, src_lang="english", target_langs=None, announcement_type="general", max_retries=3,
+                          retry_delay=5, max_workers=MAX_LANGUAGE_WORKERS):
     """
     Translate and generate speech for the given text in multiple target languages.
     
+    Languages are processed concurrently, each translation and synthesis
+    happening exactly once. The stored announcement is updated and progress
+    printed as each language finishes.
+    
     Args:
         text (str): The text to translate and speak.
         src_lang (str): Source language of the text.
         target_langs (list): List of target languages to translate and generate speech.
         announcement_type (str): Type of announcement (emergency/health/general).
         max_retries (int): Number of retries for rate limit or connection errors.
-        retry_delay (int): Delay in seconds between retries.
+        retry_delay (int): Initial delay in seconds between connection retries (doubled each attempt).
+        max_workers (int): Number of languages processed at once.
     
     Returns:
         dict: Announcement data including translations and audio paths
@@ -52,67 +105,37 @@ def announce_in_languages(text, src_lang="english", target_langs=None, announcem
     }
 
     # Save announcement first to get it in the system
-    save_announcement(announcement_data)
+    store = get_announcement_store()
+    announcement_data["id"] = store.insert(announcement_data)["id"]
 
-    audio_dir = "audio_cache"
-    os.makedirs(audio_dir, exist_ok=True)
-
-    for lang in target_langs:
-        print(f"\nProcessing announcement in {lang}...")
-        tgt_lang_code = LANGUAGE_CODE_MAP.get(lang, lang)
-        retries = 0
-        
-        while retries <= max_retries:
+    # Dwani calls wait for rate limit tokens at this announcement type's priority
+    priority = ANNOUNCEMENT_TYPES.get(announcement_type, 3)
+    errors = {}
+    print(f"\nProcessing announcement in {len(target_langs)} languages: {', '.join(target_langs)}")
+    with ThreadPoolExecutor(max_workers=max(1, min(max_workers, len(target_langs))), thread_name_prefix="announce") as pool:
+        futures = {
+            pool.submit(process_language, text, src_lang, lang, priority, max_retries, retry_delay): lang
+            for lang in target_langs
+        }
+        for done, future in enumerate(as_completed(futures), start=1):
+            lang = futures[future]
             try:
-                # First translate the text
-                translation = app.dwani.Translate.run_translate(
-                    sentences=[text],
-                    src_lang=LANGUAGE_CODE_MAP[src_lang],
-                    tgt_lang=tgt_lang_code
-                )
-                
-                if translation and isinstance(translation, dict) and "translations" in translation:
-                    translated_text = translation["translations"][0]
-                    announcement_data["translations"][lang] = translated_text
-                    
-                    # Then generate audio
-                    audio_data = app.dwani.Audio.speech(
-                        input=translated_text,
-                        response_format="mp3"
-                    )
-                    
-                    if audio_data:
-                        # Save audio file
-                        audio_path = os.path.join(audio_dir, f"announcement_{announcement_data['timestamp']}_{lang}.mp3")
-                        with open(audio_path, "wb") as f:
-                            f.write(audio_data)
-                            
-                        # Update audio path in announcement
-                        announcement_data["audio_paths"][lang] = audio_path
-                        add_audio_path(announcement_data["timestamp"], lang, audio_path)
-                        
-                        print(f"✓ Successfully processed {lang} translation and audio")
-                        break  # success, exit retry loop
-                        
+                translated_text, audio_path = future.result()
             except Exception as e:
-                error_msg = str(e)
-                if "Rate limit exceeded" in error_msg or "ConnectionResetError" in error_msg:
-                    retries += 1
-                    if retries > max_retries:
-                        print(f"Failed after {max_retries} retries: {error_msg}")
-                        announcement_data["errors"] = announcement_data.get("errors", {})
-                        announcement_data["errors"][lang] = error_msg
-                        break
-                    print(f"Error: {error_msg}. Retrying in {retry_delay} seconds... (Attempt {retries}/{max_retries})")
-                    time.sleep(retry_delay)
-                else:
-                    print(f"Error in Translate and Speech module: {error_msg}")
-                    announcement_data["errors"] = announcement_data.get("errors", {})
-                    announcement_data["errors"][lang] = error_msg
-                    break
-    
-    # Save final announcement state
-    save_announcement(announcement_data)
+                errors[lang] = str(e)
+                print(f"[{done}/{len(futures)}] ✗ {lang}: {str(e)}")
+                continue
+            announcement_data["translations"][lang] = translated_text
+            announcement_data["audio_paths"][lang] = audio_path
+            store.update(announcement_data["id"], {
+                "translations": dict(announcement_data["translations"]),
+                "audio_paths": dict(announcement_data["audio_paths"])
+            })
+            print(f"[{done}/{len(futures)}] ✓ {lang} translation and audio")
+
+    if errors:
+        announcement_data["errors"] = errors
+        store.update(announcement_data["id"], {"errors": errors})
     return announcement_data
 
 def make_announcement(text, announcement_type="general", src_lang="english", target_langs=None):
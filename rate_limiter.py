@@ -0,0 +1,198 @@
+import os
+import json
+import time
+import heapq
+import asyncio
+import itertools
+import contextvars
+from contextlib import contextmanager
+from typing import Optional
+
+from file_lock import FileLock
+
+# Priority of calls made outside any announcement (console translations, previews);
+# they rank alongside welfare schemes, ahead of queued general announcements
+DEFAULT_PRIORITY = 3
+
+_priority = contextvars.ContextVar("dwani_request_priority", default=DEFAULT_PRIORITY)
+
+def current_priority() -> int:
+    return _priority.get()
+
+@contextmanager
+def request_priority(priority: int):
+    """
+    Tag Dwani calls made in this block with a PriorityLevel value.
+
+    The value follows the calls onto the Dwani event loop, where the rate
+    limiter grants tokens to lower values (more urgent) first.
+    """
+    token = _priority.set(priority)
+    try:
+        yield
+    finally:
+        _priority.reset(token)
+
+class RateLimitError(Exception):
+    """A call could not get a token in time, or Dwani answered 429"""
+
+    def __init__(self, endpoint: str, retry_after: float):
+        super().__init__(f"Rate limit exceeded for {endpoint}; retry in {retry_after:.1f}s")
+        self.endpoint = endpoint
+        self.retry_after = retry_after
+
+# ======================
+# TOKEN BUCKET
+# ======================
+class TokenBucket:
+    """
+    Continuously refilling token bucket.
+
+    With ``state_path`` the bucket lives in a JSON file guarded by a
+    FileLock, so every process on the host (Flask, Streamlit, workers)
+    draws from the same budget. Without it the budget is per process.
+    """
+
+    def __init__(self, name: str, rate_per_minute: float, capacity: float = None, state_path: str = None):
+        """
+        Args:
+            name: Bucket name (the endpoint); also its key in the shared state file
+            rate_per_minute: Sustained number of calls allowed per minute
+            capacity: Largest burst (defaults to one minute of budget)
+            state_path: Optional JSON file shared between processes
+        """
+        self.name = name
+        self.rate = rate_per_minute / 60.0
+        self.capacity = capacity or rate_per_minute
+        self.state_path = state_path
+        self._lock = FileLock(f"{state_path}.lock") if state_path else None
+        self._state = {"tokens": self.capacity, "updated": time.time(), "blocked_until": 0.0}
+
+    def _load(self) -> dict:
+        if not self.state_path:
+            return self._state
+        try:
+            with open(self.state_path) as f:
+                return json.load(f).get(self.name) or dict(self._state)
+        except (FileNotFoundError, json.JSONDecodeError):
+            return dict(self._state)
+
+    def _save(self, state: dict) -> None:
+        if not self.state_path:
+            self._state = state
+            return
+        try:
+            with open(self.state_path) as f:
+                shared = json.load(f)
+        except (FileNotFoundError, json.JSONDecodeError):
+            shared = {}
+        shared[self.name] = state
+        tmp_path = f"{self.state_path}.tmp"
+        with open(tmp_path, "w") as f:
+            json.dump(shared, f)
+        os.replace(tmp_path, self.state_path)
+
+    def _update(self, apply):
+        if self._lock:
+            with self._lock:
+                return self._apply(apply)
+        return self._apply(apply)
+
+    def _apply(self, apply):
+        state = self._load()
+        now = time.time()
+        state["tokens"] = min(self.capacity, state["tokens"] + (now - state["updated"]) * self.rate)
+        state["updated"] = now
+        result = apply(state, now)
+        self._save(state)
+        return result
+
+    def try_take(self) -> float:
+        """Take a token if one is available; otherwise return the seconds until one will be"""
+        def take(state, now):
+            if now < state["blocked_until"]:
+                return state["blocked_until"] - now
+            if state["tokens"] >= 1:
+                state["tokens"] -= 1
+                return 0.0
+            return (1 - state["tokens"]) / self.rate
+        return self._update(take)
+
+    def wait_time(self, count: int = 1) -> float:
+        """Seconds until ``count`` tokens will have accumulated, without taking any"""
+        def peek(state, now):
+            blocked = state["blocked_until"] - now
+            if blocked > 0:
+                return blocked + (count - 1) / self.rate
+            return max(0.0, (count - state["tokens"]) / self.rate)
+        return self._update(peek)
+
+    def pause(self, seconds: float) -> None:
+        """Empty the bucket and hand out nothing for a while (after a 429 from Dwani)"""
+        def block(state, now):
+            state["tokens"] = 0.0
+            state["blocked_until"] = max(state["blocked_until"], now + seconds)
+        self._update(block)
+
+# ======================
+# PRIORITY LIMITER
+# ======================
+class PriorityRateLimiter:
+    """
+    Hands out the tokens of a bucket to waiting coroutines, most urgent first.
+
+    Waiters are kept in a heap ordered by (priority, arrival); whenever a
+    token becomes available it goes to the head of the heap, so an
+    emergency that arrives behind a backlog of general announcements is
+    served by the very next token.
+    """
+
+    def __init__(self, bucket: TokenBucket):
+        self.bucket = bucket
+        self._waiters = []
+        self._sequence = itertools.count()
+        self._dispatcher: Optional[asyncio.Task] = None
+
+    async def acquire(self, priority: int = None, max_wait: float = None) -> None:
+        """
+        Wait for a token.
+
+        Args:
+            priority: PriorityLevel value (defaults to the calling context's)
+            max_wait: Give up after this many seconds instead of sending a call that would time out anyway
+
+        Raises:
+            RateLimitError: If no token can be granted within max_wait; raised
+                right away when the queue ahead already makes that certain
+        """
+        loop = asyncio.get_running_loop()
+        granted = loop.create_future()
+        priority = current_priority() if priority is None else priority
+        if max_wait is not None:
+            ahead = sum(1 for p, _, waiter in self._waiters if p <= priority and not waiter.done())
+            estimate = self.bucket.wait_time(ahead + 1)
+            if estimate > max_wait:
+                raise RateLimitError(self.bucket.name, estimate)
+        heapq.heappush(self._waiters, (priority, next(self._sequence), granted))
+        if self._dispatcher is None or self._dispatcher.done():
+            self._dispatcher = loop.create_task(self._dispatch())
+        try:
+            await asyncio.wait_for(granted, max_wait)
+        except asyncio.TimeoutError:
+            raise RateLimitError(self.bucket.name, self.bucket.wait_time()) from None
+
+    async def _dispatch(self) -> None:
+        while self._waiters:
+            if self._waiters[0][2].done():
+                # Waiter gave up (max_wait) before its turn
+                heapq.heappop(self._waiters)
+                continue
+            wait = self.bucket.try_take()
+            if wait > 0:
+                await asyncio.sleep(wait)
+                continue
+            _, _, granted = heapq.heappop(self._waiters)
+            granted.set_result(None)
+
+    def pending(self) -> int:
+        return sum(1 for _, _, granted in self._waiters if not granted.done())
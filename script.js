@@ -113,6 +113,25 @@ testTranslationBtn.onclick = async function() {
         };
         
         // Voice recording
+        // Upload a recording for speech recognition and poll the queued job until it finishes
+        const VOICE_JOB_POLL_MS = 1000;
+        async function processVoice(formData) {
+            const response = await fetch('/api/process-voice', {
+                method: 'POST',
+                body: formData
+            });
+            let result = await response.json();
+            while (result.status === 'accepted' || result.status === 'queued' || result.status === 'running') {
+                await new Promise(resolve => setTimeout(resolve, VOICE_JOB_POLL_MS));
+                const statusResponse = await fetch(`/api/process-voice/${result.jobId}`, { cache: 'no-store' });
+                result = await statusResponse.json();
+            }
+            if (result.status !== 'success') {
+                throw new Error(result.message || 'Voice processing failed');
+            }
+            return result;
+        }
+
         let mediaRecorder;
         let audioChunks = [];
         let isRecording = false;
@@ -140,13 +159,8 @@ testTranslationBtn.onclick = async function() {
                             micBtn.innerHTML = '<i class="fas fa-spinner fa-spin"></i> Processing...';
                             micBtn.classList.add('loading');
                             
-                            const response = await fetch('/api/process-voice', {
-                                method: 'POST',
-                                body: formData
-                            });
-                            
-                            const result = await response.json();
-                            if (result.success) {
+                            const result = await processVoice(formData);
+                            if (result.status === 'success') {
                                 const audioEl = micBtn.parentElement.querySelector('audio');
                                 audioEl.src = `/announcements/${result.audioFile}`;
                                 playAudio(result.audioFile);
@@ -234,8 +248,7 @@ testTranslationBtn.onclick = async function() {
                     alert('Announcement submitted successfully!');
                     createAnnouncementForm.style.display = 'none';
                     announcementForm.reset();
-                    // Refresh the announcements list
-                    loadAnnouncements();
+                    // The new announcement and its translations arrive over the change feed
                 } else {
                     alert('Error submitting announcement: ' + result.message);
                 }
@@ -245,17 +258,62 @@ testTranslationBtn.onclick = async function() {
         });
 
         // Function to load announcements from the server
+        const ANNOUNCEMENTS_PAGE_SIZE = 100;
+        let announcementsEtag = null;
+        // Announcements currently shown, by id; kept up to date by the change feed
+        const announcementsById = new Map();
         async function loadAnnouncements() {
             try {
-                const response = await fetch('/api/announcements');
-                const announcements = await response.json();
-                renderAnnouncementsList(announcements);
+                // The server answers unchanged requests with 304 (revalidated by the browser cache)
+                const response = await fetch(`/api/announcements?limit=${ANNOUNCEMENTS_PAGE_SIZE}`, { cache: 'no-cache' });
+                const etag = response.headers.get('ETag');
+                if (etag && etag === announcementsEtag) {
+                    return;
+                }
+                const page = await response.json();
+                announcementsEtag = etag;
+                announcementsById.clear();
+                page.announcements.forEach(announcement => announcementsById.set(announcement.id, announcement));
+                renderCurrentAnnouncements();
+                subscribeToAnnouncements(page.revision);
             } catch (error) {
                 console.error('Error loading announcements:', error);
                 announcementsList.innerHTML = '<div class="no-announcements"><p>Error loading announcements</p></div>';
             }
         }
 
+        function renderCurrentAnnouncements() {
+            // Keep the list in chronological order
+            const announcements = Array.from(announcementsById.values())
+                .sort((a, b) => a.timestamp.localeCompare(b.timestamp));
+            renderAnnouncementsList(announcements);
+        }
+
+        // Server-Sent Events feed: only changes are pushed, and the browser resumes
+        // from the last event id after a reconnect
+        let announcementFeed = null;
+        function subscribeToAnnouncements(revision) {
+            if (announcementFeed) {
+                announcementFeed.close();
+            }
+            announcementFeed = new EventSource(`/api/announcements/stream?since=${revision}`);
+            const upsert = event => {
+                const announcement = JSON.parse(event.data);
+                announcementsById.set(announcement.id, announcement);
+                renderCurrentAnnouncements();
+            };
+            announcementFeed.addEventListener('created', upsert);
+            announcementFeed.addEventListener('updated', upsert);
+            announcementFeed.addEventListener('deleted', event => {
+                announcementsById.delete(JSON.parse(event.data).id);
+                renderCurrentAnnouncements();
+            });
+            announcementFeed.addEventListener('reset', () => {
+                announcementsEtag = null;
+                loadAnnouncements();
+            });
+        }
+
         // Update the renderAnnouncements function to use the server data
         function renderAnnouncementsList(announcements) {
             // Get filter values
@@ -443,7 +501,8 @@ testTranslationBtn.onclick = async function() {
                     body: JSON.stringify({
                         text: text,
                         srcLang: srcLang,
-                        tgtLang: tgtLang
+                        tgtLang: tgtLang,
+                        stream: true  // audio starts playing while it is still being synthesized
                     })
                 });                    const result = await response.json();
                     if (result.status === 'success') {
@@ -519,20 +578,15 @@ testTranslationBtn.onclick = async function() {
                             micBtn.innerHTML = '⏳ Processing...';
                             micBtn.classList.add('loading');
                             
-                            const response = await fetch('/api/process-voice', {
-                                method: 'POST',
-                                body: formData
-                            });
-                            
-                            const result = await response.json();
-                            if (result.success) {
+                            const result = await processVoice(formData);
+                            if (result.status === 'success') {
                                 // Update the translation text and audio
                                 const translationItem = micBtn.closest('.translation-item');
                                 const translationText = translationItem.querySelector('.translation-text');
                                 const audio = translationItem.querySelector('audio');
                                 
-                                translationText.textContent = result.translation;
-                                audio.src = result.audioUrl;
+                                translationText.textContent = result.text;
+                                audio.src = `/audio/${result.audioFile}`;
                                 
                                 micBtn.innerHTML = '🎤 Record';
                                 micBtn.classList.remove('recording', 'loading');
@@ -588,10 +642,8 @@ testTranslationBtn.onclick = async function() {
                 });
                 const result = await response.json();
 
-                if (result.status === 'success') {
-                    // Refresh the announcements list
-                    loadAnnouncements();
-                } else {
+                if (result.status !== 'success') {
+                    // On success the change feed removes it from the list
                     alert('Error deleting announcement: ' + result.message);
                 }
             } catch (error) {
@@ -599,8 +651,5 @@ testTranslationBtn.onclick = async function() {
             }
         }
 
-        // Initial load of announcements
-        loadAnnouncements();
-        
-        // Setup periodic refresh
-        setInterval(loadAnnouncements, 30000); // Refresh every 30 seconds
\ No newline at end of file
+        // Initial load of announcements; later changes arrive over the change feed
+        loadAnnouncements();
\ No newline at end of file
@@ -1,14 +1,22 @@
 import streamlit as st
-import json
 from datetime import datetime
+from concurrent.futures import ThreadPoolExecutor, as_completed
 import os
-import glob
 import time
+import threading
 import dwani
+import aiohttp
 import requests
 from requests.adapters import HTTPAdapter
 from urllib3.util.retry import Retry
 from bhashaseva_enhanced import LANGUAGE_CODE_MAP
+from announcement_store import get_announcement_store
+from announcement_index import AnnouncementIndex
+from audio_gc import start_audio_gc
+from cache_warmup import start_cache_warmup
+from dwani_client import speech_file, translate
+from circuit_breaker import CircuitOpenError
+from rate_limiter import RateLimitError
 from dotenv import load_dotenv
 
 # Load environment variables from .env file
@@ -20,6 +28,7 @@ dwani.api_base = os.getenv("DWANI_API_BASE_URL")
 
 MAX_RETRIES = 10
 RETRY_DELAY = 2  # seconds between retries
+MAX_RETRY_DELAY = 30  # cap on the exponential backoff
 CONNECTION_TIMEOUT = 30  # seconds
 
 # Configure retry strategy for requests
@@ -33,107 +42,89 @@ session = requests.Session()
 session.mount("http://", adapter)
 session.mount("https://", adapter)
 
-def translate_and_speak(text, src_lang="english", tgt_lang="kannada"):
+def translate_and_speak(text, src_lang="english", tgt_lang="kannada", max_attempts=MAX_RETRIES):
     """Translate text and generate audio using Dwani API with retries"""
-    for attempt in range(MAX_RETRIES):
+    rate_limit_delay = None
+    for attempt in range(max_attempts):
         try:
             # Add delay between attempts
             if attempt > 0:
-                delay = RETRY_DELAY * (2 ** attempt)  # exponential backoff
-                print(f"Waiting {delay} seconds before attempt {attempt + 1}")
+                # When rate limited, wait exactly until the next token instead of backing off blindly
+                if rate_limit_delay is not None:
+                    delay = rate_limit_delay
+                else:
+                    delay = min(RETRY_DELAY * (2 ** attempt), MAX_RETRY_DELAY)  # exponential backoff
+                rate_limit_delay = None
+                print(f"Waiting {delay:.1f} seconds before attempt {attempt + 1}")
                 time.sleep(delay)
-                print(f"\nAttempt {attempt + 1}/{MAX_RETRIES}:")
+                print(f"\nAttempt {attempt + 1}/{max_attempts}:")
             # Step 1: Translate the text
             src_code = LANGUAGE_CODE_MAP[src_lang.lower()]
             tgt_code = LANGUAGE_CODE_MAP[tgt_lang.lower()]
             print(f"Translating from {src_lang} ({src_code}) to {tgt_lang} ({tgt_code})...")
-            translation = dwani.Translate.run_translate(
-                sentences=[text],
-                src_lang=src_code,
-                tgt_lang=LANGUAGE_CODE_MAP[tgt_lang],
-                timeout=CONNECTION_TIMEOUT
-            )
-            print(f"Raw translation response: {translation}")
-              # Handle different response formats from Dwani API
-            translated_text = None
-            if translation == 0:
-                print("Translation API returned 0, retrying...")
-                continue
-            elif isinstance(translation, dict):
-                if "translations" in translation and isinstance(translation["translations"], list):
-                    if len(translation["translations"]) > 0:
-                        translated_text = translation["translations"][0]
-                    else:
-                        print("Empty translations list in response")
-                elif "translation" in translation:
-                    translated_text = translation["translation"]
-                else:
-                    print(f"Unexpected dictionary format: {translation}")
-            elif isinstance(translation, list):
-                if len(translation) > 0:
-                    translated_text = translation[0]
-                else:
-                    print("Empty list in response")
-            elif isinstance(translation, str):
-                translated_text = translation
-            else:
-                print(f"Unexpected response type: {type(translation)}")
-
-            if not translated_text:
-                print("Could not extract translation, retrying...")
+            try:
+                # Batched with any concurrent requests for the same language pair
+                translated_text = translate(text, src_code, tgt_code, timeout=CONNECTION_TIMEOUT)
+            except ValueError as e:
+                print(f"Could not extract translation ({e}), retrying...")
                 continue
 
             print(f"Translated Text: {translated_text}")            # Step 2: Convert translated text to speech
             print("Generating audio...")
             
-            # Try different parameter combinations for audio generation
-            audio_attempts = [
-                lambda: dwani.Audio.speech(input=translated_text, response_format="mp3"),
-                lambda: dwani.Audio.speech(text=translated_text, response_format="mp3"),
-                lambda: dwani.Audio.speech(input=translated_text, format="mp3"),
-                lambda: dwani.Audio.speech(text=translated_text, format="mp3")
-            ]
+            # Repeated text resolves to its existing canonical audio blob without an API call; long texts
+            # go out sentence by sentence, in parallel, through the rate-limited async client
+            try:
+                filename = speech_file(translated_text, tgt_code)
+            except ValueError:
+                filename = None
             
-            response = None
-            for audio_func in audio_attempts:
-                try:
-                    response = audio_func()
-                    if response and isinstance(response, (bytes, bytearray)) and len(response) > 0:
-                        break
-                except Exception as e:
-                    print(f"Audio generation attempt failed: {e}")
-                    continue
-            
-            if response and isinstance(response, (bytes, bytearray)) and len(response) > 0:
-                # Save audio file
-                timestamp = int(datetime.now().timestamp())
-                filename = f"announcements/voice_{timestamp}.mp3"
-                os.makedirs("announcements", exist_ok=True)
-                
-                with open(filename, "wb") as f:
-                    f.write(response)
-                print("Speech synthesis complete: saved to", filename)
-                
+            if filename:
+                print("Speech synthesis complete:", filename)
                 return translated_text, filename
             else:
                 print("Audio generation failed, retrying...")
                 continue
 
-        except (ConnectionError, ConnectionResetError, requests.exceptions.ConnectionError) as e:
+        except CircuitOpenError as e:
+            # Dwani is down; retrying now would only add to the storm
+            print(f"Giving up: {str(e)}")
+            break
+        except RateLimitError as e:
+            print(f"Rate limited on attempt {attempt + 1}: {str(e)}")
+            rate_limit_delay = e.retry_after
+        except (ConnectionError, aiohttp.ClientConnectionError, requests.exceptions.ConnectionError) as e:
             print(f"Connection error on attempt {attempt + 1}: {str(e)}")
-            if attempt < MAX_RETRIES - 1:
+            if attempt < max_attempts - 1:
                 continue
             print("Max connection retries reached.")
         except Exception as e:
             print(f"Unexpected error on attempt {attempt + 1}: {str(e)}")
-            if attempt < MAX_RETRIES - 1:
+            if attempt < max_attempts - 1:
                 continue
             print("Max retries reached.")
     
     return None, None
 
+# Languages processed at once across every Streamlit session of this server
+LANGUAGE_WORKERS = 8
+RETRY_WORKERS = 4
+_language_pool = ThreadPoolExecutor(max_workers=LANGUAGE_WORKERS, thread_name_prefix="save-announcement")
+# Background retries sleep through backoff, so they get their own workers
+_retry_pool = ThreadPoolExecutor(max_workers=RETRY_WORKERS, thread_name_prefix="retry-language")
+# Serializes the read-modify-write of audio_paths/translations by background retries
+_record_lock = threading.Lock()
+
 def save_announcement(announcement_data):
-    """Save announcement with translations and audio files"""
+    """
+    Save announcement with translations and audio files.
+
+    Every language is submitted at once and the progress bar advances as
+    each finishes. Each language gets a single attempt here; languages that
+    fail are retried with backoff in the background and written to the
+    stored announcement when they succeed, so the page never waits on a
+    retry.
+    """
     try:
         # Add timestamp if not present
         if 'timestamp' not in announcement_data:
@@ -142,49 +133,44 @@ def save_announcement(announcement_data):
         # Generate translations and audio for each target language
         translations = {}
         audio_paths = {}
+        target_langs = announcement_data.get('target_langs', [])
         
         st.write("🔄 Starting translations and audio generation...")
         progress_bar = st.progress(0)
+        futures = {
+            _language_pool.submit(
+                translate_and_speak, announcement_data['text'], announcement_data['source_lang'], lang, 1
+            ): lang
+            for lang in target_langs
+        }
         
-        for i, lang in enumerate(announcement_data.get('target_langs', [])):
-            st.write(f"🌐 Processing {lang.title()}...")
-            trans_text, audio_path = translate_and_speak(
-                announcement_data['text'],
-                announcement_data['source_lang'],
-                lang
-            )
-            
-            if trans_text:
+        failed = []
+        for done, future in enumerate(as_completed(futures), start=1):
+            lang = futures[future]
+            trans_text, audio_path = future.result()
+            if trans_text and audio_path:
                 translations[lang] = trans_text
-                st.success(f"✅ Translation successful for {lang.title()}")
-                
-                if audio_path:
-                    audio_paths[lang] = audio_path
-                    st.success(f"✅ Audio generated for {lang.title()}")
-                else:
-                    st.warning(f"⚠️ Audio generation failed for {lang.title()}")
+                audio_paths[lang] = audio_path
+                st.success(f"✅ Translation and audio ready for {lang.title()}")
             else:
-                st.error(f"❌ Translation failed for {lang.title()}")
+                failed.append(lang)
+                st.warning(f"⏳ {lang.title()} failed; retrying in the background")
             
             # Update progress
-            progress_bar.progress((i + 1) / len(announcement_data.get('target_langs', [])))
+            progress_bar.progress(done / len(futures), text=f"{done}/{len(futures)} languages")
         
         # Add translations and audio paths to announcement data
         announcement_data['translations'] = translations
         announcement_data['audio_paths'] = audio_paths
+        announcement_data['pending_langs'] = failed
         
-        # Load existing announcements
-        announcements = []
-        if os.path.exists('announcement_logs.json'):
-            with open('announcement_logs.json', 'r', encoding='utf-8') as f:
-                announcements = json.load(f)
+        # Append to the announcement store (re-saving the same dict upserts by id)
+        stored = get_announcement_store().insert(announcement_data)
+        announcement_data['id'] = stored['id']
         
-        # Add new announcement
-        announcements.append(announcement_data)
-        
-        # Save updated announcements
-        with open('announcement_logs.json', 'w', encoding='utf-8') as f:
-            json.dump(announcements, f, ensure_ascii=False, indent=2)
+        for lang in failed:
+            _retry_pool.submit(_retry_language, stored['id'], announcement_data['text'],
+                               announcement_data['source_lang'], lang)
         
         st.success("✅ Announcement saved successfully!")
         return True
@@ -193,39 +179,58 @@ def save_announcement(announcement_data):
         st.error(f"❌ Error saving announcement: {str(e)}")
         return False
 
-def cleanup_temp_files(keep_last_n=10):
-    """Cleanup temporary audio files, keeping the n most recent files"""
-    try:
-        # Keep track of audio files referenced in announcements
-        audio_files = set()
-        announcements = get_announcements()
-        
-        for announcement in announcements:
-            for audio_path in announcement.get('audio_paths', {}).values():
-                audio_files.add(audio_path)
-        
-        # Remove unused audio files
-        for file in glob.glob('announcements/*.mp3'):
-            if file not in audio_files:
-                try:
-                    os.remove(file)
-                except:
-                    pass
-    except Exception as e:
-        print(f"Error cleaning up temp files: {str(e)}")
+def _retry_language(announcement_id, text, src_lang, lang):
+    """Background retry of one language of a saved announcement; records the outcome in the store"""
+    trans_text, audio_path = translate_and_speak(text, src_lang, lang)
+    store = get_announcement_store()
+    with _record_lock:
+        announcement = store.get(announcement_id)
+        if announcement is None:
+            return
+        changes = {'pending_langs': [l for l in announcement.get('pending_langs', []) if l != lang]}
+        if trans_text and audio_path:
+            changes['translations'] = {**(announcement.get('translations') or {}), lang: trans_text}
+            changes['audio_paths'] = {**(announcement.get('audio_paths') or {}), lang: audio_path}
+        else:
+            changes['errors'] = {**(announcement.get('errors') or {}), lang: "Translation or audio generation failed"}
+        store.update(announcement_id, changes)
+    print(f"Background retry for {lang} of {announcement_id}: {'succeeded' if 'translations' in changes else 'failed'}")
+
+@st.cache_resource
+def start_audio_cleanup():
+    """Start the background audio collector once per Streamlit server (replaces per-render cleanup)"""
+    return start_audio_gc()
+
+@st.cache_resource
+def start_cache_preload():
+    """Warm this Streamlit server's translation and TTS caches once, in the background"""
+    return start_cache_warmup()
 
 def get_announcements():
     """Get all announcements"""
     try:
-        if os.path.exists('announcement_logs.json'):
-            with open('announcement_logs.json', 'r', encoding='utf-8') as f:
-                return json.load(f)
+        return get_announcement_store().all()
     except Exception as e:
         print(f"Error loading announcements: {str(e)}")
     return []
 
+def get_announcements_revision():
+    """Store revision; changes whenever any process adds, updates or deletes an announcement"""
+    try:
+        return get_announcement_store().revision()
+    except Exception as e:
+        print(f"Error reading announcements revision: {str(e)}")
+    return None
+
+@st.cache_resource
+def get_announcement_index():
+    """Announcement index shared by every session of this Streamlit server; kept current by its own refresh()"""
+    return AnnouncementIndex(get_announcement_store())
+
 def initialize_session_state():
     """Initialize shared session state variables"""
+    start_audio_cleanup()
+    start_cache_preload()
     if 'notifications' not in st.session_state:
         st.session_state.notifications = get_announcements()
     if 'preferred_languages' not in st.session_state:
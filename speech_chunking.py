@@ -0,0 +1,168 @@
+from typing import List, Optional
+
+# ======================
+# SENTENCE SPLITTING
+# ======================
+# Scripts whose texts end sentences with a danda (।) or double danda (॥). A full
+# stop there usually marks an abbreviation (डॉ. for Dr.), so it is not a boundary.
+DANDA_SCRIPTS = {"Deva", "Beng", "Guru", "Orya"}
+DANDA_TERMINATORS = "।॥?!"
+# Urdu full stop and question mark
+ARABIC_TERMINATORS = "۔؟?!"
+# Kannada, Tamil, Telugu, Malayalam, Gujarati and Latin text use the Latin full stop
+LATIN_TERMINATORS = ".?!"
+
+# Closing quotes and brackets that stay with the sentence they end
+CLOSERS = "\"'”’)]"
+
+def _terminators(lang_code: Optional[str]) -> str:
+    script = lang_code.rsplit("_", 1)[-1] if lang_code else ""
+    if script in DANDA_SCRIPTS:
+        return DANDA_TERMINATORS
+    if script == "Arab":
+        return ARABIC_TERMINATORS
+    return LATIN_TERMINATORS
+
+def sentence_end(lang_code: str = None) -> str:
+    """Full stop of the script a language is written in (। for Hindi, . for Kannada)"""
+    return _terminators(lang_code)[0]
+
+def split_sentences(text: str, lang_code: str = None) -> List[str]:
+    """
+    Split text into sentences at the boundaries of its script.
+
+    A terminator only ends a sentence when whitespace or the end of the
+    text follows it (and any closing quotes), so decimals like 2.5 and
+    run-together abbreviations stay intact.
+
+    Args:
+        text: Text to split
+        lang_code: Language code of the text (e.g. hin_Deva); its script suffix picks the terminators
+
+    Returns:
+        list: Stripped, non-empty sentences in order
+    """
+    terminators = _terminators(lang_code)
+    sentences = []
+    start = i = 0
+    while i < len(text):
+        if text[i] not in terminators:
+            i += 1
+            continue
+        end = i + 1
+        while end < len(text) and (text[end] in terminators or text[end] in CLOSERS):
+            end += 1
+        if end == len(text) or text[end].isspace():
+            sentence = text[start:end].strip()
+            if sentence:
+                sentences.append(sentence)
+            start = end
+        i = end
+    tail = text[start:].strip()
+    if tail:
+        sentences.append(tail)
+    return sentences
+
+def _split_long(sentence: str, max_chars: int) -> List[str]:
+    """Break an overlong sentence at the last comma or space before ``max_chars``"""
+    pieces = []
+    while len(sentence) > max_chars:
+        cut = max(sentence.rfind(",", 0, max_chars), sentence.rfind("،", 0, max_chars))
+        if cut <= 0:
+            cut = sentence.rfind(" ", 0, max_chars)
+        if cut <= 0:
+            cut = max_chars - 1
+        pieces.append(sentence[:cut + 1].strip())
+        sentence = sentence[cut + 1:].strip()
+    if sentence:
+        pieces.append(sentence)
+    return pieces
+
+def chunk_text(text: str, lang_code: str = None, min_chunk_chars: int = 40, max_chunk_chars: int = 300) -> List[str]:
+    """
+    Sentence chunks of a text for synthesis.
+
+    Fragments shorter than ``min_chunk_chars`` (a heading such as
+    "Attention!") are joined to the following sentence, and sentences
+    longer than ``max_chunk_chars`` are broken at a comma or space.
+
+    Returns:
+        list: Chunks in reading order
+    """
+    chunks = []
+    carry = ""
+    for sentence in split_sentences(text, lang_code):
+        sentence = f"{carry} {sentence}" if carry else sentence
+        if len(sentence) < min_chunk_chars:
+            carry = sentence
+            continue
+        carry = ""
+        chunks.extend(_split_long(sentence, max_chunk_chars))
+    if carry:
+        if chunks and len(chunks[-1]) + len(carry) < max_chunk_chars:
+            chunks[-1] = f"{chunks[-1]} {carry}"
+        else:
+            chunks.append(carry)
+    return chunks
+
+# ======================
+# MP3 JOINING
+# ======================
+# Layer III bitrates (kbps) by index, for MPEG-1 and for MPEG-2/2.5
+_BITRATES_V1 = [0, 32, 40, 48, 56, 64, 80, 96, 112, 128, 160, 192, 224, 256, 320, 0]
+_BITRATES_V2 = [0, 8, 16, 24, 32, 40, 48, 56, 64, 80, 96, 112, 128, 144, 160, 0]
+_SAMPLE_RATES = {3: [44100, 48000, 32000], 2: [22050, 24000, 16000], 0: [11025, 12000, 8000]}
+
+def _strip_id3(data: bytes) -> bytes:
+    if data[:3] == b"ID3" and len(data) >= 10:
+        size = (data[6] & 0x7F) << 21 | (data[7] & 0x7F) << 14 | (data[8] & 0x7F) << 7 | (data[9] & 0x7F)
+        footer = 10 if data[5] & 0x10 else 0
+        data = data[10 + size + footer:]
+    if len(data) >= 128 and data[-128:-125] == b"TAG":
+        data = data[:-128]
+    return data
+
+def _info_frame_length(data: bytes) -> int:
+    """
+    Length of a leading Xing/Info/VBRI frame, or 0 if the data does not start with one.
+
+    Those frames hold the frame count and seek table of their own file and
+    would make players misjudge the duration of the joined audio.
+    """
+    if len(data) < 4 or data[0] != 0xFF or data[1] & 0xE0 != 0xE0:
+        return 0
+    version = (data[1] >> 3) & 0x03
+    layer = (data[1] >> 1) & 0x03
+    bitrate_index = data[2] >> 4
+    rate_index = (data[2] >> 2) & 0x03
+    if version == 1 or layer != 1 or rate_index == 3 or bitrate_index in (0, 15):
+        return 0
+    mono = (data[3] >> 6) == 3
+    if version == 3:
+        side_info = 17 if mono else 32
+        bitrate = _BITRATES_V1[bitrate_index]
+        length = 144000 * bitrate // _SAMPLE_RATES[version][rate_index]
+    else:
+        side_info = 9 if mono else 17
+        bitrate = _BITRATES_V2[bitrate_index]
+        length = 72000 * bitrate // _SAMPLE_RATES[version][rate_index]
+    length += (data[2] >> 1) & 0x01
+    tag_offset = 4 + side_info
+    if data[tag_offset:tag_offset + 4] in (b"Xing", b"Info") or data[36:40] == b"VBRI":
+        return length
+    return 0
+
+def join_mp3(parts: List[bytes]) -> bytes:
+    """
+    Concatenate MP3 clips frame by frame, without re-encoding.
+
+    ID3 tags and Xing/Info headers are dropped from every part, leaving a
+    plain stream of MPEG audio frames that players read end to end.
+    """
+    if len(parts) == 1:
+        return parts[0]
+    frames = []
+    for part in parts:
+        data = _strip_id3(part)
+        frames.append(data[_info_frame_length(data):])
+    return b"".join(frames)
@@ -0,0 +1,231 @@
+import heapq
+import itertools
+import logging
+import threading
+import time
+from typing import Callable, List, Optional
+
+logger = logging.getLogger(__name__)
+
+# Priority values at or below this are urgent (EMERGENCY, HEALTH_ALERT)
+URGENT_PRIORITY = 2
+
+class TaskDeferred(Exception):
+    """Raised inside a task to hand its worker over to urgent work"""
+
+# ======================
+# JOBS
+# ======================
+class AnnouncementJob:
+    """
+    Tracks the per-language tasks of one announcement.
+
+    The completion callback runs exactly once, on the worker thread that
+    finishes the last language, with the gathered per-language results.
+    The optional result callback runs for every successful language as it
+    completes.
+    """
+
+    def __init__(self, announcement, on_complete: Callable[["AnnouncementJob"], None] = None,
+                 on_first_result: Callable[["AnnouncementJob"], None] = None,
+                 on_result: Callable[["AnnouncementJob", str, dict], None] = None,
+                 completed: dict = None):
+        """
+        Args:
+            announcement: The announcement whose target languages become tasks
+            on_complete: Called once every language has a result
+            on_first_result: Called when the first language succeeds
+            on_result: Called for every language that succeeds
+            completed: Results of languages finished before a restart; they are not run again
+        """
+        self.announcement = announcement
+        self.priority = announcement.priority.value
+        self.languages = list(announcement.target_langs or [])
+        self.results = {lang: result for lang, result in (completed or {}).items() if lang in self.languages}
+        self.pending = set(self.languages) - set(self.results)
+        self.on_complete = on_complete
+        self.on_first_result = on_first_result
+        self.on_result = on_result
+        self.enqueued_at = time.time()
+        self.first_result_at = None
+        self.done = threading.Event()
+        self._lock = threading.Lock()
+
+    def record_result(self, lang: str, result: Optional[dict]) -> None:
+        """Store a language result (None for failure) and complete the job if it was the last one"""
+        with self._lock:
+            if lang not in self.pending:
+                return
+            self.pending.discard(lang)
+            first = False
+            if result:
+                self.results[lang] = result
+                if self.first_result_at is None:
+                    self.first_result_at = time.time()
+                    first = True
+            finished = not self.pending
+        if first and self.on_first_result:
+            try:
+                self.on_first_result(self)
+            except Exception as e:
+                logger.error(f"Error in first result callback: {str(e)}")
+        if result and self.on_result:
+            try:
+                self.on_result(self, lang, result)
+            except Exception as e:
+                logger.error(f"Error in result callback: {str(e)}")
+        if finished:
+            self._complete()
+
+    def completed_results(self) -> dict:
+        """Snapshot of the results gathered so far"""
+        with self._lock:
+            return dict(self.results)
+
+    def _complete(self) -> None:
+        try:
+            if self.on_complete:
+                self.on_complete(self)
+        except Exception as e:
+            logger.error(f"Error completing announcement job: {str(e)}")
+        finally:
+            self.done.set()
+
+    def wait(self, timeout: float = None) -> bool:
+        return self.done.wait(timeout)
+
+# ======================
+# SCHEDULER
+# ======================
+class TaskScheduler:
+    """
+    Bounded pool of workers running language tasks from many announcements.
+
+    Tasks from every submitted job share one heap ordered by
+    (priority, submission order), so a language task of an urgent
+    announcement is picked before queued tasks of less urgent ones even
+    while those announcements are still in flight.
+
+    Reserved workers only run urgent tasks, so an emergency never waits for
+    general work to drain. Lower-priority tasks sleeping in backoff() are
+    deferred back to the heap as soon as urgent work is waiting.
+    """
+
+    def __init__(self, handler: Callable, max_workers: int = 4, reserved_workers: int = 0,
+                 urgent_priority: int = URGENT_PRIORITY, name: str = "language-worker"):
+        """
+        Args:
+            handler: Called as handler(announcement, lang) -> result dict or None
+            max_workers: Upper bound on concurrently running language tasks of any priority
+            reserved_workers: Additional workers that only run urgent tasks
+            urgent_priority: Highest priority value treated as urgent
+            name: Thread name prefix for the workers
+        """
+        self.handler = handler
+        self.urgent_priority = urgent_priority
+        self._heap = []
+        self._lock = threading.Lock()
+        self._work_available = threading.Condition(self._lock)
+        self._urgent_available = threading.Condition(self._lock)
+        self._sequence = itertools.count()
+        self._closed = False
+        self._local = threading.local()
+        self._workers: List[threading.Thread] = []
+        for i in range(max_workers):
+            self._start_worker(f"{name}-{i + 1}", urgent_only=False)
+        for i in range(reserved_workers):
+            self._start_worker(f"{name}-urgent-{i + 1}", urgent_only=True)
+
+    def _start_worker(self, name: str, urgent_only: bool) -> None:
+        worker = threading.Thread(target=self._run_worker, args=(urgent_only,), name=name, daemon=True)
+        worker.start()
+        self._workers.append(worker)
+
+    def submit(self, job: AnnouncementJob) -> AnnouncementJob:
+        """Queue every language task of a job that is not already complete"""
+        if not job.pending:
+            job._complete()
+            return job
+        with self._lock:
+            if self._closed:
+                raise RuntimeError("Task scheduler has been shut down")
+            for lang in job.languages:
+                if lang in job.pending:
+                    self._push((job.priority, next(self._sequence), job, lang))
+        return job
+
+    def _push(self, task: tuple) -> None:
+        heapq.heappush(self._heap, task)
+        self._work_available.notify()
+        if task[0] <= self.urgent_priority:
+            # Wakes reserved workers and lower-priority tasks sleeping in backoff()
+            self._urgent_available.notify_all()
+
+    def pending_tasks(self) -> int:
+        with self._lock:
+            return len(self._heap)
+
+    def _has_urgent(self) -> bool:
+        return bool(self._heap) and self._heap[0][0] <= self.urgent_priority
+
+    def _next_task(self, urgent_only: bool):
+        condition = self._urgent_available if urgent_only else self._work_available
+        with self._lock:
+            while not self._closed:
+                if self._heap and (not urgent_only or self._has_urgent()):
+                    return heapq.heappop(self._heap)
+                condition.wait()
+            return None
+
+    def _run_worker(self, urgent_only: bool) -> None:
+        while True:
+            task = self._next_task(urgent_only)
+            if task is None:
+                return
+            _, _, job, lang = task
+            self._local.task = task
+            result = None
+            try:
+                result = self.handler(job.announcement, lang)
+            except TaskDeferred:
+                logger.info(f"Deferring {lang} task (priority {task[0]}) for urgent work")
+                with self._lock:
+                    # Keeps its original sequence number, so it resumes ahead of later work
+                    self._push(task)
+                continue
+            except Exception as e:
+                logger.error(f"Error in {lang} task: {str(e)}")
+            finally:
+                self._local.task = None
+            job.record_result(lang, result)
+
+    def backoff(self, seconds: float) -> None:
+        """
+        Sleep before a retry, yielding the worker if urgent work is waiting.
+
+        Raises:
+            TaskDeferred: If the calling task is not urgent and an urgent task is queued
+        """
+        task = getattr(self._local, "task", None)
+        if task is None:
+            time.sleep(seconds)
+            return
+        deadline = time.time() + seconds
+        with self._lock:
+            while True:
+                if task[0] > self.urgent_priority and self._has_urgent():
+                    raise TaskDeferred()
+                remaining = deadline - time.time()
+                if remaining <= 0 or self._closed:
+                    return
+                self._urgent_available.wait(remaining)
+
+    def shutdown(self, wait: bool = True) -> None:
+        """Stop workers after their current task; queued tasks are discarded"""
+        with self._lock:
+            self._closed = True
+            self._work_available.notify_all()
+            self._urgent_available.notify_all()
+        if wait:
+            for worker in self._workers:
+                worker.join()
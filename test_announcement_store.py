@@ -0,0 +1,152 @@
+"""
+Behaviour tests for both announcement store backends.
+Run with: python -m pytest -q test_announcement_store.py
+"""
+import json
+
+import pytest
+
+from announcement_store import AppendOnlyLogStore, SQLiteAnnouncementStore, encode_cursor, parse_cursor
+
+@pytest.fixture(params=["log", "sqlite"])
+def store(request, tmp_path):
+    if request.param == "log":
+        store = AppendOnlyLogStore(str(tmp_path / "announcements.jsonl"), legacy_path=None)
+    else:
+        store = SQLiteAnnouncementStore(str(tmp_path / "announcements.db"), legacy_path=None)
+    yield store
+    store.close()
+
+def announcement(text, timestamp, **fields):
+    return {"text": text, "timestamp": timestamp, "type": "general", **fields}
+
+def test_insert_assigns_id_and_timestamp(store):
+    record = store.insert({"text": "Water supply interrupted"})
+    assert record["id"] and record["timestamp"]
+    assert store.get(record["id"])["text"] == "Water supply interrupted"
+    assert store.get_by_timestamp(record["timestamp"])["id"] == record["id"]
+
+def test_every_write_bumps_the_revision(store):
+    start = store.revision()
+    record = store.insert(announcement("a", "2024-01-01T10:00:00"))
+    assert store.revision() > start
+    after_insert = store.revision()
+    store.update(record["id"], {"status": "completed"})
+    assert store.revision() > after_insert
+    after_update = store.revision()
+    store.delete(record["id"])
+    assert store.revision() > after_update
+
+def test_changes_since_splits_created_updated_and_deleted(store):
+    kept = store.insert(announcement("kept", "2024-01-01T10:00:00"))
+    gone = store.insert(announcement("gone", "2024-01-01T11:00:00"))
+    revision = store.revision()
+    store.update(kept["id"], {"status": "completed"})
+    new = store.insert(announcement("new", "2024-01-01T12:00:00"))
+    store.delete(gone["id"])
+
+    changes = store.changes_since(revision)
+    assert [r["id"] for r in changes.created] == [new["id"]]
+    assert [r["id"] for r in changes.updated] == [kept["id"]]
+    assert changes.updated[0]["status"] == "completed"
+    assert changes.deleted == [gone["id"]]
+    assert changes.revision == store.revision()
+    assert store.changes_since(store.revision()) == ([], [], [], store.revision(), {})
+
+def test_change_events_come_in_revision_order(store):
+    gone = store.insert(announcement("gone", "2024-01-01T10:00:00"))
+    kept = store.insert(announcement("kept", "2024-01-01T11:00:00"))
+    revision = store.revision()
+    store.delete(gone["id"])
+    new = store.insert(announcement("new", "2024-01-01T12:00:00"))
+    store.update(kept["id"], {"status": "completed"})
+
+    events = store.changes_since(revision).events()
+    assert [(event, data["id"]) for event, data in events] == [
+        ("deleted", gone["id"]), ("created", new["id"]), ("updated", kept["id"])
+    ]
+
+def test_changes_since_a_future_revision_asks_for_a_reload(store):
+    assert store.changes_since(store.revision() + 10) is None
+
+def test_delete_by_timestamp_removes_every_record_with_it(store):
+    # The old per-language saves left several rows with one timestamp
+    shared = "2024-03-05T09:30:00"
+    for lang in ["kannada", "hindi", "tamil"]:
+        store.insert(announcement("vaccination drive", shared, language=lang))
+    other = store.insert(announcement("other", "2024-03-05T09:31:00"))
+    assert len(store.ids_by_timestamp(shared)) == 3
+
+    assert store.delete_by_timestamp(shared)
+    assert store.ids_by_timestamp(shared) == []
+    assert store.get_by_timestamp(shared) is None
+    assert [r["id"] for r in store.all()] == [other["id"]]
+    assert not store.delete_by_timestamp(shared)
+
+def test_update_keeps_the_timestamp_index_consistent(store):
+    record = store.insert(announcement("moved", "2024-01-01T10:00:00"))
+    store.insert(announcement("stays", "2024-01-01T10:00:00"))
+    store.update(record["id"], {"timestamp": "2024-01-02T10:00:00"})
+    assert store.ids_by_timestamp("2024-01-02T10:00:00") == [record["id"]]
+    assert record["id"] not in store.ids_by_timestamp("2024-01-01T10:00:00")
+    assert len(store.ids_by_timestamp("2024-01-01T10:00:00")) == 1
+
+def test_legacy_import_keeps_same_timestamp_rows(tmp_path):
+    legacy = tmp_path / "announcement_logs.json"
+    legacy.write_text(json.dumps([
+        announcement("a", "2024-01-01T10:00:00", language="kannada"),
+        announcement("a", "2024-01-01T10:00:00", language="hindi")
+    ]))
+    store = AppendOnlyLogStore(str(tmp_path / "announcements.jsonl"), legacy_path=str(legacy))
+    assert len(store.ids_by_timestamp("2024-01-01T10:00:00")) == 2
+    assert store.delete_by_timestamp("2024-01-01T10:00:00")
+    assert store.all() == []
+
+def test_log_store_sees_writes_from_another_instance(tmp_path):
+    path = str(tmp_path / "announcements.jsonl")
+    first = AppendOnlyLogStore(path, legacy_path=None)
+    second = AppendOnlyLogStore(path, legacy_path=None)
+    record = first.insert(announcement("shared", "2024-01-01T10:00:00"))
+    assert second.get(record["id"])["text"] == "shared"
+    second.delete_by_timestamp("2024-01-01T10:00:00")
+    assert first.get(record["id"]) is None
+    assert first.revision() == second.revision()
+
+def test_query_pages_through_records_sharing_a_timestamp(store):
+    # Five records on a page boundary share one timestamp
+    ids = {store.insert(announcement(f"burst {i}", "2024-05-01T08:00:00"))["id"] for i in range(5)}
+    ids.add(store.insert(announcement("older", "2024-05-01T07:00:00"))["id"])
+    ids.add(store.insert(announcement("newer", "2024-05-01T09:00:00"))["id"])
+
+    seen, before = [], None
+    while True:
+        page = store.query(before=before, limit=3)
+        seen.extend(r["id"] for r in page)
+        if len(page) < 3:
+            break
+        before = parse_cursor(encode_cursor(page[-1]))
+    assert len(seen) == len(set(seen)) == 7
+    assert set(seen) == ids
+    assert store.get(seen[0])["text"] == "newer" and store.get(seen[-1])["text"] == "older"
+
+def test_bare_timestamp_cursor_still_means_strictly_older(store):
+    store.insert(announcement("same", "2024-05-01T08:00:00"))
+    older = store.insert(announcement("older", "2024-05-01T07:00:00"))
+    assert [r["id"] for r in store.query(before=parse_cursor("2024-05-01T08:00:00"))] == [older["id"]]
+
+def test_log_store_compacts_after_updates_and_deletes(tmp_path):
+    path = tmp_path / "announcements.jsonl"
+    store = AppendOnlyLogStore(str(path), legacy_path=None, compact_min_garbage=5)
+    record = store.insert(announcement("patched", "2024-01-01T10:00:00"))
+    for i in range(10):
+        store.update(record["id"], {"status": f"step {i}"})
+    assert len(path.read_text().splitlines()) < 10
+    assert store.get(record["id"])["status"] == "step 9"
+
+    doomed = [store.insert(announcement(f"gone {i}", "2024-01-02T10:00:00"))["id"] for i in range(4)]
+    lines = len(path.read_text().splitlines())
+    for announcement_id in doomed:
+        store.delete(announcement_id)
+    assert len(path.read_text().splitlines()) < lines
+    assert [r["id"] for r in store.all()] == [record["id"]]
+    store.close()
@@ -0,0 +1,50 @@
+"""
+Behaviour tests for the paged GET /api/announcements endpoint.
+Run with: python -m pytest -q test_announcements_api.py
+"""
+import os
+
+import pytest
+
+from announcement_store import AppendOnlyLogStore
+
+@pytest.fixture
+def client(tmp_path, monkeypatch):
+    monkeypatch.setenv("DWANI_API_KEY", os.getenv("DWANI_API_KEY") or "test")
+    # The module-level store, journal and caches land in the temporary directory
+    monkeypatch.syspath_prepend(os.getcwd())
+    monkeypatch.chdir(tmp_path)
+    import app
+
+    store = AppendOnlyLogStore(str(tmp_path / "announcements.jsonl"), legacy_path=None)
+    monkeypatch.setattr(app, "announcement_store", store)
+    # Importing the app must not start replay or consumers; keep it that way for requests too
+    monkeypatch.setattr(app, "_services_started", True)
+    yield app.app.test_client(), store
+    store.close()
+
+def test_next_cursor_pages_through_a_shared_timestamp(client):
+    client, store = client
+    for i in range(7):
+        store.insert({"text": f"flood warning {i}", "timestamp": "2024-07-01T06:00:00", "type": "weather_alert"})
+    store.insert({"text": "oldest", "timestamp": "2024-07-01T05:00:00", "type": "weather_alert"})
+
+    seen, cursor = [], None
+    while True:
+        query = {"limit": 3, **({"cursor": cursor} if cursor else {})}
+        page = client.get("/api/announcements", query_string=query).get_json()
+        seen.extend(record["id"] for record in page["announcements"])
+        cursor = page["next_cursor"]
+        if cursor is None:
+            break
+    assert len(seen) == len(set(seen)) == 8
+    assert store.get(seen[-1])["text"] == "oldest"
+
+def test_filters_and_projection_apply_to_pages(client):
+    client, store = client
+    store.insert({"text": "rain", "timestamp": "2024-07-01T06:00:00", "type": "weather_alert", "districts": ["Kochi"]})
+    store.insert({"text": "camp", "timestamp": "2024-07-01T07:00:00", "type": "health", "districts": ["Pune"]})
+    page = client.get("/api/announcements", query_string={"district": "kochi", "fields": "text"}).get_json()
+    assert [record["text"] for record in page["announcements"]] == ["rain"]
+    assert set(page["announcements"][0]) == {"id", "timestamp", "text"}
+    assert page["next_cursor"] is None
@@ -0,0 +1,92 @@
+"""
+Behaviour tests for the audio garbage collector's scope and retention.
+Run with: python -m pytest -q test_audio_gc.py
+"""
+import os
+import time
+
+import pytest
+
+import audio_gc
+from announcement_store import AppendOnlyLogStore
+from cache_store import TwoTierCache
+
+DAY = 86400
+
+def write(path, age_seconds=0, data=b"ID3audio"):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, "wb") as f:
+        f.write(data)
+    past = time.time() - age_seconds
+    os.utime(path, (past, past))
+    return os.path.abspath(path)
+
+@pytest.fixture
+def setup(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    blobs = TwoTierCache("tts", "announcements/blobs", max_disk_bytes=None, suffix=".mp3")
+    monkeypatch.setattr(audio_gc, "tts_cache", blobs)
+    store = AppendOnlyLogStore("announcements.jsonl", legacy_path=None)
+
+    def collector(**kwargs):
+        options = dict(directory="announcements", grace_seconds=60, max_age_days=30, max_total_mb=None,
+                       keep_last_per_language=0)
+        options.update(kwargs)
+        return audio_gc.AudioGarbageCollector(store=store, **options)
+
+    yield blobs, store, collector
+    store.close()
+
+def test_legacy_audio_is_left_alone_by_default(setup):
+    blobs, store, collector = setup
+    legacy = write("announcements/voice_20240101_kannada.mp3", age_seconds=400 * DAY)
+    expired_blob = write(blobs.path("a" * 64), age_seconds=40 * DAY)
+    report = collector().run_once()
+    assert os.path.exists(legacy)
+    assert not os.path.exists(expired_blob)
+    assert report["reclaimed_by_reason"] == {"expired": 1}
+
+def test_fresh_and_referenced_blobs_are_kept(setup):
+    blobs, store, collector = setup
+    fresh = write(blobs.path("b" * 64), age_seconds=10)
+    recent = write(blobs.path("c" * 64), age_seconds=5 * DAY)
+    referenced = write(blobs.path("d" * 64), age_seconds=40 * DAY)
+    store.insert({"text": "t", "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+                  "audio_paths": {"hindi": os.path.relpath(referenced)}})
+    collector().run_once()
+    assert all(os.path.exists(path) for path in (fresh, recent, referenced))
+
+def test_abandoned_temp_files_in_the_blob_store_are_removed(setup):
+    blobs, store, collector = setup
+    abandoned = write(blobs.path("e" * 64) + ".123.stream.tmp", age_seconds=3600)
+    in_progress = write(blobs.path("f" * 64) + ".456.stream.tmp", age_seconds=1)
+    report = collector().run_once()
+    assert not os.path.exists(abandoned)
+    assert os.path.exists(in_progress)
+    assert report["reclaimed_by_reason"] == {"abandoned_temp": 1}
+
+def test_legacy_collection_is_opt_in_and_age_gated(setup):
+    blobs, store, collector = setup
+    old = write("announcements/voice_old_hindi.mp3", age_seconds=400 * DAY)
+    young = write("announcements/voice_young_hindi.mp3", age_seconds=10 * DAY)
+    collector(collect_legacy=True, legacy_min_age_days=90).run_once()
+    assert not os.path.exists(old)
+    assert os.path.exists(young)
+
+def test_dry_run_reports_without_deleting(setup):
+    blobs, store, collector = setup
+    expired_blob = write(blobs.path("9" * 64), age_seconds=40 * DAY)
+    legacy = write("announcements/voice_old.mp3", age_seconds=400 * DAY)
+    report = collector(collect_legacy=True, dry_run=True).run_once()
+    assert report["dry_run"] and report["reclaimed_files"] == 2
+    assert os.path.exists(expired_blob) and os.path.exists(legacy)
+
+def test_budget_only_evicts_blobs(setup):
+    blobs, store, collector = setup
+    legacy = write("announcements/voice_big.mp3", age_seconds=400 * DAY, data=b"x" * 4096)
+    oldest = write(blobs.path("1" * 64), age_seconds=3 * DAY, data=b"x" * 700 * 1024)
+    newest = write(blobs.path("2" * 64), age_seconds=2 * DAY, data=b"x" * 700 * 1024)
+    report = collector(max_total_mb=1).run_once()
+    assert not os.path.exists(oldest)
+    assert os.path.exists(newest) and os.path.exists(legacy)
+    assert report["reclaimed_by_reason"] == {"over_budget": 1}
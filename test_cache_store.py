@@ -0,0 +1,140 @@
+"""
+Behaviour tests for the two-tier (memory + disk) translation and TTS cache.
+Run with: python -m pytest -q test_cache_store.py
+"""
+import os
+import threading
+import time
+
+from cache_store import TwoTierCache, cache_key, normalize_text
+
+def test_keys_ignore_whitespace_and_unicode_form():
+    assert normalize_text("  Water\n supply  ") == "Water supply"
+    decomposed = "é"
+    assert cache_key(decomposed, "eng_Latn", "hin_Deva", "text") == cache_key("\u00e9", "eng_Latn", "hin_Deva", "text")
+    assert cache_key("a", "eng_Latn", "hin_Deva", "text") != cache_key("a", "eng_Latn", "hin_Deva", "speech:mp3")
+
+def test_memory_disk_and_miss_are_counted(tmp_path):
+    cache = TwoTierCache("tts", str(tmp_path), max_memory_items=10)
+    assert cache.get("ab12") is None
+    cache.set("ab12", b"audio")
+    assert cache.get("ab12") == b"audio"
+    stats = cache.get_stats()
+    assert (stats["memory_hits"], stats["disk_hits"], stats["misses"], stats["writes"]) == (1, 0, 1, 1)
+    assert os.path.exists(os.path.join(str(tmp_path), "ab", "ab12.bin"))
+
+def test_disk_tier_survives_a_restart(tmp_path):
+    TwoTierCache("translation", str(tmp_path), suffix=".txt", binary=False).set("cd34", "ನೀರು")
+    reopened = TwoTierCache("translation", str(tmp_path), suffix=".txt", binary=False)
+    assert reopened.get_stats()["disk_items"] == 1
+    assert reopened.get("cd34") == "ನೀರು"
+    assert reopened.get("cd34") == "ನೀರು"
+    assert (reopened.stats["disk_hits"], reopened.stats["memory_hits"]) == (1, 1)
+
+def test_disk_budget_evicts_least_recently_used(tmp_path):
+    cache = TwoTierCache("tts", str(tmp_path), max_disk_bytes=25)
+    for key in ["aa01", "bb02", "cc03"]:
+        cache.set(key, b"0123456789")
+    assert cache.stats["evictions"] == 1
+    assert "aa01" not in cache
+    assert cache.get("bb02") == b"0123456789" and cache.get("cc03") == b"0123456789"
+    assert cache.get_stats()["disk_bytes"] == 20
+
+def test_unbounded_disk_tier_never_evicts(tmp_path):
+    cache = TwoTierCache("tts", str(tmp_path), max_disk_bytes=None)
+    for i in range(5):
+        cache.set(f"{i:02d}key", b"x" * 100)
+    assert cache.get_stats()["disk_items"] == 5 and cache.stats["evictions"] == 0
+
+def test_get_or_compute_and_ensure_file_compute_once(tmp_path):
+    cache = TwoTierCache("tts", str(tmp_path), suffix=".mp3")
+    calls = []
+
+    def compute():
+        calls.append(1)
+        return b"ID3audio"
+
+    assert cache.get_or_compute("ef56", compute) == b"ID3audio"
+    path = cache.ensure_file("ef56", compute)
+    assert cache.ensure_file("0a78", compute) == cache.path("0a78")
+    assert cache.ensure_file("0a78", compute) == cache.path("0a78")
+    assert len(calls) == 2
+    with open(path, "rb") as f:
+        assert f.read() == b"ID3audio"
+
+def test_remove_disk_entry_updates_the_accounting(tmp_path):
+    cache = TwoTierCache("tts", str(tmp_path))
+    cache.set("ab12", b"audio")
+    assert cache.remove_disk_entry("ab12")
+    assert not os.path.exists(cache.path("ab12"))
+    assert cache.get_stats()["disk_bytes"] == 0
+    assert not cache.remove_disk_entry("ab12")
+
+def test_memory_tier_can_be_bounded_by_size(tmp_path):
+    cache = TwoTierCache("tts", str(tmp_path), max_memory_bytes=25)
+    for key in ["aa01", "bb02", "cc03"]:
+        cache.set(key, b"0123456789")
+    stats = cache.get_stats()
+    assert (stats["memory_items"], stats["memory_bytes"]) == (2, 20)
+    cache.set("dd04", b"x" * 100)  # larger than the whole budget: disk only
+    assert cache.get_stats()["memory_bytes"] == 20
+    assert cache.get("dd04") == b"x" * 100
+    assert cache.get("aa01") == b"0123456789"
+    assert cache.stats["disk_hits"] == 2
+
+def test_concurrent_misses_compute_once(tmp_path):
+    cache = TwoTierCache("tts", str(tmp_path))
+    calls = []
+
+    def compute():
+        calls.append(1)
+        time.sleep(0.1)
+        return b"audio"
+
+    results = []
+    threads = [threading.Thread(target=lambda: results.append(cache.get_or_compute("ab12", compute))) for _ in range(5)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert results == [b"audio"] * 5
+    assert len(calls) == 1
+
+def test_waiters_see_the_computation_fail(tmp_path):
+    cache = TwoTierCache("tts", str(tmp_path))
+    started, release = threading.Event(), threading.Event()
+    errors = []
+
+    def failing():
+        started.set()
+        release.wait(1)
+        raise ValueError("no audio")
+
+    def call():
+        try:
+            cache.get_or_compute("ab12", failing)
+        except ValueError as e:
+            errors.append(str(e))
+
+    leader = threading.Thread(target=call)
+    leader.start()
+    started.wait(1)
+    follower = threading.Thread(target=call)
+    follower.start()
+    release.set()
+    leader.join()
+    follower.join()
+    assert errors == ["no audio", "no audio"]
+    assert cache.get_or_compute("ab12", lambda: b"audio") == b"audio"
+
+def test_scan_skips_files_removed_while_scanning(tmp_path, monkeypatch):
+    TwoTierCache("tts", str(tmp_path)).set("ab12", b"audio")
+    real_stat = os.stat
+
+    def stat(path, *args, **kwargs):
+        if str(path).endswith("ab12.bin"):
+            raise FileNotFoundError(path)
+        return real_stat(path, *args, **kwargs)
+
+    monkeypatch.setattr(os, "stat", stat)
+    assert TwoTierCache("tts", str(tmp_path)).get_stats()["disk_items"] == 0
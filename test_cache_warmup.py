@@ -0,0 +1,51 @@
+"""
+Behaviour tests for warming the translation and TTS caches after a restart.
+Run with: python -m pytest -q test_cache_warmup.py
+"""
+from datetime import datetime
+
+import pytest
+
+import cache_warmup
+from announcement_store import AppendOnlyLogStore
+from cache_warmup import CacheWarmer
+
+@pytest.fixture
+def store(tmp_path):
+    store = AppendOnlyLogStore(str(tmp_path / "announcements.jsonl"), legacy_path=None)
+    yield store
+    store.close()
+
+def announce(store, text, translations, **fields):
+    return store.insert({"text": text, "timestamp": datetime.now().isoformat(), "translations": translations, **fields})
+
+def test_hot_pairs_rank_by_count_and_read_either_source_language_field(store):
+    announce(store, "ನೀರು ಸರಬರಾಜು", {"hindi": "पानी"}, source_lang="kannada")
+    announce(store, "ನೀರು ಸರಬರಾಜು", {"hindi": "पानी की आपूर्ति"}, source_lang="kannada")
+    announce(store, "Water supply", {"tamil": "தண்ணீர்"}, src_lang="english")
+    announce(store, "Road closed", {"tamil": "சாலை"})
+    pairs = CacheWarmer(store=store).hot_pairs()
+    assert pairs[0] == ("ನೀರು ಸರಬರಾಜು", "kan_Knda", "hin_Deva", "पानी की आपूर्ति")
+    assert {pair[:3] for pair in pairs[1:]} == {("Water supply", "eng_Latn", "tam_Taml"),
+                                                 ("Road closed", "eng_Latn", "tam_Taml")}
+
+def test_warm_up_loads_memory_without_touching_hit_counters(store, tmp_path, monkeypatch):
+    from cache_store import TwoTierCache
+    from dwani_client import speech_key, translation_key
+
+    translations = TwoTierCache("translation", str(tmp_path / "t"), suffix=".txt", binary=False)
+    audio = TwoTierCache("tts", str(tmp_path / "s"), suffix=".mp3")
+    translations.set(translation_key("Road closed", "eng_Latn", "tam_Taml"), "சாலை")
+    audio.set(speech_key("சாலை", "tam_Taml"), b"audio")
+    restarted = [TwoTierCache("translation", str(tmp_path / "t"), suffix=".txt", binary=False),
+                 TwoTierCache("tts", str(tmp_path / "s"), suffix=".mp3")]
+    monkeypatch.setattr(cache_warmup, "translation_cache", restarted[0])
+    monkeypatch.setattr(cache_warmup, "tts_cache", restarted[1])
+    announce(store, "Road closed", {"tamil": "சாலை"})
+
+    progress = CacheWarmer(store=store, include_templates=False).run_once()
+    assert (progress["translations_loaded"], progress["audio_loaded"]) == (1, 1)
+    for cache in restarted:
+        stats = cache.get_stats()
+        assert stats["memory_items"] == 1
+        assert (stats["memory_hits"], stats["disk_hits"], stats["misses"]) == (0, 0, 0)
@@ -0,0 +1,185 @@
+"""
+Behaviour tests for the per-endpoint circuit breaker and its use by the
+async Dwani client. Run with: python -m pytest -q test_circuit_breaker.py
+"""
+import asyncio
+import time
+
+import pytest
+from aiohttp import web
+
+from circuit_breaker import CircuitBreaker, CircuitOpenError
+from dwani_async import AsyncDwaniClient
+from rate_limiter import PriorityRateLimiter, RateLimitError, TokenBucket, request_priority
+
+def open_breaker(reset_seconds=0.05, **kwargs) -> CircuitBreaker:
+    breaker = CircuitBreaker("speech", failure_threshold=2, reset_seconds=reset_seconds, **kwargs)
+    breaker.record_failure()
+    breaker.record_failure()
+    return breaker
+
+def half_open_breaker(**kwargs) -> CircuitBreaker:
+    """A breaker that has just turned half-open and will not re-probe on its own during a test"""
+    breaker = open_breaker(reset_seconds=30, **kwargs)
+    breaker._opened_at -= 30
+    assert breaker.state == CircuitBreaker.HALF_OPEN
+    return breaker
+
+def test_opens_after_threshold_and_fails_fast():
+    breaker = CircuitBreaker("translate", failure_threshold=3, reset_seconds=60)
+    breaker.record_failure()
+    breaker.record_failure()
+    assert breaker.state == CircuitBreaker.CLOSED
+    breaker.record_failure()
+    assert breaker.state == CircuitBreaker.OPEN
+    with pytest.raises(CircuitOpenError) as error:
+        breaker.before_call()
+    assert error.value.retry_after > 50
+    with pytest.raises(CircuitOpenError):
+        breaker.check()
+    assert breaker.get_stats()["rejected"] == 2
+
+def test_success_resets_failure_count():
+    breaker = CircuitBreaker("translate", failure_threshold=2, reset_seconds=60)
+    breaker.record_failure()
+    breaker.record_success()
+    breaker.record_failure()
+    assert breaker.state == CircuitBreaker.CLOSED
+
+def test_half_open_admits_one_probe_then_closes_on_success():
+    breaker = open_breaker()
+    time.sleep(0.06)
+    assert breaker.state == CircuitBreaker.HALF_OPEN
+    breaker.check()
+    probe = breaker.before_call()
+    assert probe is not None
+    with pytest.raises(CircuitOpenError):
+        breaker.before_call()
+    breaker.record_success()
+    breaker.release(probe)
+    assert breaker.state == CircuitBreaker.CLOSED
+    assert breaker.before_call() is None
+
+def test_failed_probe_reopens():
+    breaker = open_breaker()
+    time.sleep(0.06)
+    probe = breaker.before_call()
+    breaker.record_failure()
+    breaker.release(probe)
+    assert breaker.state == CircuitBreaker.OPEN
+    assert breaker.get_stats()["opened"] == 2
+
+def test_released_probe_without_outcome_frees_the_slot():
+    breaker = open_breaker()
+    time.sleep(0.06)
+    breaker.release(breaker.before_call())
+    assert breaker.before_call() is not None
+
+def test_stale_half_open_reprobes_after_reset_seconds():
+    breaker = open_breaker()
+    time.sleep(0.06)
+    breaker.before_call()  # a probe that never reports back
+    with pytest.raises(CircuitOpenError):
+        breaker.before_call()
+    time.sleep(0.06)
+    assert breaker.before_call() is not None
+
+def test_release_from_an_earlier_round_is_ignored():
+    breaker = open_breaker(half_open_max_calls=1)
+    time.sleep(0.06)
+    stale = breaker.before_call()
+    time.sleep(0.06)
+    breaker.before_call()  # next round's probe
+    breaker.release(stale)
+    with pytest.raises(CircuitOpenError):
+        breaker.before_call()
+
+# ======================
+# ASYNC CLIENT
+# ======================
+async def _start_server(handler):
+    app = web.Application()
+    app.router.add_post("/v1/audio/speech", handler)
+    runner = web.AppRunner(app)
+    await runner.setup()
+    site = web.TCPSite(runner, "127.0.0.1", 0)
+    await site.start()
+    port = site._server.sockets[0].getsockname()[1]
+    return runner, f"http://127.0.0.1:{port}"
+
+def test_client_rate_limit_in_half_open_keeps_the_probe_slot():
+    async def scenario():
+        async def ok(request):
+            return web.Response(body=b"audio")
+
+        runner, base = await _start_server(ok)
+        breaker = half_open_breaker()
+        bucket = TokenBucket("speech", 60, capacity=1)
+        bucket.pause(30)
+        client = AsyncDwaniClient(
+            api_key="test", api_base=base, endpoints={"speech": {"timeout": 0.1}},
+            limiters={"speech": PriorityRateLimiter(bucket)}, breakers={"speech": breaker}
+        )
+        try:
+            with pytest.raises(RateLimitError):
+                await client.speech("hello")
+            assert breaker.state == CircuitBreaker.HALF_OPEN
+            client.limiters = {}
+            assert await client.speech("hello") == b"audio"
+            assert breaker.state == CircuitBreaker.CLOSED
+        finally:
+            await client.close()
+            await runner.cleanup()
+
+    asyncio.run(scenario())
+
+def test_client_cancelled_hedge_releases_the_probe_slots():
+    async def scenario():
+        async def hang(request):
+            await asyncio.sleep(2)
+            return web.Response(body=b"audio")
+
+        runner, base = await _start_server(hang)
+        breaker = half_open_breaker(half_open_max_calls=2)
+        client = AsyncDwaniClient(
+            api_key="test", api_base=base, breakers={"speech": breaker},
+            hedging={"max_priority": 1, "endpoints": ["speech"], "percentile": 95, "min_samples": 1, "window": 10}
+        )
+        client._latencies["speech"].append(0.01)
+        try:
+            with request_priority(1):
+                with pytest.raises(asyncio.TimeoutError):
+                    await asyncio.wait_for(client.speech("hello"), 0.3)
+            assert client.stats["speech"]["hedged"] == 1
+            # Primary and duplicate were both cancelled without an outcome; both slots are free again
+            assert breaker.state == CircuitBreaker.HALF_OPEN
+            assert breaker.before_call() is not None
+            assert breaker.before_call() is not None
+        finally:
+            await client.close()
+            await runner.cleanup()
+
+    asyncio.run(scenario())
+
+def test_client_cancelled_probe_in_half_open_is_released():
+    async def scenario():
+        async def hang(request):
+            await asyncio.sleep(2)
+            return web.Response(body=b"audio")
+
+        runner, base = await _start_server(hang)
+        breaker = half_open_breaker()
+        client = AsyncDwaniClient(api_key="test", api_base=base, breakers={"speech": breaker})
+        try:
+            task = asyncio.ensure_future(client.speech("hello"))
+            await asyncio.sleep(0.1)
+            task.cancel()
+            with pytest.raises(asyncio.CancelledError):
+                await task
+            assert breaker.state == CircuitBreaker.HALF_OPEN
+            assert breaker.before_call() is not None
+        finally:
+            await client.close()
+            await runner.cleanup()
+
+    asyncio.run(scenario())
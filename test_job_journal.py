@@ -0,0 +1,125 @@
+"""
+Behaviour tests for the durable job journal and lease-based replay.
+Run with: python -m pytest -q test_job_journal.py
+"""
+import os
+
+import pytest
+
+from job_journal import JobJournal
+
+@pytest.fixture
+def journal(tmp_path):
+    journal = JobJournal(str(tmp_path / "jobs.db"), commit_interval_ms=1)
+    yield journal
+    journal.close()
+
+def test_pending_returns_unfinished_jobs_most_urgent_first(journal):
+    general = journal.enqueue(4, {"text": "general"})
+    emergency = journal.enqueue(1, {"text": "emergency"})
+    journal.finish(journal.enqueue(4, {"text": "done"})).result()
+    assert [job["id"] for job in journal.pending()] == [emergency, general]
+    assert journal.pending()[0]["payload"] == {"text": "emergency"}
+
+def test_completed_languages_survive_and_record_is_attached(journal):
+    job_id = journal.enqueue(2, {"text": "vaccination drive"})
+    journal.complete_language(job_id, "kannada", {"translated_text": "ಲಸಿಕೆ", "audio_path": None})
+    journal.attach_record(job_id, "rec-1").result()
+    assert journal.completed_languages(job_id) == {"kannada": {"translated_text": "ಲಸಿಕೆ", "audio_path": None}}
+    assert journal.pending()[0]["record_id"] == "rec-1"
+
+def test_lease_is_exclusive_until_it_expires(journal):
+    job_id = journal.enqueue(3, {"text": "scheme"})
+    assert [job["id"] for job in journal.lease("a", 60)] == [job_id]
+    assert journal.lease("b", 60) == []
+    assert journal.pending() == []
+
+    other = journal.enqueue(3, {"text": "short lease"})
+    assert [job["id"] for job in journal.lease("a", -1)] == [other]
+    assert [job["id"] for job in journal.lease("b", 60)] == [other]
+
+def test_lease_without_limit_takes_every_free_job(journal):
+    ids = [journal.enqueue(4, {"text": str(i)}) for i in range(3)]
+    journal.lease("a", 60, limit=1)
+    assert [job["id"] for job in journal.lease("b", 60, limit=None)] == ids[1:]
+
+def test_enqueue_with_owner_is_leased_right_away(journal):
+    journal.enqueue(4, {"text": "in process"}, owner="a", lease_seconds=60)
+    assert journal.pending() == []
+    assert journal.lease("b", 60) == []
+
+def test_finish_checks_the_lease_holder(journal):
+    job_id = journal.enqueue(4, {"text": "contested"})
+    journal.lease("a", -1)
+    journal.lease("b", 60)
+    assert journal.finish(job_id, owner="a").result() == 0
+    assert journal.get_stats()["queued_jobs"] == 1
+    assert journal.finish(job_id, owner="b").result() == 1
+    assert journal.get_stats()["queued_jobs"] == 0
+    assert journal.finish(job_id, owner="b").result() == 0
+
+def test_release_and_renew_only_apply_to_the_holder(journal):
+    job_id = journal.enqueue(4, {"text": "held"})
+    journal.lease("a", 60)
+    journal.release(job_id, "b").result()
+    assert journal.pending() == []
+    journal.release(job_id, "a").result()
+    assert [job["id"] for job in journal.pending()] == [job_id]
+
+# ======================
+# REPLAY
+# ======================
+@pytest.fixture
+def systems(tmp_path, monkeypatch):
+    from announcement_store import AppendOnlyLogStore
+    from bhashaseva_enhanced import AnnouncementSystem
+
+    monkeypatch.setenv("DWANI_API_KEY", os.getenv("DWANI_API_KEY") or "test")
+    store = AppendOnlyLogStore(str(tmp_path / "announcements.jsonl"))
+    journals = []
+
+    def make():
+        journal = JobJournal(str(tmp_path / "jobs.db"), commit_interval_ms=1)
+        journals.append(journal)
+        return AnnouncementSystem(store=store, journal=journal)
+
+    yield make
+    for journal in journals:
+        journal.close()
+
+def test_concurrent_replays_share_out_the_unfinished_jobs(systems):
+    first, second = systems(), systems()
+    job_ids = {first.journal.enqueue(4, {"text": f"job {i}"}) for i in range(5)}
+    assert first.replay_journal() + second.replay_journal() == 5
+    assert second.replay_journal() == 0
+    queued = [item[2] for item in first.announcement_queue.queue]
+    assert {announcement.job_id for announcement in queued} == job_ids
+    assert all(announcement.lease_owner == first.lease_owner for announcement in queued)
+
+def test_replay_skips_jobs_queued_in_another_live_process(systems):
+    from bhashaseva_enhanced import Announcement
+
+    first, second = systems(), systems()
+    first.translate_and_deliver(Announcement(text="queued in first", target_langs=["hindi"]))
+    assert second.replay_journal() == 0
+
+def test_shutdown_releases_unfinished_jobs_for_the_next_start(systems):
+    from bhashaseva_enhanced import Announcement
+
+    first = systems()
+    first.translate_and_deliver(Announcement(text="left in the queue", target_langs=["hindi"]))
+    first.shutdown()
+    assert systems().replay_journal() == 1
+
+def test_finishing_a_job_whose_lease_was_lost_leaves_it_to_the_holder(systems):
+    from bhashaseva_enhanced import Announcement
+
+    first = systems()
+    announcement = Announcement(text="slow", target_langs=["hindi"])
+    first.translate_and_deliver(announcement)
+    first.journal.lease("elsewhere", 60, limit=None)  # nothing free: first still holds it
+    first.journal._write("UPDATE jobs SET lease_expires = 0 WHERE id = ?", (announcement.job_id,)).result()
+    first.journal.lease("elsewhere", 60)
+    first._finish_job(announcement, "completed")
+    assert first.journal.get_stats()["queued_jobs"] == 1
+    assert first.journal.finish(announcement.job_id, owner="elsewhere").result() == 1
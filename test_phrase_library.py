@@ -0,0 +1,94 @@
+"""
+Behaviour tests for composing emergency templates from the phrase library.
+Run with: python -m pytest -q test_phrase_library.py
+"""
+import pytest
+
+import phrase_library
+from cache_store import TwoTierCache
+from dwani_client import speech_key, translation_key
+from phrase_library import PhraseLibrary, parse_template
+
+LANGUAGES = {"english": "eng_Latn", "hindi": "hin_Deva", "kannada": "kan_Knda"}
+PROTOCOLS = {
+    "flood": {"templates": {
+        "flood_warning": {
+            "text": "Flood warning. District: {district}. Expected from: {time}.",
+            "slots": {"time": ["today", "tonight"]}
+        }
+    }},
+    "heatwave": {"templates": {"heatwave": "Heatwave alert. District: {district}."}}
+}
+
+@pytest.fixture
+def library(tmp_path, monkeypatch):
+    calls = []
+
+    def translate(text, src_code, tgt_code):
+        calls.append(("translate", text, tgt_code))
+        return f"{tgt_code}:{text}"
+
+    def speech(text, lang_code):
+        calls.append(("speech", text, lang_code))
+        return f"<{text}>".encode("utf-8")
+
+    monkeypatch.setattr(phrase_library.dwani_client, "translate", translate)
+    monkeypatch.setattr(phrase_library.dwani_client, "speech", speech)
+    monkeypatch.setattr(phrase_library, "translation_cache", TwoTierCache("translation", str(tmp_path / "t"), binary=False))
+    monkeypatch.setattr(phrase_library, "tts_cache", TwoTierCache("tts", str(tmp_path / "s"), suffix=".mp3"))
+    library = PhraseLibrary(PROTOCOLS, LANGUAGES, ["Mysuru", "Udupi"], directory=str(tmp_path / "phrases"))
+    library.calls = calls
+    return library
+
+def test_parse_template_separates_phrases_slots_and_joiners():
+    assert parse_template("District: {district}. Expected from: {time}.") == [
+        ("phrase", "District:"), ("slot", "district"), ("joiner", "."),
+        ("phrase", "Expected from:"), ("slot", "time"), ("joiner", ".")
+    ]
+
+def test_phrases_cover_fixed_text_and_allowed_slot_values(library):
+    phrases = library.phrases()
+    assert phrases[:4] == ["Flood warning. District:", "Mysuru", "Udupi", "Expected from:"]
+    assert {"today", "tonight", "Heatwave alert. District:"} <= set(phrases)
+    assert len(phrases) == len(set(phrases))
+
+def test_build_is_resumable(library, tmp_path):
+    report = library.build(["hindi"])
+    assert report == {"built": len(library.phrases()), "existing": 0, "failed": 0}
+    library.calls.clear()
+    assert library.build(["hindi"])["existing"] == len(library.phrases())
+    assert library.calls == []
+
+    reopened = PhraseLibrary(PROTOCOLS, LANGUAGES, ["Mysuru", "Udupi"], directory=str(tmp_path / "phrases"))
+    assert reopened.get_stats()["languages"] == {"hindi": len(library.phrases())}
+
+def test_render_composes_text_and_audio_in_the_target_script(library):
+    library.build(["hindi"])
+    text, audio = library.render("flood_warning", "hindi", {"district": ["Mysuru", "Udupi"], "time": "tonight"})
+    assert text == ("hin_Deva:Flood warning. District: hin_Deva:Mysuru, hin_Deva:Udupi। "
+                    "hin_Deva:Expected from: hin_Deva:tonight।")
+    assert audio == "".join(f"<{part}>" for part in [
+        "hin_Deva:Flood warning. District:", "hin_Deva:Mysuru", "hin_Deva:Udupi",
+        "hin_Deva:Expected from:", "hin_Deva:tonight"
+    ]).encode("utf-8")
+    assert library.stats["rendered"] == 1
+
+def test_render_returns_none_for_unbuilt_languages_and_values(library):
+    library.build(["hindi"])
+    assert library.render("flood_warning", "kannada", {"district": "Mysuru", "time": "today"}) is None
+    assert library.render("flood_warning", "hindi", {"district": "Mysuru", "time": "next week"}) is None
+    assert library.stats["missing"] == 2
+
+def test_fill_requires_every_slot(library):
+    assert library.fill("heatwave", {"district": ["Mysuru", "Udupi"]}) == "Heatwave alert. District: Mysuru, Udupi."
+    with pytest.raises(ValueError):
+        library.fill("flood_warning", {"district": "Mysuru"})
+
+def test_prime_seeds_the_caches_for_served_languages(library):
+    library.build(["hindi"])
+    message, served = library.prime("heatwave", {"district": "Udupi"}, ["hindi", "kannada"])
+    assert message == "Heatwave alert. District: Udupi."
+    assert served == ["hindi"]
+    translated = phrase_library.translation_cache.get(translation_key(message, "eng_Latn", "hin_Deva"))
+    assert translated == "hin_Deva:Heatwave alert. District: hin_Deva:Udupi।"
+    assert phrase_library.tts_cache.get(speech_key(translated, "hin_Deva")) is not None
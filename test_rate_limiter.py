@@ -0,0 +1,103 @@
+"""
+Behaviour tests for the shared token bucket and the priority-aware limiter.
+Run with: python -m pytest -q test_rate_limiter.py
+"""
+import asyncio
+
+import pytest
+
+from rate_limiter import DEFAULT_PRIORITY, PriorityRateLimiter, RateLimitError, TokenBucket, current_priority, request_priority
+
+def test_bucket_hands_out_its_burst_then_reports_the_wait():
+    bucket = TokenBucket("translate", 60, capacity=2)
+    assert bucket.try_take() == 0.0
+    assert bucket.try_take() == 0.0
+    assert 0.9 < bucket.try_take() <= 1.0
+
+def test_pause_empties_the_bucket_until_it_expires():
+    bucket = TokenBucket("speech", 6000)
+    bucket.pause(30)
+    assert bucket.try_take() > 29
+    assert bucket.wait_time() > 29
+
+def test_shared_state_file_spans_bucket_instances(tmp_path):
+    path = str(tmp_path / "buckets.json")
+    first = TokenBucket("speech", 60, capacity=1, state_path=path)
+    second = TokenBucket("speech", 60, capacity=1, state_path=path)
+    other = TokenBucket("translate", 60, capacity=1, state_path=path)
+    assert first.try_take() == 0.0
+    assert second.try_take() > 0
+    assert other.try_take() == 0.0
+
+def test_request_priority_is_scoped_to_the_block():
+    assert current_priority() == DEFAULT_PRIORITY
+    with request_priority(1):
+        assert current_priority() == 1
+    assert current_priority() == DEFAULT_PRIORITY
+
+def test_urgent_waiter_is_served_before_an_earlier_backlog():
+    async def scenario():
+        bucket = TokenBucket("speech", 600, capacity=1)
+        bucket.try_take()
+        limiter = PriorityRateLimiter(bucket)
+        order = []
+
+        async def call(name, priority):
+            await limiter.acquire(priority)
+            order.append(name)
+
+        tasks = [asyncio.ensure_future(call(f"general {i}", 4)) for i in range(3)]
+        await asyncio.sleep(0)
+        tasks.append(asyncio.ensure_future(call("emergency", 1)))
+        await asyncio.gather(*tasks)
+        return order
+
+    assert asyncio.run(scenario()) == ["emergency", "general 0", "general 1", "general 2"]
+
+def test_max_wait_fails_fast_when_the_queue_ahead_is_too_long():
+    async def scenario():
+        bucket = TokenBucket("speech", 60, capacity=1)
+        bucket.try_take()
+        limiter = PriorityRateLimiter(bucket)
+        with pytest.raises(RateLimitError) as error:
+            await limiter.acquire(4, max_wait=0.1)
+        assert error.value.endpoint == "speech" and error.value.retry_after > 0.1
+        assert limiter.pending() == 0
+
+    asyncio.run(scenario())
+
+def test_waiter_overtaken_past_max_wait_gives_up_without_a_token():
+    async def scenario():
+        bucket = TokenBucket("speech", 300, capacity=1)
+        bucket.try_take()
+        limiter = PriorityRateLimiter(bucket)
+        general = asyncio.ensure_future(limiter.acquire(4, max_wait=0.3))
+        await asyncio.sleep(0)
+        # An emergency arriving later takes the next token, so the general call runs out of time
+        await limiter.acquire(1)
+        with pytest.raises(RateLimitError):
+            await general
+        assert limiter.pending() == 0
+        await asyncio.sleep(0.2)
+        assert bucket.try_take() == 0.0
+
+    asyncio.run(scenario())
+
+def test_sdk_speech_waits_for_a_speech_token(monkeypatch):
+    import dwani_client
+    from circuit_breaker import CircuitBreaker
+    from dwani_async import AsyncDwaniClient
+
+    bucket = TokenBucket("speech", 60, capacity=1)
+    client = AsyncDwaniClient(api_key="test", api_base="http://127.0.0.1:9", endpoints={"speech": {"timeout": 0.1}},
+                              limiters={"speech": PriorityRateLimiter(bucket)})
+    sent = []
+    monkeypatch.setattr(dwani_client, "get_async_client", lambda: client)
+    monkeypatch.setattr(dwani_client, "get_circuit_breaker", lambda name: CircuitBreaker(name))
+    monkeypatch.setattr(dwani_client._speech_adapter, "synthesize", lambda text, fmt: sent.append(text) or b"audio")
+
+    assert dwani_client.synthesize("first") == b"audio"
+    with pytest.raises(RateLimitError):
+        dwani_client.synthesize("second")
+    assert sent == ["first"]
+    assert client.stats["speech"]["rate_limited"] == 1
@@ -0,0 +1,83 @@
+"""
+Behaviour tests for sentence splitting, chunking and frame-level MP3 joining.
+Run with: python -m pytest -q test_speech_chunking.py
+"""
+from speech_chunking import chunk_text, join_mp3, sentence_end, split_sentences
+
+# MPEG-1 Layer III, 128 kbps, 44.1 kHz, stereo: 417-byte frames, side info ends at byte 36
+FRAME_HEADER = b"\xff\xfb\x90\x00"
+FRAME_LENGTH = 417
+
+def frame(fill: bytes = b"\x00", tag: bytes = None) -> bytes:
+    body = b"\x00" * 32 + tag if tag else b""
+    return (FRAME_HEADER + body).ljust(FRAME_LENGTH, fill)
+
+def id3(payload: bytes = b"TIT2tag") -> bytes:
+    size = len(payload)
+    return b"ID3\x04\x00\x00" + bytes([size >> 21 & 0x7F, size >> 14 & 0x7F, size >> 7 & 0x7F, size & 0x7F]) + payload
+
+def test_latin_split_keeps_decimals_and_closing_quotes():
+    text = 'Rainfall of 2.5 cm is expected. Stay indoors! Is the road "closed?" Yes'
+    assert split_sentences(text, "kan_Knda") == [
+        "Rainfall of 2.5 cm is expected.", "Stay indoors!", 'Is the road "closed?"', "Yes"
+    ]
+
+def test_danda_scripts_do_not_split_at_abbreviations():
+    text = "डॉ. शर्मा कल आएंगे। टीकाकरण सुबह होगा॥ कृपया आएं"
+    assert split_sentences(text, "hin_Deva") == ["डॉ. शर्मा कल आएंगे।", "टीकाकरण सुबह होगा॥", "कृपया आएं"]
+    assert sentence_end("hin_Deva") == "।" and sentence_end("kan_Knda") == "."
+
+def test_urdu_uses_the_arabic_full_stop():
+    assert split_sentences("پانی بند رہے گا۔ براہ کرم محفوظ رہیں۔", "urd_Arab") == ["پانی بند رہے گا۔", "براہ کرم محفوظ رہیں۔"]
+
+def test_chunks_join_short_headings_and_break_long_sentences():
+    heading = "Attention!"
+    body = "The water supply in ward twelve will be interrupted on Monday for pipeline repairs."
+    assert chunk_text(f"{heading} {body}", min_chunk_chars=20) == [f"{heading} {body}"]
+
+    long_sentence = "Residents of the east, west, north and south wards must boil drinking water until further notice."
+    chunks = chunk_text(long_sentence, min_chunk_chars=10, max_chunk_chars=40)
+    assert all(len(chunk) <= 40 for chunk in chunks)
+    assert " ".join(chunks) == long_sentence
+
+def test_short_tail_is_appended_to_the_last_chunk():
+    assert chunk_text("The market will remain closed tomorrow. Thanks.", min_chunk_chars=20) == [
+        "The market will remain closed tomorrow. Thanks."
+    ]
+
+def test_join_mp3_drops_tags_and_info_frames():
+    first = id3() + frame(tag=b"Info") + frame(b"\x01") + b"TAG" + b"\x00" * 125
+    second = frame(tag=b"Xing") + frame(b"\x02")
+    assert join_mp3([first, second]) == frame(b"\x01") + frame(b"\x02")
+
+def test_join_mp3_keeps_a_single_clip_untouched():
+    clip = id3() + frame(tag=b"Info") + frame(b"\x01")
+    assert join_mp3([clip]) == clip
+
+def test_long_text_is_synthesized_by_sentence_within_max_parallel(tmp_path, monkeypatch):
+    import asyncio
+
+    import dwani_client
+    from cache_store import TwoTierCache
+
+    class Client:
+        active = peak = 0
+        texts = []
+
+        async def speech(self, text, response_format="mp3"):
+            Client.active += 1
+            Client.peak = max(Client.peak, Client.active)
+            await asyncio.sleep(0.01)
+            Client.active -= 1
+            Client.texts.append(text)
+            return frame(bytes([len(Client.texts)]))
+
+    monkeypatch.setattr(dwani_client, "get_async_client", Client)
+    monkeypatch.setattr(dwani_client, "tts_cache", TwoTierCache("tts", str(tmp_path), suffix=".mp3"))
+    monkeypatch.setitem(dwani_client._chunking, "max_parallel", 2)
+    text = " ".join(f"Sentence number {i} of the water supply announcement for ward twelve." for i in range(6))
+    path = dwani_client.speech_file(text, "eng_Latn")
+    assert len(Client.texts) == 6 and Client.peak == 2
+    with open(path, "rb") as f:
+        assert len(f.read()) == 6 * FRAME_LENGTH
+    assert dwani_client.speech_file(text, "eng_Latn") == path and len(Client.texts) == 6
@@ -0,0 +1,97 @@
+import time
+import asyncio
+import uuid
+import logging
+import threading
+from typing import Dict, Optional
+
+from dwani_async import get_async_client, submit_async
+from dwani_client import speech_async, speech_key, tts_cache
+
+logger = logging.getLogger(__name__)
+
+# Finished jobs stay available to status polls for this long
+JOB_RETENTION_SECONDS = 600
+
+def _save_audio(key: str, audio: bytes) -> str:
+    """Write the canonical blob served by /audio/ if only the memory tier had it; returns its path"""
+    tts_cache.set(key, audio)
+    return tts_cache.path(key)
+
+# ======================
+# VOICE JOBS
+# ======================
+class VoiceJobRegistry:
+    """
+    Recognize-and-speak jobs for recorded voice, run on the Dwani event loop.
+
+    The upload is handed over as bytes, recognized and re-synthesized as a
+    coroutine, so neither a temporary file nor a request thread is held
+    while Dwani works. Job state is kept in memory and polled through get().
+    """
+
+    def __init__(self, retention_seconds: float = JOB_RETENTION_SECONDS):
+        self.retention = retention_seconds
+        self._jobs: Dict[str, dict] = {}
+        self._lock = threading.Lock()
+
+    def submit(self, audio: bytes, language: str, lang_code: str, filename: str = "audio.wav") -> str:
+        """
+        Queue a voice recording for speech recognition and synthesis.
+
+        Args:
+            audio: Encoded recording
+            language: Language name for ASR (e.g. "kannada")
+            lang_code: Language code of the recognized text for TTS (e.g. kan_Knda)
+            filename: Name reported for the multipart upload
+
+        Returns:
+            str: The job id
+        """
+        job_id = uuid.uuid4().hex
+        with self._lock:
+            self._prune()
+            self._jobs[job_id] = {"status": "queued", "language": language, "submitted_at": time.time()}
+        submit_async(self._run(job_id, audio, language, lang_code, filename))
+        return job_id
+
+    async def _run(self, job_id: str, audio: bytes, language: str, lang_code: str, filename: str) -> None:
+        self._update(job_id, status="running")
+        try:
+            response = await get_async_client().transcribe(audio, language, filename)
+            text = (response or {}).get("text")
+            if not text:
+                raise ValueError("Speech recognition failed")
+            audio_bytes = await speech_async(text, lang_code)
+            # The blob is written on an executor thread, so the disk I/O does not stall other Dwani calls
+            audio_path = await asyncio.get_running_loop().run_in_executor(
+                None, _save_audio, speech_key(text, lang_code), audio_bytes
+            )
+            self._update(job_id, status="completed", text=text, audio_path=audio_path)
+        except Exception as e:
+            logger.error(f"Voice job {job_id} failed: {str(e)}")
+            self._update(job_id, status="failed", error=str(e))
+
+    def _update(self, job_id: str, **fields) -> None:
+        with self._lock:
+            self._prune()
+            job = self._jobs.get(job_id)
+            if job is None:
+                return
+            job.update(fields)
+            if fields.get("status") in ("completed", "failed"):
+                job["finished_at"] = time.time()
+
+    def _prune(self) -> None:
+        cutoff = time.time() - self.retention
+        for job_id in [job_id for job_id, job in self._jobs.items() if job.get("finished_at", time.time()) < cutoff]:
+            del self._jobs[job_id]
+
+    def get(self, job_id: str) -> Optional[dict]:
+        """Snapshot of a job (status, and text/audio_path or error once finished), or None if unknown or expired"""
+        with self._lock:
+            self._prune()
+            job = self._jobs.get(job_id)
+            return dict(job) if job else None
+
+voice_jobs = VoiceJobRegistry()